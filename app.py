@@ -1,6 +1,6 @@
 from src import create_fastAPI_app
-from src.utils.config import Config
+from src.utils.config import load_settings
 
 
-config = Config('config.yaml')
-app = create_fastAPI_app(config.fastAPI)
+settings = load_settings('config.yaml')
+app = create_fastAPI_app(settings)
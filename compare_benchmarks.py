@@ -0,0 +1,67 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Tuple
+
+
+# показатели, рост которых означает ухудшение, и показатели, ухудшение которых - их снижение
+HIGHER_IS_WORSE = ('p50_ms', 'p95_ms', 'p99_ms', 'peak_rss_mb')
+LOWER_IS_WORSE = ('throughput_rps',)
+# любой рост числа ошибок считается ухудшением
+ERRORS = 'errors'
+
+
+def compare(
+        base: Dict[str, Any],
+        new: Dict[str, Any],
+        threshold: float
+) -> Tuple[List[str], List[str]]:
+    """Сравнивает результаты бенчмарков двух коммитов.
+
+    Args:
+        base: Результаты базового коммита (BENCHMARK_OUTPUT).
+        new: Результаты проверяемого коммита.
+        threshold: Допустимое относительное ухудшение, например 0.2.
+
+    Returns:
+        Строки отчёта по всем показателям и строки с показателями, ухудшившимися больше допустимого.
+    """
+    lines, regressions = [], []
+    for (name, new_result) in sorted(new['results'].items()):
+        base_result = base['results'].get(name)
+        if base_result is None:
+            lines.append(f'{name}: new')
+            continue
+        if new_result.get(ERRORS, 0) > base_result.get(ERRORS, 0):
+            line = f'{name} {ERRORS}: {base_result.get(ERRORS, 0)} -> {new_result[ERRORS]}'
+            lines.append(line)
+            regressions.append(line)
+        for key in HIGHER_IS_WORSE + LOWER_IS_WORSE:
+            if key not in base_result or key not in new_result or not base_result[key]:
+                continue
+            change = (new_result[key] - base_result[key]) / base_result[key]
+            line = f'{name} {key}: {base_result[key]} -> {new_result[key]} ({change:+.1%})'
+            lines.append(line)
+            worse = change if key in HIGHER_IS_WORSE else -change
+            if worse > threshold:
+                regressions.append(line)
+    return lines, regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare benchmark results of two commits.')
+    parser.add_argument('base', help='results of the base commit')
+    parser.add_argument('new', help='results of the checked commit')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    with open(args.base) as file:
+        base = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    lines, regressions = compare(base, new, args.threshold)
+    print('\n'.join(lines))
+    if regressions:
+        print(f'\n{len(regressions)} regressions above {args.threshold:.0%}:')
+        print('\n'.join(regressions))
+        sys.exit(1)
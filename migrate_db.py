@@ -0,0 +1,12 @@
+import os
+
+from sqlalchemy import create_engine
+
+from src.models.migrations import migrate
+
+
+if __name__ == '__main__':
+    DATABASE_URL = os.getenv('SQLALCHEMY_DATABASE_URI')
+    engine = create_engine(DATABASE_URL)
+    for version in migrate(engine):
+        print(f'Applied migration {version}')
@@ -0,0 +1,10 @@
+from src.utils.config import get_settings
+from src.utils.video_catalogue import get_video_catalogue
+from src.utils.video_index import VideoProber
+
+
+if __name__ == '__main__':
+    settings = get_settings()
+    entries, _ = get_video_catalogue().page()
+    probed = VideoProber(settings.fastAPI.VIDEO_PROBER_WORKERS).probe_all(entries)
+    print(f'Probed {probed} of {len(entries)} videos')
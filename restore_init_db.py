@@ -3,10 +3,12 @@ import os
 from sqlalchemy import create_engine
 
 from src.models import metadata
+from src.models.migrations import migrate, migrations_metadata
 
 
 if __name__ == '__main__':
     DATABASE_URL = os.getenv('SQLALCHEMY_DATABASE_URI')
     engine = create_engine(DATABASE_URL)
     metadata.drop_all(engine)
-    metadata.create_all(engine)
\ No newline at end of file
+    migrations_metadata.drop_all(engine)
+    migrate(engine)
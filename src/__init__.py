@@ -1,20 +1,39 @@
 from fastapi import FastAPI
 
-from src.routes import videos_router, frames_router, saved_frames_router
+from src.models import async_engine
+from src.routes import videos_router, frames_router, saved_frames_router, metrics_router
+from src.utils.config import Settings, use_settings
+from src.utils.jobs import start_job_runner, stop_job_runner
+from src.utils.scenes import shutdown_scene_score_store
+from src.utils.video_index import start_video_prober, stop_video_prober
+from src.utils.workers import shutdown_decode_pool
 
 
-def create_fastAPI_app(config: dict) -> FastAPI:
+def create_fastAPI_app(settings: Settings) -> FastAPI:
     """Функция для создания FastAPI приложения.
-    
+
+    Переданные конфигурации становятся конфигурациями процесса: маршруты получают их
+    через зависимость get_settings, остальные модули - вызовом get_settings.
+
     Args:
-        config: Конфигурация FastAPI приложения.
+        settings: Конфигурации сервисов.
 
     Returns:
         FastAPI приложение.
     """
+    use_settings(settings)
     app = FastAPI()
     app.include_router(videos_router, prefix='/api/videos', tags=['videos'])
     app.include_router(frames_router, prefix='/api/frames', tags=['frames'])
     app.include_router(saved_frames_router, prefix='/api/saved_frames', tags=['saved frames'])
+    app.include_router(metrics_router, prefix='/metrics', tags=['metrics'])
+    if settings.fastAPI.VIDEO_PROBER_ENABLED:
+        app.add_event_handler('startup', start_video_prober)
+        app.add_event_handler('shutdown', stop_video_prober)
+    app.add_event_handler('startup', start_job_runner)
+    app.add_event_handler('shutdown', stop_job_runner)
+    app.add_event_handler('shutdown', shutdown_decode_pool)
+    app.add_event_handler('shutdown', shutdown_scene_score_store)
+    app.add_event_handler('shutdown', async_engine.dispose)
 
     return app
\ No newline at end of file
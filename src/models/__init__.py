@@ -1,8 +1,13 @@
-from .database import engine
-from .tables import frame_service_informations, metadata
+from .database import engine, async_engine, connect_async, pool_wait_stats
+from .tables import frame_service_informations, video_metadatas, extraction_jobs, metadata
 
 __all__ = [
     metadata,
     engine,
-    frame_service_informations
+    async_engine,
+    connect_async,
+    pool_wait_stats,
+    frame_service_informations,
+    video_metadatas,
+    extraction_jobs
 ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from src.models.tables import extraction_jobs, frame_service_informations, metadata, video_metadatas
+
+
+class Migration(NamedTuple):
+    """Изменение схемы базы данных.
+
+    Attributes:
+        version: Номер версии схемы после применения изменения.
+        description: Описание изменения.
+        upgrade: Функция, применяющая изменение в рамках транзакции.
+    """
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+migrations_metadata = MetaData()
+
+schema_versions = Table(
+    "schema_version",
+    migrations_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(), nullable=False),
+)
+
+
+def _create_tables(conn: Connection) -> None:
+    # создаются только отсутствующие таблицы, поэтому последующие изменения должны
+    # проверять, не были ли они уже применены
+    metadata.create_all(conn, checkfirst=True)
+
+
+def _add_frame_format(conn: Connection) -> None:
+    columns = {x['name'] for x in inspect(conn).get_columns(frame_service_informations.name)}
+    if 'frame_format' not in columns:
+        conn.execute(text(
+            f"ALTER TABLE {frame_service_informations.name} "
+            "ADD COLUMN frame_format VARCHAR NOT NULL DEFAULT 'png'"
+        ))
+
+
+def _add_frame_number_index(conn: Connection) -> None:
+    for index in frame_service_informations.indexes:
+        if index.name == 'ix_frame_service_information_frame_number':
+            index.create(conn, checkfirst=True)
+
+
+def _create_video_metadata(conn: Connection) -> None:
+    video_metadatas.create(conn, checkfirst=True)
+
+
+def _add_variants(conn: Connection) -> None:
+    columns = {x['name'] for x in inspect(conn).get_columns(frame_service_informations.name)}
+    if 'variants' not in columns:
+        conn.execute(text(f"ALTER TABLE {frame_service_informations.name} ADD COLUMN variants JSON"))
+
+
+def _create_extraction_job(conn: Connection) -> None:
+    extraction_jobs.create(conn, checkfirst=True)
+
+
+def _add_content_digest(conn: Connection) -> None:
+    columns = {x['name'] for x in inspect(conn).get_columns(video_metadatas.name)}
+    if 'content_digest' not in columns:
+        conn.execute(text(f"ALTER TABLE {video_metadatas.name} ADD COLUMN content_digest VARCHAR"))
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'create tables', _create_tables),
+    Migration(2, 'add frame_service_information.frame_format', _add_frame_format),
+    Migration(3, 'add index on frame_service_information.frame_number', _add_frame_number_index),
+    Migration(4, 'create video_metadata', _create_video_metadata),
+    Migration(5, 'add frame_service_information.variants', _add_variants),
+    Migration(6, 'create extraction_job', _create_extraction_job),
+    Migration(7, 'add video_metadata.content_digest', _add_content_digest),
+]
+
+
+def current_version(conn: Connection) -> int:
+    """Возвращает номер текущей версии схемы базы данных (0 - изменения не применялись).
+    """
+    schema_versions.create(conn, checkfirst=True)
+    versions = conn.execute(select(schema_versions.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def migrate(engine: Engine) -> List[int]:
+    """Применяет к базе данных изменения схемы, которые ещё не были применены.
+
+    Каждое изменение выполняется в отдельной транзакции вместе с записью номера версии.
+
+    Args:
+        engine: Подключение к базе данных.
+
+    Returns:
+        Номера применённых версий.
+    """
+    applied = []
+    for migration in MIGRATIONS:
+        with engine.begin() as conn:
+            if migration.version <= current_version(conn):
+                continue
+            migration.upgrade(conn)
+            conn.execute(schema_versions.insert().values(
+                version=migration.version,
+                description=migration.description
+            ))
+        applied.append(migration.version)
+    return applied
@@ -1 +1,3 @@
-from .frame_service_information import frame_service_informations, metadata
\ No newline at end of file
+from .frame_service_information import frame_service_informations, metadata
+from .video_metadata import video_metadatas
+from .extraction_job import extraction_jobs
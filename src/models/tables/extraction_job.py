@@ -0,0 +1,28 @@
+from sqlalchemy import JSON, Column, Float, Index, Integer, String, Table
+
+from .frame_service_information import metadata
+
+extraction_jobs = Table(
+    "extraction_job",
+    metadata,
+    Column("job_id", String(32), primary_key=True),
+    Column("video_file_name", String, nullable=False),
+    Column("first_frame", Integer, nullable=False),
+    Column("frame_count", Integer, nullable=False),
+    Column("frame_format", String, nullable=False),
+    # размер уменьшенных кадров, не заполняется для кадров исходного размера
+    Column("frame_width", Integer, nullable=True),
+    Column("frame_height", Integer, nullable=True),
+    Column("priority", Integer, nullable=False, default=0),
+    # queued, running, done или failed
+    Column("status", String, nullable=False),
+    Column("frames_decoded", Integer, nullable=False, default=0),
+    # пути к файлам с кадрами выполненного задания
+    Column("frame_paths", JSON(), nullable=True),
+    Column("error", String, nullable=True),
+    # время в секундах от начала эпохи; updated_at обновляется вместе с прогрессом выполнения
+    Column("created_at", Float, nullable=False),
+    Column("updated_at", Float, nullable=False),
+    # выборка невыполненных заданий при запуске приложения
+    Index("ix_extraction_job_status", "status"),
+)
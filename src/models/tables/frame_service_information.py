@@ -1,4 +1,4 @@
-from sqlalchemy import MetaData, String, Integer, Table, Column
+from sqlalchemy import JSON, MetaData, String, Integer, Table, Column, Index
 
 metadata = MetaData()
 
@@ -8,4 +8,10 @@ frame_service_informations = Table(
     Column("video_file_name", String, primary_key=True),
     Column("frame_number", Integer, primary_key=True),
     Column("frame_file_path", String(), nullable=False),
+    Column("frame_format", String(), nullable=False, default='png'),
+    # уменьшенные копии кадра: список объектов с полями width, height и frame_path
+    Column("variants", JSON(), nullable=True),
+    # фильтр /api/saved_frames по диапазону номеров кадров без имени видеофайла;
+    # выборки по имени видеофайла используют первичный ключ
+    Index("ix_frame_service_information_frame_number", "frame_number"),
 )
@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, Float, Integer, String, Table
+
+from .frame_service_information import metadata
+
+video_metadatas = Table(
+    "video_metadata",
+    metadata,
+    Column("file_name", String, primary_key=True),
+    Column("file_size", BigInteger, primary_key=True),
+    Column("mtime_ns", BigInteger, primary_key=True),
+    # параметры не заполняются, если видеофайл не удалось открыть
+    Column("fps", Float, nullable=True),
+    Column("frame_count", BigInteger, nullable=True),
+    Column("duration", Float, nullable=True),
+    Column("width", Integer, nullable=True),
+    Column("height", Integer, nullable=True),
+    Column("codec", String, nullable=True),
+    # хеш SHA-256 содержимого для хранилища кадров, вычисляется в фоне
+    Column("content_digest", String, nullable=True),
+)
@@ -1,3 +1,4 @@
 from src.routes.frames import frames_router
+from src.routes.metrics import metrics_router
 from src.routes.saved_frames import saved_frames_router
 from src.routes.videos import videos_router
\ No newline at end of file
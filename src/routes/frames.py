@@ -1,64 +1,183 @@
+import asyncio
 import os
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-import cv2
-from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, conint
+from sqlalchemy import insert, select
 
-from src.utils.config import Config
-from src.utils.get_frames import extract_frame
+from src.models import connect_async
+from src.models import extraction_jobs
+
+from src.utils.config import Settings, get_settings
+from src.utils.frame_storage import get_frame_storage
+from src.utils.frames_cache import get_frames_cache
+from src.utils.get_frames import (
+    CACHE_METHOD, DEDUP_METHOD, RESIZE_METHOD, FramesExtractionError, extract_and_save_frame_windows,
+    extract_and_save_frames, frame_at_time, window_in_range
+)
+from src.utils.jobs import (
+    DONE_STATUS, FAILED_STATUS, QUEUED_STATUS, ExtractionJob, create_job_id, get_job_runner, job_values
+)
+from src.utils.metrics import timed_function
+from src.utils.save_frames import (
+    FRAME_FORMAT_PATTERN, FrameSize, default_frame_format, encode_params, fit_frame_size, frame_extension,
+    frame_file_name, frame_media_type, resize_frame_files
+)
+from src.utils.scenes import HISTOGRAM_METRIC, METRIC_PATTERN, extract_and_save_scene_frames, get_scene_score_store
+from src.utils.single_flight import SingleFlight
+from src.utils.stream_frames import (
+    ARCHIVE_PATTERN, ZIP_ARCHIVE, MultipartWriter, ZipStreamWriter, iter_encoded_frames
+)
+from src.utils.video_capture import VideoMetadata
+from src.utils.video_index import get_indexed_video_metadata, get_video_digest
+from src.utils.workers import WorkerPoolBusy, get_decode_pool
 
 
 frames_router = APIRouter()
+frame_extractions = SingleFlight()
+
+# имя кадров исходного размера среди копий кадров
+FULL_VARIANT = 'full'
 
 
 @frames_router.get('')
-def get_frames(
+@timed_function
+async def get_frames(
     file_name: str = Query(
         description='Имя видеофайла',
         min_length=1
     ),
-    time_in_video: int = Query(
+    time_in_video: Optional[int] = Query(
+        default=None,
         description="Время от начала видеофайла в секундах",
         ge=0
-    )
+    ),
+    time_ms: Optional[int] = Query(
+        default=None,
+        description='Время от начала видеофайла в миллисекундах',
+        ge=0
+    ),
+    frame_number: Optional[int] = Query(
+        default=None,
+        description='Номер первого кадра',
+        ge=0
+    ),
+    count: Optional[int] = Query(
+        default=None,
+        description='Число кадров. По умолчанию задаётся конфигурацией (SAVE_FRAMES_COUNT)',
+        ge=1
+    ),
+    width: Optional[int] = Query(
+        default=None,
+        description='Максимальная ширина кадров в пикселях. Кадры уменьшаются с сохранением пропорций',
+        ge=1
+    ),
+    height: Optional[int] = Query(
+        default=None,
+        description='Максимальная высота кадров в пикселях. Кадры уменьшаются с сохранением пропорций',
+        ge=1
+    ),
+    max_side: Optional[int] = Query(
+        default=None,
+        description='Максимальный размер наибольшей стороны кадров в пикселях',
+        ge=1
+    ),
+    frame_format: Optional[str] = Query(
+        default=None,
+        alias='format',
+        description='Формат файлов с кадрами: png, jpeg или webp. По умолчанию задаётся конфигурацией',
+        regex=FRAME_FORMAT_PATTERN
+    ),
+    variants: bool = Query(
+        default=False,
+        description='Сохранить также копии кадров всех размеров из конфигурации (FRAME_VARIANTS) и исходного размера'
+    ),
+    settings: Settings = Depends(get_settings)
 ) -> JSONResponse:
     """Возвращает номер первого кадра и массив строк с маршрутами к файлам с кадрами.
 
+    Первый кадр задаётся ровно одним из параметров time_in_video, time_ms или frame_number.
+    Время переводится в номер кадра, показываемого в это время, по времени показа (pts)
+    ближайшего предшествующего ключевого кадра. Число кадров ограничено MAX_FRAMES_COUNT.
+    Параметры width, height и max_side уменьшают кадры перед кодированием; уменьшенные кадры
+    сохраняются в файлы <номер>_<ширина>x<высота>.<расширение>. Если кадры большего размера
+    уже извлечены, уменьшенные кадры получаются из них без декодирования видеофайла.
+    При variants=true за один проход сохраняются также копии кадров всех размеров из
+    FRAME_VARIANTS и кадры исходного размера, пути к ним возвращаются в поле variants.
+    Ранее извлечённые и сохранённые на диске кадры возвращаются без повторного декодирования.
+    Время за пределами видеофайла отклоняется по параметрам из кеша или таблицы video_metadata
+    без открытия видеофайла.
+    Кадры видеофайлов с одинаковым содержимым и разными именами берутся из хранилища кадров
+    без декодирования (способ dedup).
+    Способ получения кадров (cache, dedup, resize, seek или linear) возвращается в заголовке X-Extraction-Method.
+    Одновременные запросы одних и тех же кадров (видеофайл, первый кадр, число кадров, формат, размеры)
+    объединяются: кадры извлекаются один раз, остальные запросы ожидают результат.
+    Декодирование выполняется в выделенном пуле обработчиков; при заполненной очереди
+    возвращается 503 с заголовком Retry-After, при превышении времени ожидания - 504.
+
     Params:
         file_name (str): Имя видеофайла.
         time_in_video (int): Время от начала видеофайла в секундах.
+        time_ms (int): Время от начала видеофайла в миллисекундах.
+        frame_number (int): Номер первого кадра.
+        count (int): Число кадров.
+        width (int): Максимальная ширина кадров.
+        height (int): Максимальная высота кадров.
+        max_side (int): Максимальный размер наибольшей стороны кадров.
+        format (str): Формат файлов с кадрами.
+        variants (bool): Сохранить копии кадров всех размеров.
     """
     # field constraints
     # file access by relative paths ../../../something
     simple_filename_check = lambda x: os.pathsep not in x and ".." not in x
     if not simple_filename_check(file_name):
         return JSONResponse({'file_name': 'Forbidden file name.'}, 400)
+    error = _window_params_error(time_in_video, time_ms, frame_number, count, settings)
+    if error is not None:
+        return error
+    count = count or settings.fastAPI.SAVE_FRAMES_COUNT
 
     try:
         # check the existence of the file
-        config = Config()
-        video_path = os.path.join(config.fastAPI['VIDEOS_DIR_PATH'], file_name)
-        if not os.path.isfile(video_path):
+        video_path = os.path.join(settings.fastAPI.VIDEOS_DIR_PATH, file_name)
+        if not await run_in_threadpool(os.path.isfile, video_path):
             return JSONResponse({'file_name': "File doesn't exist."}, 400)
 
-        # extract frames
-        first_frame, frames = extract_frame(video_path, time_in_video)
-        if len(frames) != config.fastAPI['SAVE_FRAMES_COUNT'] or first_frame is None:
+        metadata = await run_in_threadpool(get_indexed_video_metadata, file_name, video_path)
+        if metadata is None:
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        first_frame = await _first_frame(video_path, metadata, time_in_video, time_ms, frame_number)
+        # reject out-of-range requests without opening the file
+        if not window_in_range(metadata, first_frame, count):
             return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        size = fit_frame_size(metadata.width, metadata.height, width, height, max_side)
+        frame_format = frame_format or _default_frame_format(metadata, settings, size)
+        variant_sizes = _variant_sizes(metadata, settings) if variants else {}
+        sizes = list(dict.fromkeys([size, *variant_sizes.values()]))
 
-        # save images
-        frame_dir = os.path.join(config.fastAPI['FRAMES_DIR_PATH'], file_name)
-        if not os.path.exists(frame_dir):
-            os.mkdir(frame_dir)
-        elif os.path.isfile(frame_dir):
-            return JSONResponse({'message': 'Frame directory is file'}, 500)
-
-        frame_paths = []
-        for (i, frame) in enumerate(frames):
-            frame_name = f'{first_frame + i}.png'
-            frame_path = os.path.join(frame_dir, frame_name)
-            frame_paths.append(frame_path)
-            cv2.imwrite(frame_path, frame)
+        # return previously extracted frames
+        frame_paths = await run_in_threadpool(
+            _get_cached_frames, file_name, video_path, first_frame, count, frame_format, sizes
+        )
+        if frame_paths is not None:
+            method = CACHE_METHOD
+        else:
+            # extract and save frames once for concurrent identical requests
+            key = (file_name, first_frame, count, frame_format, tuple(sizes))
+            first_frame, frame_paths, method = await frame_extractions.run(
+                key,
+                lambda: _extract_frames(file_name, video_path, metadata, first_frame, count, frame_format, sizes, settings)
+            )
+    except WorkerPoolBusy:
+        retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+        return JSONResponse({'message': 'Too many requests in progress.'}, 503, headers={'Retry-After': retry_after})
+    except asyncio.TimeoutError:
+        return JSONResponse({'message': 'Frames extraction timed out.'}, 504)
+    except FramesExtractionError as err:
+        return JSONResponse({'message': str(err)}, 500)
     except Exception:
         return JSONResponse({'message': 'Something went wrong'}, 500)
 
@@ -66,4 +185,693 @@ def get_frames(
         "first_frame": first_frame,
         "file_paths": frame_paths
     }
+    if variants:
+        response_data['variants'] = _variants_response(
+            file_name, metadata, first_frame, count, frame_format, variant_sizes
+        )
+    return JSONResponse(response_data, 200, headers={'X-Extraction-Method': method})
+
+
+@frames_router.get('/stream')
+@timed_function
+async def stream_frames(
+    file_name: str = Query(
+        description='Имя видеофайла',
+        min_length=1
+    ),
+    time_in_video: Optional[int] = Query(
+        default=None,
+        description="Время от начала видеофайла в секундах",
+        ge=0
+    ),
+    time_ms: Optional[int] = Query(
+        default=None,
+        description='Время от начала видеофайла в миллисекундах',
+        ge=0
+    ),
+    frame_number: Optional[int] = Query(
+        default=None,
+        description='Номер первого кадра',
+        ge=0
+    ),
+    count: Optional[int] = Query(
+        default=None,
+        description='Число кадров. По умолчанию задаётся конфигурацией (SAVE_FRAMES_COUNT)',
+        ge=1
+    ),
+    width: Optional[int] = Query(
+        default=None,
+        description='Максимальная ширина кадров в пикселях. Кадры уменьшаются с сохранением пропорций',
+        ge=1
+    ),
+    height: Optional[int] = Query(
+        default=None,
+        description='Максимальная высота кадров в пикселях. Кадры уменьшаются с сохранением пропорций',
+        ge=1
+    ),
+    max_side: Optional[int] = Query(
+        default=None,
+        description='Максимальный размер наибольшей стороны кадров в пикселях',
+        ge=1
+    ),
+    frame_format: Optional[str] = Query(
+        default=None,
+        alias='format',
+        description='Формат кадров: png, jpeg или webp. По умолчанию задаётся конфигурацией',
+        regex=FRAME_FORMAT_PATTERN
+    ),
+    archive: str = Query(
+        default=ZIP_ARCHIVE,
+        description='Формат ответа: zip или multipart (multipart/mixed)',
+        regex=ARCHIVE_PATTERN
+    ),
+    persist: bool = Query(
+        default=False,
+        description='Сохранить кадры в каталог с кадрами, как в /api/frames'
+    ),
+    settings: Settings = Depends(get_settings)
+) -> Response:
+    """Возвращает кадры потоком в ZIP-архиве или в теле multipart/mixed без промежуточной записи на диск.
+
+    Кадры кодируются и отправляются клиенту по одному сразу после декодирования, поэтому
+    первые байты уходят после декодирования первого кадра. Ошибка после начала передачи
+    приводит к обрыву ответа без завершающего фрагмента архива. Первый кадр, число кадров
+    и размер кадров задаются так же, как в /api/frames.
+
+    Params:
+        file_name (str): Имя видеофайла.
+        time_in_video (int): Время от начала видеофайла в секундах.
+        time_ms (int): Время от начала видеофайла в миллисекундах.
+        frame_number (int): Номер первого кадра.
+        count (int): Число кадров.
+        width (int): Максимальная ширина кадров.
+        height (int): Максимальная высота кадров.
+        max_side (int): Максимальный размер наибольшей стороны кадров.
+        format (str): Формат кадров.
+        archive (str): Формат ответа.
+        persist (bool): Сохранить кадры на диск.
+    """
+    simple_filename_check = lambda x: os.pathsep not in x and ".." not in x
+    if not simple_filename_check(file_name):
+        return JSONResponse({'file_name': 'Forbidden file name.'}, 400)
+    error = _window_params_error(time_in_video, time_ms, frame_number, count, settings)
+    if error is not None:
+        return error
+    count = count or settings.fastAPI.SAVE_FRAMES_COUNT
+
+    try:
+        video_path = os.path.join(settings.fastAPI.VIDEOS_DIR_PATH, file_name)
+        if not await run_in_threadpool(os.path.isfile, video_path):
+            return JSONResponse({'file_name': "File doesn't exist."}, 400)
+
+        metadata = await run_in_threadpool(get_indexed_video_metadata, file_name, video_path)
+        if metadata is None:
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        first_frame = await _first_frame(video_path, metadata, time_in_video, time_ms, frame_number)
+        if not window_in_range(metadata, first_frame, count):
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        size = fit_frame_size(metadata.width, metadata.height, width, height, max_side)
+        frame_format = frame_format or _default_frame_format(metadata, settings, size)
+        frame_dir = get_frames_cache().frame_dir(file_name) if persist else None
+        frames = get_decode_pool().iterate(
+            iter_encoded_frames(video_path, first_frame, count, frame_format, frame_dir, size)
+        )
+        # первый кадр извлекается до начала ответа, чтобы ошибки возвращались с кодом ответа
+        first = await frames.__anext__()
+    except WorkerPoolBusy:
+        retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+        return JSONResponse({'message': 'Too many requests in progress.'}, 503, headers={'Retry-After': retry_after})
+    except asyncio.TimeoutError:
+        return JSONResponse({'message': 'Frames extraction timed out.'}, 504)
+    except FramesExtractionError as err:
+        return JSONResponse({'message': str(err)}, 500)
+    except Exception:
+        return JSONResponse({'message': 'Something went wrong'}, 500)
+
+    writer = ZipStreamWriter() if archive == ZIP_ARCHIVE else MultipartWriter()
+
+    async def body() -> AsyncIterator[bytes]:
+        ext = frame_extension(frame_format)
+        media_type = frame_media_type(frame_format)
+        try:
+            frame_number, buffer = first
+            for chunk in writer.add(f'{frame_number}.{ext}', media_type, buffer.tobytes(), frame_number):
+                yield chunk
+            async for (frame_number, buffer) in frames:
+                for chunk in writer.add(f'{frame_number}.{ext}', media_type, buffer.tobytes(), frame_number):
+                    yield chunk
+        except (FramesExtractionError, asyncio.TimeoutError):
+            return
+        finally:
+            await frames.aclose()
+        for chunk in writer.close():
+            yield chunk
+        if persist:
+            await run_in_threadpool(
+                _store_frames, file_name, video_path, _frame_names(first_frame, count, frame_format, [size])
+            )
+            get_frames_cache().put(file_name)
+
+    filename = f'{os.path.basename(file_name)}.{first_frame}.zip' if archive == ZIP_ARCHIVE else None
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'} if filename else None
+    return StreamingResponse(body(), media_type=writer.media_type, headers=headers)
+
+
+class FramesBatchSchema(BaseModel):
+    file_name: str = Field(min_length=1)
+    times: List[conint(ge=0)] = Field(default_factory=list)
+    first_frames: List[conint(ge=0)] = Field(default_factory=list)
+    frame_format: Optional[str] = Field(default=None, regex=FRAME_FORMAT_PATTERN)
+
+
+@frames_router.post('/batch')
+@timed_function
+async def get_frames_batch(
+    batch: FramesBatchSchema,
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
+    """Возвращает кадры для нескольких моментов времени и диапазонов одного видеофайла за один проход по нему.
+
+    Для каждого диапазона возвращается номер первого кадра и массив строк с маршрутами к файлам
+    с кадрами, как в /api/frames, в порядке: сначала диапазоны из times, затем из first_frames.
+    Для диапазонов, которые не удалось извлечь, file_paths пуст и добавляется поле message.
+
+    Params:
+        file_name (str): Имя видеофайла.
+        times (List[int]): Времена от начала видеофайла в секундах.
+        first_frames (List[int]): Номера первых кадров диапазонов.
+        frame_format (str): Формат файлов с кадрами.
+    """
+    file_name = batch.file_name
+    simple_filename_check = lambda x: os.pathsep not in x and ".." not in x
+    if not simple_filename_check(file_name):
+        return JSONResponse({'file_name': 'Forbidden file name.'}, 400)
+
+    try:
+        if len(batch.times) + len(batch.first_frames) > settings.fastAPI.BATCH_MAX_WINDOWS:
+            return JSONResponse({'message': 'Too many frame windows requested.'}, 400)
+        video_path = os.path.join(settings.fastAPI.VIDEOS_DIR_PATH, file_name)
+        if not await run_in_threadpool(os.path.isfile, video_path):
+            return JSONResponse({'file_name': "File doesn't exist."}, 400)
+
+        metadata = await run_in_threadpool(get_indexed_video_metadata, file_name, video_path)
+        if metadata is None:
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        frame_format = batch.frame_format or _default_frame_format(metadata, settings)
+        first_frames = [
+            await run_in_threadpool(frame_at_time, video_path, metadata, x * 1000) for x in batch.times
+        ] + list(batch.first_frames)
+
+        # return previously extracted frames, extract the rest in one pass
+        results = await run_in_threadpool(
+            _get_cached_windows, file_name, video_path, first_frames, settings.fastAPI.SAVE_FRAMES_COUNT, frame_format
+        )
+        count = settings.fastAPI.SAVE_FRAMES_COUNT
+        missing = sorted(x for x in set(first_frames) - set(results) if window_in_range(metadata, x, count))
+        if missing:
+            frames_cache = get_frames_cache()
+            with frames_cache.writing(file_name):
+                extracted = await get_decode_pool().run(
+                    extract_and_save_frame_windows, video_path, frames_cache.frame_dir(file_name), missing,
+                    frame_format
+                )
+                results.update(extracted)
+                await run_in_threadpool(
+                    _store_frames, file_name, video_path,
+                    [os.path.basename(x) for frame_paths in extracted.values() for x in frame_paths]
+                )
+            frames_cache.put(file_name)
+    except WorkerPoolBusy:
+        retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+        return JSONResponse({'message': 'Too many requests in progress.'}, 503, headers={'Retry-After': retry_after})
+    except asyncio.TimeoutError:
+        return JSONResponse({'message': 'Frames extraction timed out.'}, 504)
+    except FramesExtractionError as err:
+        return JSONResponse({'message': str(err)}, 500)
+    except Exception:
+        return JSONResponse({'message': 'Something went wrong'}, 500)
+
+    response_data = []
+    for first_frame in first_frames:
+        if first_frame in results:
+            response_data.append({"first_frame": first_frame, "file_paths": results[first_frame]})
+        else:
+            response_data.append({"first_frame": first_frame, "file_paths": [], "message": "Failed to extract frames."})
+    return JSONResponse(response_data, 200)
+
+
+@frames_router.get('/scenes')
+@timed_function
+async def get_scene_frames(
+    file_name: str = Query(
+        description='Имя видеофайла',
+        min_length=1
+    ),
+    count: Optional[int] = Query(
+        default=None,
+        description='Число кадров. По умолчанию задаётся конфигурацией (SAVE_FRAMES_COUNT)',
+        ge=1
+    ),
+    metric: str = Query(
+        default=HISTOGRAM_METRIC,
+        description='Способ оценки отличия кадра от предыдущего: histogram или difference',
+        regex=METRIC_PATTERN
+    ),
+    min_distance: Optional[int] = Query(
+        default=None,
+        description='Минимальное расстояние между кадрами. По умолчанию задаётся конфигурацией (SCENE_MIN_DISTANCE)',
+        ge=1
+    ),
+    step: int = Query(
+        default=1,
+        description='Шаг между оцениваемыми кадрами',
+        ge=1
+    ),
+    frame_format: Optional[str] = Query(
+        default=None,
+        alias='format',
+        description='Формат файлов с кадрами: png, jpeg или webp. По умолчанию задаётся конфигурацией',
+        regex=FRAME_FORMAT_PATTERN
+    ),
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
+    """Возвращает кадры на границах сцен видеофайла вместо подбора моментов времени вручную.
+
+    Видеофайл читается один раз: каждый кадр уменьшается до SCENE_ANALYSIS_SIDE пикселей
+    по наибольшей стороне и сравнивается с предыдущим по гистограмме яркости (histogram)
+    или попиксельно (difference). Оценки сохраняются рядом с индексом ключевых кадров.
+    Если оценка не завершилась за DECODE_TIMEOUT, возвращается 202 с Retry-After, а оценка
+    продолжается в фоне. Возвращаются count кадров с наибольшим отличием, не ближе
+    min_distance кадров друг к другу; первый кадр видеофайла выбирается всегда. Кадры
+    сохраняются с теми же именами, что и кадры /api/frames, и возвращаются в порядке возрастания
+    номеров с оценкой отличия от 0 до 1.
+
+    Params:
+        file_name (str): Имя видеофайла.
+        count (int): Число кадров.
+        metric (str): Способ оценки отличия кадров.
+        min_distance (int): Минимальное расстояние между кадрами.
+        step (int): Шаг между оцениваемыми кадрами.
+        format (str): Формат файлов с кадрами.
+    """
+    simple_filename_check = lambda x: os.pathsep not in x and ".." not in x
+    if not simple_filename_check(file_name):
+        return JSONResponse({'file_name': 'Forbidden file name.'}, 400)
+    if count is not None and count > settings.fastAPI.MAX_FRAMES_COUNT:
+        return JSONResponse({'count': 'Too many frames requested.'}, 400)
+    count = count or settings.fastAPI.SAVE_FRAMES_COUNT
+    min_distance = min_distance or settings.fastAPI.SCENE_MIN_DISTANCE
+
+    try:
+        video_path = os.path.join(settings.fastAPI.VIDEOS_DIR_PATH, file_name)
+        if not await run_in_threadpool(os.path.isfile, video_path):
+            return JSONResponse({'file_name': "File doesn't exist."}, 400)
+
+        metadata = await run_in_threadpool(get_indexed_video_metadata, file_name, video_path)
+        if metadata is None:
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        frame_format = frame_format or _default_frame_format(metadata, settings)
+
+        # the scan runs in its own pool and keeps going after the request times out,
+        # so a retry gets the saved scores
+        scan = get_scene_score_store().scan(video_path, metric, step, settings.fastAPI.SCENE_ANALYSIS_SIDE)
+        try:
+            frame_numbers, scores = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(scan)), settings.fastAPI.DECODE_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+            return JSONResponse(
+                {'message': 'Scene analysis in progress.'}, 202, headers={'Retry-After': retry_after}
+            )
+
+        key = ('scenes', file_name, count, metric, min_distance, step, frame_format)
+        frames_cache = get_frames_cache()
+        with frames_cache.writing(file_name):
+            scene_frames = await frame_extractions.run(key, lambda: get_decode_pool().run(
+                extract_and_save_scene_frames, video_path, frames_cache.frame_dir(file_name), frame_numbers,
+                scores, count, frame_format, min_distance
+            ))
+            await run_in_threadpool(
+                _store_frames, file_name, video_path, [os.path.basename(x[2]) for x in scene_frames]
+            )
+        frames_cache.put(file_name)
+    except WorkerPoolBusy:
+        retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+        return JSONResponse({'message': 'Too many requests in progress.'}, 503, headers={'Retry-After': retry_after})
+    except asyncio.TimeoutError:
+        return JSONResponse({'message': 'Frames extraction timed out.'}, 504)
+    except FramesExtractionError as err:
+        return JSONResponse({'message': str(err)}, 500)
+    except Exception:
+        return JSONResponse({'message': 'Something went wrong'}, 500)
+
+    response_data = [
+        {"frame_number": frame_number, "score": score, "file_path": frame_path}
+        for (frame_number, score, frame_path) in scene_frames
+    ]
+    return JSONResponse(response_data, 200)
+
+
+class FramesJobSchema(BaseModel):
+    file_name: str = Field(min_length=1)
+    time_in_video: Optional[conint(ge=0)] = None
+    time_ms: Optional[conint(ge=0)] = None
+    frame_number: Optional[conint(ge=0)] = None
+    count: Optional[conint(ge=1)] = None
+    width: Optional[conint(ge=1)] = None
+    height: Optional[conint(ge=1)] = None
+    max_side: Optional[conint(ge=1)] = None
+    frame_format: Optional[str] = Field(default=None, regex=FRAME_FORMAT_PATTERN)
+    priority: int = Field(default=0, ge=0, le=100)
+
+
+@frames_router.post('/jobs')
+@timed_function
+async def create_frames_job(
+    job_params: FramesJobSchema,
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
+    """Создаёт задание извлечения кадров, выполняемое в фоне, и возвращает его идентификатор.
+
+    Параметры задания те же, что у /api/frames, число кадров ограничено JOB_MAX_FRAMES_COUNT.
+    Задания выполняются в пуле из JOB_WORKERS потоков: сначала задания с большим приоритетом,
+    при равном приоритете задания разных видеофайлов чередуются. Состояние задания сохраняется
+    в таблице extraction_job и возвращается маршрутом /api/frames/jobs/{job_id}, путь к которому
+    передаётся в заголовке Location. При заполненной очереди возвращается 503 с заголовком Retry-After.
+
+    Params:
+        file_name (str): Имя видеофайла.
+        time_in_video (int): Время от начала видеофайла в секундах.
+        time_ms (int): Время от начала видеофайла в миллисекундах.
+        frame_number (int): Номер первого кадра.
+        count (int): Число кадров.
+        width (int): Максимальная ширина кадров.
+        height (int): Максимальная высота кадров.
+        max_side (int): Максимальный размер наибольшей стороны кадров.
+        frame_format (str): Формат файлов с кадрами.
+        priority (int): Приоритет задания от 0 до 100.
+    """
+    file_name = job_params.file_name
+    simple_filename_check = lambda x: os.pathsep not in x and ".." not in x
+    if not simple_filename_check(file_name):
+        return JSONResponse({'file_name': 'Forbidden file name.'}, 400)
+    error = _window_params_error(job_params.time_in_video, job_params.time_ms, job_params.frame_number, None, settings)
+    if error is not None:
+        return error
+    if job_params.count is not None and job_params.count > settings.fastAPI.JOB_MAX_FRAMES_COUNT:
+        return JSONResponse({'count': 'Too many frames requested.'}, 400)
+    count = job_params.count or settings.fastAPI.SAVE_FRAMES_COUNT
+
+    runner = get_job_runner()
+    if runner.is_full():
+        retry_after = str(settings.fastAPI.DECODE_RETRY_AFTER)
+        return JSONResponse({'message': 'Too many jobs queued.'}, 503, headers={'Retry-After': retry_after})
+
+    try:
+        # check the existence of the file
+        video_path = os.path.join(settings.fastAPI.VIDEOS_DIR_PATH, file_name)
+        if not await run_in_threadpool(os.path.isfile, video_path):
+            return JSONResponse({'file_name': "File doesn't exist."}, 400)
+
+        metadata = await run_in_threadpool(get_indexed_video_metadata, file_name, video_path)
+        if metadata is None:
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        first_frame = await _first_frame(
+            video_path, metadata, job_params.time_in_video, job_params.time_ms, job_params.frame_number
+        )
+        # reject out-of-range jobs without queueing them
+        if not window_in_range(metadata, first_frame, count):
+            return JSONResponse({'message': 'Failed to extract frames.'}, 500)
+        size = fit_frame_size(metadata.width, metadata.height, job_params.width, job_params.height, job_params.max_side)
+        frame_format = job_params.frame_format or _default_frame_format(metadata, settings, size)
+
+        job = ExtractionJob(create_job_id(), file_name, first_frame, count, frame_format, size, job_params.priority)
+        async with connect_async() as conn:
+            await conn.execute(insert(extraction_jobs).values(**job_values(job)))
+            await conn.commit()
+        runner.submit(job)
+    except Exception:
+        return JSONResponse({'message': 'Something went wrong'}, 500)
+
+    response_data = {"job_id": job.job_id, "status": QUEUED_STATUS}
+    return JSONResponse(response_data, 202, headers={'Location': f'/api/frames/jobs/{job.job_id}'})
+
+
+@frames_router.get('/jobs/{job_id}')
+@timed_function
+async def get_frames_job(job_id: str) -> JSONResponse:
+    """Возвращает состояние и прогресс задания извлечения кадров.
+
+    Состояние (status): queued - задание в очереди, running - выполняется, done - выполнено,
+    failed - завершилось ошибкой. Прогресс возвращается числом декодированных кадров
+    (frames_decoded) из общего числа кадров задания (frames_total). Для выполненного задания
+    добавляются номер первого кадра и пути к файлам с кадрами, как в ответе /api/frames,
+    для завершившегося ошибкой - сообщение об ошибке.
+
+    Params:
+        job_id (str): Идентификатор задания.
+    """
+    try:
+        async with connect_async() as conn:
+            row = (await conn.execute(
+                select(extraction_jobs).where(extraction_jobs.c.job_id == job_id)
+            )).first()
+    except Exception:
+        return JSONResponse({'message': 'Something went wrong'}, 500)
+    if row is None:
+        return JSONResponse({'message': "Job doesn't exist."}, 404)
+
+    response_data = {
+        "job_id": row.job_id,
+        "file_name": row.video_file_name,
+        "status": row.status,
+        "priority": row.priority,
+        "frames_decoded": row.frames_decoded,
+        "frames_total": row.frame_count,
+    }
+    if row.status == DONE_STATUS:
+        response_data["first_frame"] = row.first_frame
+        response_data["file_paths"] = row.frame_paths
+    elif row.status == FAILED_STATUS:
+        response_data["message"] = row.error
     return JSONResponse(response_data, 200)
+
+
+def _window_params_error(
+        time_in_video: Optional[int],
+        time_ms: Optional[int],
+        frame_number: Optional[int],
+        count: Optional[int],
+        settings: Settings
+) -> Optional[JSONResponse]:
+    """Проверяет способ задания первого кадра и число кадров, возвращая ответ с ошибкой.
+    """
+    if sum(x is not None for x in (time_in_video, time_ms, frame_number)) != 1:
+        message = 'Exactly one of time_in_video, time_ms and frame_number is required.'
+        return JSONResponse({'message': message}, 400)
+    if count is not None and count > settings.fastAPI.MAX_FRAMES_COUNT:
+        return JSONResponse({'count': 'Too many frames requested.'}, 400)
+    return None
+
+
+async def _first_frame(
+        video_path: str,
+        metadata: VideoMetadata,
+        time_in_video: Optional[int],
+        time_ms: Optional[int],
+        frame_number: Optional[int]
+) -> int:
+    """Возвращает номер первого кадра по номеру кадра или по времени от начала видеофайла.
+    """
+    if frame_number is not None:
+        return frame_number
+    if time_ms is None:
+        time_ms = time_in_video * 1000
+    return await run_in_threadpool(frame_at_time, video_path, metadata, time_ms)
+
+
+async def _extract_frames(
+        file_name: str,
+        video_path: str,
+        metadata: VideoMetadata,
+        first_frame: int,
+        count: int,
+        frame_format: str,
+        sizes: List[Optional[FrameSize]],
+        settings: Settings
+) -> Tuple[int, List[str], str]:
+    """Извлекает и сохраняет кадры в пуле обработчиков.
+
+    Кадры, уже сохранённые в хранилище кадров для видеофайла с тем же содержимым, не декодируются.
+    Уменьшенные кадры одного размера получаются из ранее извлечённых кадров большего
+    размера, если они есть. Записанные кадры добавляются в хранилище кадров. Пока хеш
+    содержимого видеофайла не вычислен в фоне, хранилище кадров не используется.
+    """
+    frames_cache = get_frames_cache()
+    frame_dir = frames_cache.frame_dir(file_name)
+    names = _frame_names(first_frame, count, frame_format, sizes)
+    with frames_cache.writing(file_name):
+        digest = await run_in_threadpool(get_video_digest, file_name, video_path)
+        storage = get_frame_storage()
+        if digest is not None and await run_in_threadpool(storage.link_frames, digest, frame_dir, names):
+            frames_cache.put(file_name)
+            return first_frame, [os.path.join(frame_dir, x) for x in names[:count]], DEDUP_METHOD
+
+        if len(sizes) == 1 and sizes[0] is not None:
+            source_paths = await run_in_threadpool(
+                _get_larger_cached_frames, file_name, video_path, metadata, first_frame, count, frame_format,
+                sizes[0], settings
+            )
+            if source_paths is not None:
+                ext = frame_extension(frame_format)
+                frame_paths = [
+                    os.path.join(frame_dir, frame_file_name(first_frame + i, ext, sizes[0])) for i in range(count)
+                ]
+                await get_decode_pool().run(
+                    resize_frame_files, source_paths, frame_paths, sizes[0], encode_params(frame_format)
+                )
+                if digest is not None:
+                    await run_in_threadpool(storage.store_frames, digest, frame_dir, names)
+                frames_cache.put(file_name)
+                return first_frame, frame_paths, RESIZE_METHOD
+
+        result = await get_decode_pool().run(
+            extract_and_save_frames, video_path, frame_dir, first_frame, count, frame_format, sizes
+        )
+        if digest is not None:
+            await run_in_threadpool(
+                storage.store_frames, digest, frame_dir, _frame_names(result[0], count, frame_format, sizes)
+            )
+        frames_cache.put(file_name)
+        return result
+
+
+def _frame_names(first_frame: int, count: int, frame_format: str, sizes: List[Optional[FrameSize]]) -> List[str]:
+    """Возвращает имена файлов с кадрами диапазона во всех указанных размерах, начиная с первого размера.
+    """
+    ext = frame_extension(frame_format)
+    return [frame_file_name(first_frame + i, ext, size) for size in sizes for i in range(count)]
+
+
+def _store_frames(file_name: str, video_path: str, names: List[str]) -> None:
+    """Добавляет записанные в каталог видеофайла кадры в хранилище кадров, если хеш видеофайла уже известен.
+    """
+    digest = get_video_digest(file_name, video_path)
+    if digest is not None:
+        get_frame_storage().store_frames(digest, get_frames_cache().frame_dir(file_name), names)
+
+
+def _default_frame_format(
+        metadata: Optional[VideoMetadata],
+        settings: Settings,
+        size: Optional[FrameSize] = None
+) -> str:
+    """Возвращает формат кадров по умолчанию для видеофайла с учётом размера уменьшенных кадров.
+    """
+    if metadata is None:
+        return settings.fastAPI.FRAME_FORMAT
+    if size is not None:
+        return default_frame_format(*size)
+    return default_frame_format(metadata.width, metadata.height)
+
+
+def _variant_sizes(metadata: VideoMetadata, settings: Settings) -> Dict[str, Optional[FrameSize]]:
+    """Возвращает размеры копий кадров из конфигурации и исходный размер (None) по имени копии.
+    """
+    sizes = {
+        name: fit_frame_size(metadata.width, metadata.height, max_side=max_side)
+        for (name, max_side) in settings.fastAPI.FRAME_VARIANTS.items()
+    }
+    sizes[FULL_VARIANT] = None
+    return sizes
+
+
+def _variants_response(
+        file_name: str,
+        metadata: VideoMetadata,
+        first_frame: int,
+        count: int,
+        frame_format: str,
+        variant_sizes: Dict[str, Optional[FrameSize]]
+) -> Dict[str, Dict[str, object]]:
+    """Возвращает размеры и пути к файлам копий кадров по имени копии.
+    """
+    frame_dir = get_frames_cache().frame_dir(file_name)
+    ext = frame_extension(frame_format)
+    response_data = {}
+    for (name, size) in variant_sizes.items():
+        width, height = size or (metadata.width, metadata.height)
+        response_data[name] = {
+            "width": width,
+            "height": height,
+            "file_paths": [
+                os.path.join(frame_dir, frame_file_name(first_frame + i, ext, size)) for i in range(count)
+            ]
+        }
+    return response_data
+
+
+def _get_cached_frames(
+        file_name: str,
+        video_path: str,
+        first_frame: int,
+        count: int,
+        frame_format: str,
+        sizes: List[Optional[FrameSize]]
+) -> Optional[List[str]]:
+    """Возвращает пути к ранее извлечённым кадрам первого из указанных размеров,
+    если действительны кадры всех размеров.
+    """
+    frames_cache = get_frames_cache()
+    ext = frame_extension(frame_format)
+    frame_paths = None
+    for size in sizes:
+        paths = frames_cache.get(file_name, frames_cache.make_key(video_path, first_frame, count, ext, size))
+        if paths is None:
+            return None
+        frame_paths = frame_paths or paths
+    return frame_paths
+
+
+def _get_larger_cached_frames(
+        file_name: str,
+        video_path: str,
+        metadata: VideoMetadata,
+        first_frame: int,
+        count: int,
+        frame_format: str,
+        size: FrameSize,
+        settings: Settings
+) -> Optional[List[str]]:
+    """Возвращает пути к ранее извлечённым кадрам наименьшего размера, не меньшего указанного.
+    """
+    candidates = [
+        x for x in _variant_sizes(metadata, settings).values()
+        if x is None or (x[0] >= size[0] and x[1] >= size[1])
+    ]
+    candidates.sort(key=lambda x: (x is None, x))
+    for candidate in candidates:
+        frame_paths = _get_cached_frames(file_name, video_path, first_frame, count, frame_format, [candidate])
+        if frame_paths is not None:
+            return frame_paths
+    return None
+
+
+def _get_cached_windows(
+        file_name: str,
+        video_path: str,
+        first_frames: List[int],
+        count: int,
+        frame_format: str
+) -> Dict[int, List[str]]:
+    """Возвращает пути к ранее извлечённым кадрам для действительных диапазонов по номеру первого кадра.
+    """
+    frames_cache = get_frames_cache()
+    results = {}
+    for first_frame in set(first_frames):
+        key = frames_cache.make_key(video_path, first_frame, count, frame_extension(frame_format))
+        frame_paths = frames_cache.get(file_name, key)
+        if frame_paths is not None:
+            results[first_frame] = frame_paths
+    return results
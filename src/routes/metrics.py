@@ -0,0 +1,108 @@
+from typing import List
+
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from src.models import async_engine, pool_wait_stats
+from src.routes.frames import frame_extractions
+from src.utils.frames_cache import current_frames_cache
+from src.utils.jobs import current_job_runner
+from src.utils.metrics import CONTENT_TYPE, Counter, Gauge, Metric, registry
+from src.utils.video_capture import current_capture_pool, current_metadata_cache
+from src.utils.workers import current_decode_pool
+
+
+metrics_router = APIRouter()
+
+@metrics_router.get('', include_in_schema=False)
+def get_metrics() -> Response:
+    """Возвращает метрики процесса в текстовом формате Prometheus.
+
+    Время этапов извлечения кадров (open_capture, probe, seek, scan, decode, resize, encode, write,
+    db_execute) возвращается гистограммой frame_service_stage_seconds, время обработчиков - гистограммой
+    frame_service_function_seconds. Состояние пулов, кешей и очереди заданий считывается в момент запроса.
+    В режиме process метрики этапов, выполняемых в процессах пула, не собираются.
+    """
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
+def collect_runtime_metrics() -> List[Metric]:
+    """Возвращает метрики пулов, кешей и объединения запросов на момент вызова.
+
+    Метрики не создают пулы и кеши: метрики ещё не созданных или остановленных объектов
+    не возвращаются.
+    """
+    cache_requests = Counter(
+        'frame_service_cache_requests_total', 'Cache lookups by result.', ['cache', 'result']
+    )
+    cache_evictions = Counter(
+        'frame_service_cache_evictions_total', 'Entries evicted from caches.', ['cache']
+    )
+    caches = {
+        'frames': current_frames_cache(),
+        'capture_pool': current_capture_pool(),
+        'metadata': current_metadata_cache(),
+    }
+    for (name, cache) in caches.items():
+        if cache is None:
+            continue
+        stats = cache.stats
+        cache_requests.inc(stats.hits, cache=name, result='hit')
+        cache_requests.inc(stats.misses, cache=name, result='miss')
+        cache_evictions.inc(stats.evictions, cache=name)
+
+    decode_pool = current_decode_pool()
+    decode_pool_pending = Gauge(
+        'frame_service_decode_pool_pending', 'Running and queued decode tasks.'
+    )
+    decode_pool_capacity = Gauge(
+        'frame_service_decode_pool_capacity', 'Decode workers plus queue slots; tasks above it are rejected.'
+    )
+    if decode_pool is not None:
+        decode_pool_pending.set(decode_pool.pending)
+        decode_pool_capacity.set(decode_pool.max_workers + decode_pool.queue_limit)
+
+    db_pool_wait = Counter(
+        'frame_service_db_pool_wait_seconds_total', 'Total time spent waiting for a free pooled database connection.'
+    )
+    db_pool_wait.inc(pool_wait_stats.total)
+    db_pool_acquired = Counter(
+        'frame_service_db_pool_acquired_total', 'Database connections handed out by the pool.'
+    )
+    db_pool_acquired.inc(pool_wait_stats.count)
+    db_pool_wait_max = Gauge(
+        'frame_service_db_pool_wait_max_seconds', 'Longest wait for a free pooled database connection.'
+    )
+    db_pool_wait_max.set(pool_wait_stats.max)
+    db_pool_connections = Gauge(
+        'frame_service_db_pool_connections', 'Database pool connections by state.', ['state']
+    )
+    pool = async_engine.pool
+    # у пулов без ограничения размера (NullPool, StaticPool) нет счётчиков подключений
+    if hasattr(pool, 'checkedout'):
+        db_pool_connections.set(pool.checkedout(), state='checked_out')
+        db_pool_connections.set(pool.checkedin(), state='idle')
+        db_pool_connections.set(pool.size(), state='size')
+
+    coalesced = Counter(
+        'frame_service_single_flight_coalesced_total', 'Frame requests served by an identical in-flight extraction.'
+    )
+    coalesced.inc(frame_extractions.coalesced)
+    in_flight = Gauge(
+        'frame_service_single_flight_in_flight', 'Frame extractions currently running.'
+    )
+    in_flight.set(frame_extractions.pending())
+
+    # метрики не создают пул заданий, в том числе после его остановки
+    job_runner = current_job_runner()
+    jobs = Gauge('frame_service_extraction_jobs', 'Background extraction jobs by state.', ['state'])
+    jobs.set(job_runner.queued if job_runner is not None else 0, state='queued')
+    jobs.set(job_runner.running if job_runner is not None else 0, state='running')
+
+    return [
+        cache_requests, cache_evictions, decode_pool_pending, decode_pool_capacity,
+        db_pool_wait, db_pool_acquired, db_pool_wait_max, db_pool_connections, coalesced, in_flight, jobs,
+    ]
+
+
+registry.register_collector(collect_runtime_metrics)
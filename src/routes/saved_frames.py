@@ -1,34 +1,109 @@
+import csv
+import io
+import json
 import os
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
 
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
-from sqlalchemy import select, insert
+from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from pydantic import BaseModel, Field
 
-from src.models import engine
+from src.models import connect_async
 from src.models import frame_service_informations
-from src.utils.config import Config
+from src.utils.config import Settings, get_settings
+from src.utils.frame_storage import get_frame_storage
+from src.utils.metrics import timed_function
+from src.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from src.utils.save_frames import FRAME_FORMAT_PATTERN, frame_extension, parse_frame_file_name
+from src.utils.video_index import get_video_digest
 
+if TYPE_CHECKING:
+    from sqlalchemy import Row, Select
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+NDJSON_EXPORT = 'ndjson'
+CSV_EXPORT = 'csv'
+EXPORT_FORMAT_PATTERN = '^(ndjson|csv)$'
+EXPORT_COLUMNS = ['video_file_name', 'frame_number', 'frame_file_path', 'frame_format', 'variants']
+
+CREATED_STATUS = 'created'
+EXISTS_STATUS = 'exists'
+DUPLICATE_STATUS = 'duplicate'
+FRAME_NOT_FOUND_STATUS = 'frame_not_found'
+FORBIDDEN_FILE_NAME_STATUS = 'forbidden_file_name'
 
 saved_frames_router = APIRouter()
 
 @saved_frames_router.get('')
-def get_saved_frames() -> JSONResponse:
-    """Возвращает список сохранённых кадров со служебной информацией из базы данных.
+@timed_function
+async def get_saved_frames(
+    limit: Optional[int] = Query(
+        default=None,
+        description='Число записей на странице. По умолчанию задаётся конфигурацией',
+        ge=1
+    ),
+    cursor: Optional[str] = Query(
+        default=None,
+        description='Курсор следующей страницы из заголовка X-Next-Cursor предыдущего ответа'
+    ),
+    video_file_name: Optional[str] = Query(
+        default=None,
+        description='Имя видеофайла',
+        min_length=1
+    ),
+    frame_from: Optional[int] = Query(
+        default=None,
+        description='Минимальный номер кадра',
+        ge=0
+    ),
+    frame_to: Optional[int] = Query(
+        default=None,
+        description='Максимальный номер кадра',
+        ge=0
+    ),
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
+    """Возвращает страницу списка сохранённых кадров со служебной информацией из базы данных.
+
+    Записи упорядочены по имени видеофайла и номеру кадра. Если есть следующая страница,
+    её курсор возвращается в заголовке X-Next-Cursor.
+
+    Params:
+        limit (int): Число записей на странице.
+        cursor (str): Курсор следующей страницы.
+        video_file_name (str): Имя видеофайла.
+        frame_from (int): Минимальный номер кадра.
+        frame_to (int): Максимальный номер кадра.
     """
+    if limit is None:
+        limit = settings.fastAPI.SAVED_FRAMES_PAGE_SIZE
+    if limit > settings.fastAPI.SAVED_FRAMES_MAX_PAGE_SIZE:
+        return JSONResponse({'message': 'Page size is too large.'}, 400)
+
+    table = frame_service_informations
+    # keyset pagination over the primary key
+    stmt = _select_saved_frames(video_file_name, frame_from, frame_to).limit(limit + 1)
+    if cursor is not None:
+        try:
+            last_key = decode_cursor(cursor, [str, int])
+        except InvalidCursor:
+            return JSONResponse({'cursor': 'Invalid cursor.'}, 400)
+        stmt = stmt.where(tuple_(table.c.video_file_name, table.c.frame_number) > tuple_(*last_key))
+
     try:
-        with engine.connect() as conn:
-            result = conn.execute(select(frame_service_informations)).all()
-        response_data = [
-            {
-                "video_file_name": x.video_file_name,
-                "frame_number": x.frame_number,
-                "frame_file_path": x.frame_file_path,
-            }
-            for x in result
-        ]
-        return JSONResponse(response_data, 200)
+        async with connect_async() as conn:
+            result = (await conn.execute(stmt)).all()
+        headers = {}
+        if len(result) > limit:
+            result = result[:limit]
+            headers['X-Next-Cursor'] = encode_cursor([result[-1].video_file_name, result[-1].frame_number])
+        response_data = [_saved_frame_to_dict(x) for x in result]
+        return JSONResponse(response_data, 200, headers=headers)
     except Exception as err:
         return JSONResponse({ 'message': 'Something went wrong' }, 500)
 
@@ -36,42 +111,368 @@ def get_saved_frames() -> JSONResponse:
 class ServiceInfoSchema(BaseModel):
     file_path: str = Field(min_length=1)
     frame_number: int = Field(gt=0)
+    frame_format: str = Field(default='png', regex=FRAME_FORMAT_PATTERN)
 
 
 @saved_frames_router.post('/new_frame')
-def create_saved_frame(service_info: ServiceInfoSchema) -> JSONResponse:
+@timed_function
+async def create_saved_frame(
+    service_info: ServiceInfoSchema,
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
     """Сохраняет в БД служебную информацию о ранее сохранённом кадре.
 
+    Вместе с кадром сохраняются ссылки на его уменьшенные копии того же формата,
+    записанные на диск (параметры width, height, max_side и variants маршрута /api/frames).
+    Если кадра нет в каталоге видеофайла, но он был извлечён из видеофайла с тем же
+    содержимым, кадр берётся из хранилища кадров.
+
     Params:
         file_path (str): Имя видеофайла
         frame_number (int): Номер кадра
+        frame_format (str): Формат файла с кадром: png, jpeg или webp
     """
     video_file_name = service_info.file_path
     frame_number = service_info.frame_number
+    frame_format = service_info.frame_format
 
     try:
         # check frame
-        config = Config()
-        frame_name = f'{frame_number}.png'
-        frame_path = os.path.join(config.fastAPI['FRAMES_DIR_PATH'], video_file_name, frame_name)
-        if not os.path.isfile(frame_path):
-            return JSONResponse({ "message": "Frame doesn't exist." }, 400)
+        frame_name = f'{frame_number}.{frame_extension(frame_format)}'
+        frame_path = os.path.join(settings.fastAPI.FRAMES_DIR_PATH, video_file_name, frame_name)
+        if not await run_in_threadpool(os.path.isfile, frame_path):
+            linked = await run_in_threadpool(
+                _link_stored_frame, settings.fastAPI.VIDEOS_DIR_PATH, video_file_name, frame_path
+            )
+            if not linked:
+                return JSONResponse({ "message": "Frame doesn't exist." }, 400)
+        frame_key = (frame_number, frame_extension(frame_format))
+        variants = (await run_in_threadpool(_scan_frame_variants, os.path.dirname(frame_path), {frame_key})).get(
+            frame_key, []
+        )
 
-        with engine.connect() as conn:
+        async with connect_async() as conn:
             stmt = insert(frame_service_informations).values(
                 video_file_name=video_file_name,
                 frame_number=frame_number,
-                frame_file_path=frame_path
+                frame_file_path=frame_path,
+                frame_format=frame_format,
+                variants=variants
             )
-            conn.execute(stmt)
-            conn.commit()
+            await conn.execute(stmt)
+            await conn.commit()
         response = {
             "file_path": video_file_name,
             "frame_number": frame_number,
-            "frame_path": frame_path
+            "frame_path": frame_path,
+            "frame_format": frame_format,
+            "variants": variants
         }
         return JSONResponse(response, 201)
     except IntegrityError:
         return JSONResponse(None, status_code=400)
     except Exception:
         return JSONResponse(None, status_code=500)
+
+
+@saved_frames_router.post('/bulk')
+@timed_function
+async def create_saved_frames(
+    service_infos: List[ServiceInfoSchema],
+    settings: Settings = Depends(get_settings)
+) -> JSONResponse:
+    """Сохраняет в БД служебную информацию о нескольких ранее сохранённых кадрах за один запрос.
+
+    Наличие файлов проверяется одним чтением каталога каждого видеофайла, записи добавляются
+    многострочными INSERT ... ON CONFLICT DO NOTHING в одной транзакции. Для каждого элемента
+    возвращается статус: created - запись добавлена, exists - запись уже есть в БД,
+    duplicate - элемент повторяет предыдущий элемент запроса, frame_not_found - файла с кадром нет,
+    forbidden_file_name - недопустимое имя видеофайла. Уменьшенные копии кадров сохраняются,
+    как в /new_frame.
+
+    Params:
+        Список объектов с полями file_path, frame_number и frame_format, как в /new_frame.
+    """
+    if len(service_infos) > settings.fastAPI.BULK_MAX_FRAMES:
+        return JSONResponse({'message': 'Too many frames in one request.'}, 400)
+
+    frames_dir_path = settings.fastAPI.FRAMES_DIR_PATH
+    simple_filename_check = lambda x: os.sep not in x and os.pathsep not in x and ".." not in x
+    video_file_names = {x.file_path for x in service_infos if simple_filename_check(x.file_path)}
+
+    try:
+        frame_files = await run_in_threadpool(_scan_frame_files, frames_dir_path, video_file_names)
+        frame_keys: Dict[str, Set[Tuple[int, str]]] = {}
+        for service_info in service_infos:
+            if service_info.file_path in video_file_names:
+                frame_keys.setdefault(service_info.file_path, set()).add(
+                    (service_info.frame_number, frame_extension(service_info.frame_format))
+                )
+        frame_variants = await run_in_threadpool(_bulk_frame_variants, frames_dir_path, frame_files, frame_keys)
+
+        response_data = []
+        rows = []
+        keys = set()
+        for service_info in service_infos:
+            video_file_name = service_info.file_path
+            frame_name = f'{service_info.frame_number}.{frame_extension(service_info.frame_format)}'
+            frame_path = os.path.join(frames_dir_path, video_file_name, frame_name)
+            key = (video_file_name, service_info.frame_number)
+            variants = []
+            if video_file_name not in video_file_names:
+                status = FORBIDDEN_FILE_NAME_STATUS
+            elif frame_name not in frame_files[video_file_name]:
+                status = FRAME_NOT_FOUND_STATUS
+            elif key in keys:
+                status = DUPLICATE_STATUS
+            else:
+                status = CREATED_STATUS
+                keys.add(key)
+                variants = frame_variants[video_file_name].get(
+                    (service_info.frame_number, frame_extension(service_info.frame_format)), []
+                )
+                rows.append({
+                    'video_file_name': video_file_name,
+                    'frame_number': service_info.frame_number,
+                    'frame_file_path': frame_path,
+                    'frame_format': service_info.frame_format,
+                    'variants': variants,
+                })
+            response_data.append({
+                "file_path": video_file_name,
+                "frame_number": service_info.frame_number,
+                "frame_path": frame_path,
+                "frame_format": service_info.frame_format,
+                "variants": variants,
+                "status": status,
+            })
+
+        inserted = set()
+        if rows:
+            async with connect_async() as conn:
+                inserted = await _insert_ignoring_conflicts(conn, rows, settings.fastAPI.BULK_INSERT_CHUNK_ROWS)
+                await conn.commit()
+        for item in response_data:
+            if item['status'] == CREATED_STATUS and (item['file_path'], item['frame_number']) not in inserted:
+                item['status'] = EXISTS_STATUS
+        return JSONResponse(response_data, 200)
+    except Exception:
+        return JSONResponse({ 'message': 'Something went wrong' }, 500)
+
+
+def _link_stored_frame(videos_dir_path: str, video_file_name: str, frame_path: str) -> bool:
+    """Создаёт ссылку на кадр, сохранённый в хранилище кадров для видеофайла с тем же содержимым.
+    """
+    simple_filename_check = lambda x: os.sep not in x and os.pathsep not in x and ".." not in x
+    video_path = os.path.join(videos_dir_path, video_file_name)
+    if not simple_filename_check(video_file_name) or not os.path.isfile(video_path):
+        return False
+    digest = get_video_digest(video_file_name, video_path)
+    if digest is None:
+        return False
+    frame_dir, frame_name = os.path.split(frame_path)
+    return get_frame_storage().link_frames(digest, frame_dir, [frame_name])
+
+
+def _scan_frame_files(frames_dir_path: str, video_file_names: Set[str]) -> Dict[str, Set[str]]:
+    """Возвращает имена файлов с кадрами в каталогах видеофайлов, читая каждый каталог один раз.
+    """
+    frame_files = {}
+    for video_file_name in video_file_names:
+        try:
+            with os.scandir(os.path.join(frames_dir_path, video_file_name)) as entries:
+                frame_files[video_file_name] = {x.name for x in entries if x.is_file()}
+        except (FileNotFoundError, NotADirectoryError):
+            frame_files[video_file_name] = set()
+    return frame_files
+
+
+def _scan_frame_variants(
+        frame_dir: str,
+        frame_keys: Set[Tuple[int, str]]
+) -> Dict[Tuple[int, str], List[Dict[str, Any]]]:
+    """Возвращает уменьшенные копии указанных кадров, читая каталог видеофайла.
+    """
+    try:
+        with os.scandir(frame_dir) as entries:
+            file_names = [x.name for x in entries if x.is_file()]
+    except (FileNotFoundError, NotADirectoryError):
+        return {}
+    return _frame_variants(frame_dir, file_names, frame_keys)
+
+
+def _bulk_frame_variants(
+        frames_dir_path: str,
+        frame_files: Dict[str, Set[str]],
+        frame_keys: Dict[str, Set[Tuple[int, str]]]
+) -> Dict[str, Dict[Tuple[int, str], List[Dict[str, Any]]]]:
+    """Возвращает уменьшенные копии указанных кадров по имени видеофайла из ранее прочитанных каталогов.
+    """
+    return {
+        x: _frame_variants(os.path.join(frames_dir_path, x), names, frame_keys.get(x, set()))
+        for (x, names) in frame_files.items()
+    }
+
+
+def _frame_variants(
+        frame_dir: str,
+        file_names: Iterable[str],
+        frame_keys: Set[Tuple[int, str]]
+) -> Dict[Tuple[int, str], List[Dict[str, Any]]]:
+    """Возвращает уменьшенные копии указанных кадров каталога по номеру кадра и расширению файла.
+
+    Разбираются только имена файлов, начинающиеся с номера одного из указанных кадров
+    (<номер кадра>_<ширина>x<высота>.<расширение>). Копии упорядочены по возрастанию размера.
+    """
+    prefixes = {f'{frame_number}_' for (frame_number, _) in frame_keys}
+    variants: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+    for file_name in file_names:
+        separator = file_name.find('_')
+        if separator < 0 or file_name[:separator + 1] not in prefixes:
+            continue
+        parsed = parse_frame_file_name(file_name)
+        if parsed is None or parsed[1] is None:
+            continue
+        frame_number, (width, height), ext = parsed
+        if (frame_number, ext) not in frame_keys:
+            continue
+        variants.setdefault((frame_number, ext), []).append({
+            "width": width,
+            "height": height,
+            "frame_path": os.path.join(frame_dir, file_name),
+        })
+    for items in variants.values():
+        items.sort(key=lambda x: (x['width'], x['height']))
+    return variants
+
+
+async def _insert_ignoring_conflicts(
+        conn: 'AsyncConnection',
+        rows: List[Dict[str, Any]],
+        chunk_rows: int
+) -> Set[Tuple[str, int]]:
+    """Добавляет записи многострочными INSERT, пропуская записи с существующим первичным ключом.
+
+    Returns:
+        Ключи добавленных записей.
+    """
+    table = frame_service_informations
+    dialect_insert = postgresql.insert if conn.dialect.name == 'postgresql' else sqlite.insert
+
+    inserted = set()
+    # число параметров одного запроса ограничено драйверами БД
+    for i in range(0, len(rows), chunk_rows):
+        stmt = (
+            dialect_insert(table)
+            .values(rows[i:i + chunk_rows])
+            .on_conflict_do_nothing(index_elements=[table.c.video_file_name, table.c.frame_number])
+            .returning(table.c.video_file_name, table.c.frame_number)
+        )
+        inserted.update(tuple(x) for x in await conn.execute(stmt))
+    return inserted
+
+
+@saved_frames_router.get('/export')
+@timed_function
+async def export_saved_frames(
+    export_format: str = Query(
+        default=NDJSON_EXPORT,
+        alias='format',
+        description='Формат выгрузки: ndjson или csv',
+        regex=EXPORT_FORMAT_PATTERN
+    ),
+    video_file_name: Optional[str] = Query(
+        default=None,
+        description='Имя видеофайла',
+        min_length=1
+    ),
+    frame_from: Optional[int] = Query(
+        default=None,
+        description='Минимальный номер кадра',
+        ge=0
+    ),
+    frame_to: Optional[int] = Query(
+        default=None,
+        description='Максимальный номер кадра',
+        ge=0
+    ),
+    settings: Settings = Depends(get_settings)
+) -> StreamingResponse:
+    """Выгружает все сохранённые кадры со служебной информацией потоком в формате NDJSON или CSV.
+
+    Записи читаются курсором на стороне сервера БД частями по EXPORT_CHUNK_ROWS строк и
+    отправляются клиенту по мере чтения, поэтому потребление памяти не зависит от размера таблицы.
+
+    Params:
+        format (str): Формат выгрузки: ndjson (по строке JSON на запись) или csv (с заголовком).
+        video_file_name (str): Имя видеофайла.
+        frame_from (int): Минимальный номер кадра.
+        frame_to (int): Максимальный номер кадра.
+    """
+    stmt = _select_saved_frames(video_file_name, frame_from, frame_to)
+    chunk_rows = settings.fastAPI.EXPORT_CHUNK_ROWS
+    if export_format == CSV_EXPORT:
+        return StreamingResponse(
+            _iter_export(stmt, chunk_rows, CSV_EXPORT),
+            media_type='text/csv',
+            headers={'Content-Disposition': 'attachment; filename="saved_frames.csv"'}
+        )
+    return StreamingResponse(_iter_export(stmt, chunk_rows, NDJSON_EXPORT), media_type='application/x-ndjson')
+
+
+def _select_saved_frames(
+        video_file_name: Optional[str],
+        frame_from: Optional[int],
+        frame_to: Optional[int]
+) -> 'Select':
+    """Возвращает запрос сохранённых кадров, упорядоченных по первичному ключу, с фильтрами.
+    """
+    table = frame_service_informations
+    stmt = select(table).order_by(table.c.video_file_name, table.c.frame_number)
+    if video_file_name is not None:
+        stmt = stmt.where(table.c.video_file_name == video_file_name)
+    if frame_from is not None:
+        stmt = stmt.where(table.c.frame_number >= frame_from)
+    if frame_to is not None:
+        stmt = stmt.where(table.c.frame_number <= frame_to)
+    return stmt
+
+
+def _saved_frame_to_dict(row: 'Row') -> Dict[str, Any]:
+    return {
+        "video_file_name": row.video_file_name,
+        "frame_number": row.frame_number,
+        "frame_file_path": row.frame_file_path,
+        "frame_format": row.frame_format,
+        "variants": row.variants or [],
+    }
+
+
+async def _iter_export(stmt: 'Select', chunk_rows: int, export_format: str) -> AsyncIterator[bytes]:
+    """Читает записи курсором на стороне сервера БД и выдаёт их в формате выгрузки частями.
+    """
+    if export_format == CSV_EXPORT:
+        # заголовок отправляется до выполнения запроса
+        yield _csv_lines([EXPORT_COLUMNS])
+    async with connect_async() as conn:
+        result = await conn.stream(stmt.execution_options(yield_per=chunk_rows))
+        async for rows in result.partitions():
+            if export_format == CSV_EXPORT:
+                yield _csv_lines([_csv_row(x) for x in rows])
+            else:
+                yield ''.join(
+                    json.dumps(_saved_frame_to_dict(x), ensure_ascii=False) + '\n' for x in rows
+                ).encode()
+
+
+def _csv_row(row: 'Row') -> List[Any]:
+    item = _saved_frame_to_dict(row)
+    # копии кадров выгружаются одной ячейкой в формате JSON
+    item['variants'] = json.dumps(item['variants'], ensure_ascii=False)
+    return [item[column] for column in EXPORT_COLUMNS]
+
+
+def _csv_lines(rows: List[List[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    return buffer.getvalue().encode()
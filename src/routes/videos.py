@@ -1,26 +1,71 @@
-import os
+from typing import Optional
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, status
 from fastapi.responses import JSONResponse
-from src.utils.config import Config
+from src.utils.metrics import timed_function
+from src.utils.video_catalogue import NAME_SORT, ORDER_PATTERN, SORT_PATTERN, get_video_catalogue
 
 
 videos_router = APIRouter()
 
 @videos_router.get('')
-def get_video_list() -> JSONResponse:
+@timed_function
+def get_video_list(
+    with_metadata: bool = Query(
+        default=False,
+        description='Добавить параметры видеофайлов (fps, число кадров, длительность, разрешение, кодек)'
+    ),
+    prefix: str = Query(
+        default='',
+        description='Начало имени видеофайла'
+    ),
+    sort: str = Query(
+        default=NAME_SORT,
+        description='Поле сортировки: name, size или mtime',
+        regex=SORT_PATTERN
+    ),
+    order: str = Query(
+        default='asc',
+        description='Порядок сортировки: asc или desc',
+        regex=ORDER_PATTERN
+    ),
+    offset: int = Query(
+        default=0,
+        description='Число пропускаемых видеофайлов',
+        ge=0
+    ),
+    limit: Optional[int] = Query(
+        default=None,
+        description='Число видеофайлов на странице. По умолчанию возвращаются все',
+        ge=1
+    )
+) -> JSONResponse:
     """Возвращает список имён файлов и полный путь к ним из указанного в конфигурационном файле каталога с видео.
+
+    Список хранится в памяти и обновляется при изменении каталога. Общее число видеофайлов,
+    удовлетворяющих фильтру, возвращается в заголовке X-Total-Count.
+
+    Params:
+        with_metadata (bool): Добавить параметры видеофайлов.
+        prefix (str): Начало имени видеофайла.
+        sort (str): Поле сортировки: name, size или mtime.
+        order (str): Порядок сортировки: asc или desc.
+        offset (int): Число пропускаемых видеофайлов.
+        limit (int): Число видеофайлов на странице.
     """
     try:
-        video_dir_path = Config().fastAPI['VIDEOS_DIR_PATH']
-        response_data = [
-            {
-                "file_name": filename,
-                "file_path": os.path.join(video_dir_path, filename)
+        catalogue = get_video_catalogue()
+        entries, total = catalogue.page(prefix, sort, order == 'desc', offset, limit)
+        response_data = []
+        for entry in entries:
+            item = {
+                "file_name": entry.file_name,
+                "file_path": entry.file_path
             }
-            for filename in os.listdir(video_dir_path)
-            if os.path.isfile(os.path.join(video_dir_path, filename))
-        ]
-        return JSONResponse(response_data, status.HTTP_200_OK)
+            if with_metadata:
+                metadata = catalogue.metadata(entry)
+                item['metadata'] = metadata._asdict() if metadata is not None else None
+            response_data.append(item)
+        return JSONResponse(response_data, status.HTTP_200_OK, headers={'X-Total-Count': str(total)})
     except Exception:
         return JSONResponse({"data": 'Something went wrong'}, status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -1,20 +1,200 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
 import yaml
+from pydantic import BaseModel, BaseSettings, Field, PrivateAttr
+
+
+def _env_first(
+        init_settings: Any,
+        env_settings: Any,
+        file_secret_settings: Any
+) -> Tuple[Any, ...]:
+    # значения из переменных окружения имеют приоритет над конфигурационным файлом
+    return env_settings, init_settings, file_secret_settings
+
+
+class FastAPISettings(BaseSettings):
+    """Конфигурация FastAPI приложения: раздел fastAPI конфигурационного файла.
+
+    Значение любого параметра можно переопределить переменной окружения FASTAPI_<ИМЯ>,
+    например FASTAPI_SAVE_FRAMES_COUNT=24. Описание параметров приведено в config.yaml.
+    """
+    SAVE_FRAMES_COUNT: int = Field(12, gt=0)
+    MAX_FRAMES_COUNT: int = Field(240, gt=0)
+    VIDEOS_DIR_PATH: str
+    FRAMES_DIR_PATH: str
+    CAPTURE_POOL_SIZE: int = Field(32, gt=0)
+    CAPTURE_POOL_HANDLES: int = Field(4, gt=0)
+    METADATA_CACHE_SIZE: int = Field(1024, gt=0)
+    VIDEO_CATALOGUE_RESCAN_INTERVAL: Optional[float] = 300
+    VIDEO_PROBER_ENABLED: bool = True
+    VIDEO_PROBER_WORKERS: int = Field(4, gt=0)
+    VIDEO_PROBER_INTERVAL: Optional[float] = 600
+    FRAMES_CACHE_MAX_BYTES: Optional[int] = None
+    FRAMES_CACHE_MAX_AGE: Optional[float] = None
+    FRAMES_CACHE_SWEEP_INTERVAL: float = 60
+    DECODE_WORKERS: int = Field(4, gt=0)
+    DECODE_WORKERS_MODE: str = Field('thread', regex='^(thread|process)$')
+    DECODE_QUEUE_LIMIT: int = Field(16, ge=0)
+    DECODE_TIMEOUT: Optional[float] = 30
+    DECODE_RETRY_AFTER: int = 1
+    ENCODE_WORKERS: int = Field(4, gt=0)
+    PNG_COMPRESSION: int = Field(1, ge=0, le=9)
+    FRAME_FORMAT: str = Field('png', regex='^(png|jpeg|webp)$')
+    FRAME_FORMAT_LARGE: Optional[str] = Field(None, regex='^(png|jpeg|webp)$')
+    LARGE_FRAME_PIXELS: int = 921600
+    JPEG_QUALITY: int = Field(90, ge=0, le=100)
+    WEBP_QUALITY: int = Field(80, ge=1, le=100)
+    WEBP_LOSSLESS: bool = False
+    RESIZE_INTERPOLATION: str = Field('linear', regex='^(nearest|linear|area)$')
+    FRAME_VARIANTS: Dict[str, int] = Field(default_factory=lambda: {'thumb': 320, 'medium': 960})
+    FRAME_STORAGE: str = Field('local', regex='^(local|s3)$')
+    FRAME_STORAGE_S3_BUCKET: Optional[str] = None
+    FRAME_STORAGE_S3_PREFIX: str = 'frames/'
+    FRAME_STORAGE_S3_ENDPOINT_URL: Optional[str] = None
+    KEYFRAME_INDEX_DIR_PATH: str
+    KEYFRAME_INDEX_CACHE_SIZE: int = Field(256, gt=0)
+    SEEK_MIN_DISTANCE: int = Field(60, ge=0)
+    BATCH_MAX_WINDOWS: int = Field(100, gt=0)
+    SCENE_ANALYSIS_SIDE: int = Field(64, gt=0)
+    SCENE_MIN_DISTANCE: int = Field(15, gt=0)
+    SCENE_SCAN_WORKERS: int = Field(1, gt=0)
+    JOB_WORKERS: int = Field(2, gt=0)
+    JOB_QUEUE_LIMIT: int = Field(10000, gt=0)
+    JOB_MAX_FRAMES_COUNT: int = Field(10000, gt=0)
+    JOB_PROGRESS_INTERVAL: float = 0.5
+    JOB_STALE_TIMEOUT: float = 60
+    SAVED_FRAMES_PAGE_SIZE: int = Field(100, gt=0)
+    SAVED_FRAMES_MAX_PAGE_SIZE: int = Field(1000, gt=0)
+    EXPORT_CHUNK_ROWS: int = Field(1000, gt=0)
+    BULK_MAX_FRAMES: int = Field(5000, gt=0)
+    BULK_INSERT_CHUNK_ROWS: int = Field(1000, gt=0)
+    CONFIG_HOT_RELOAD: bool = False
+    CONFIG_RELOAD_CHECK_INTERVAL: float = 1
+
+    class Config:
+        env_prefix = 'FASTAPI_'
+        customise_sources = staticmethod(_env_first)
+
 
+class DatabaseSettings(BaseSettings):
+    """Конфигурация подключений к базе данных: раздел database конфигурационного файла.
 
-class Config():
+    Значение любого параметра можно переопределить переменной окружения DATABASE_<ИМЯ>.
+    """
+    POOL_SIZE: int = Field(5, gt=0)
+    MAX_OVERFLOW: int = Field(10, ge=0)
+    POOL_TIMEOUT: float = 30
+    POOL_RECYCLE: int = 1800
+    POOL_PRE_PING: bool = True
+
+    class Config:
+        env_prefix = 'DATABASE_'
+        customise_sources = staticmethod(_env_first)
+
+
+class Settings(BaseModel):
     """Конфигурации сервисов.
 
     Attributes:
         fastAPI: Конфигурация FastAPI приложения.
+        database: Конфигурация подключений к базе данных.
+        path_yaml: Конфигурационный файл, из которого загружены конфигурации (None - созданы без файла).
+    """
+    fastAPI: FastAPISettings
+    database: DatabaseSettings
+    _path_yaml: Optional[str] = PrivateAttr(None)
+
+    @property
+    def path_yaml(self) -> Optional[str]:
+        return self._path_yaml
+
+
+def load_settings(path_yaml: str = 'config.yaml') -> Settings:
+    """Читает конфигурационный файл и переменные окружения.
+
+    Args:
+        path_yaml: Путь к конфигурационному файлу в формате yaml.
+
+    Returns:
+        Конфигурации сервисов.
+    """
+    with open(path_yaml, 'r') as file:
+        config: Dict[str, Any] = yaml.safe_load(file)
+    settings = Settings(
+        fastAPI=FastAPISettings(**config['fastAPI']),
+        database=DatabaseSettings(**(config.get('database') or {}))
+    )
+    settings._path_yaml = path_yaml
+    return settings
+
+
+class _SettingsState():
+    """Текущие конфигурации процесса и сведения для их перезагрузки.
+    """
+    def __init__(self) -> None:
+        self.settings: Optional[Settings] = None
+        self.path_yaml = 'config.yaml'
+        self.mtime_ns: Optional[int] = None
+        self.last_check = 0.0
+        self.lock = threading.Lock()
+
+
+_state = _SettingsState()
+
+
+def get_settings() -> Settings:
+    """Возвращает конфигурации процесса, читая конфигурационный файл только при первом обращении.
+
+    Используется как зависимость FastAPI. Если включён параметр CONFIG_HOT_RELOAD, не чаще
+    одного раза в CONFIG_RELOAD_CHECK_INTERVAL секунд проверяется время изменения файла,
+    и изменённый файл перечитывается. Файл с ошибками не применяется. Размеры пулов и кешей,
+    созданных до перезагрузки, не меняются.
+    """
+    settings = _state.settings
+    if settings is not None and not settings.fastAPI.CONFIG_HOT_RELOAD:
+        return settings
+
+    with _state.lock:
+        if _state.settings is None:
+            _state.mtime_ns = _file_mtime_ns(_state.path_yaml)
+            _state.settings = load_settings(_state.path_yaml)
+            _state.last_check = time.monotonic()
+        elif time.monotonic() - _state.last_check >= _state.settings.fastAPI.CONFIG_RELOAD_CHECK_INTERVAL:
+            _state.last_check = time.monotonic()
+            mtime_ns = _file_mtime_ns(_state.path_yaml)
+            if mtime_ns is not None and mtime_ns != _state.mtime_ns:
+                _state.mtime_ns = mtime_ns
+                try:
+                    _state.settings = load_settings(_state.path_yaml)
+                except Exception:
+                    # файл может быть записан не полностью или содержать ошибку
+                    pass
+        return _state.settings
+
+
+def use_settings(settings: Settings, path_yaml: Optional[str] = None) -> None:
+    """Задаёт конфигурации процесса, например загруженные при запуске приложения или в тестах.
+
+    Args:
+        settings: Конфигурации сервисов.
+        path_yaml: Конфигурационный файл для перезагрузки (None - файл, из которого загружены
+            конфигурации, если они загружены load_settings).
     """
-    fastAPI: dict
+    path_yaml = path_yaml or settings.path_yaml
+    with _state.lock:
+        _state.settings = settings
+        if path_yaml is not None:
+            _state.path_yaml = path_yaml
+        _state.mtime_ns = _file_mtime_ns(_state.path_yaml)
+        _state.last_check = time.monotonic()
 
-    def __init__(self, path_yaml: str = 'config.yaml') -> None:
-        """Инициализирует экземпляр класса.
 
-        Args:
-            path_yaml: Путь к конфигурационному файлу в формате yaml.
-        """
-        with open(path_yaml, 'r') as file:
-            config = yaml.safe_load(file)
-            self.fastAPI = config['fastAPI']
+def _file_mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,359 @@
+import os
+import queue
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, List, Optional, Set, Tuple
+
+from src.utils.config import get_settings
+from src.utils.metrics import frames_deduplicated
+
+
+LOCAL_STORAGE = 'local'
+S3_STORAGE = 's3'
+
+# каталог хранилища объектов внутри FRAMES_DIR_PATH
+OBJECTS_DIR_NAME = '.objects'
+
+
+class LocalFrameStorage():
+    """Хранилище кадров, адресуемых содержимым видеофайла.
+
+    Кадр хранится один раз в FRAMES_DIR_PATH/.objects/<хеш видеофайла>/<имя файла с кадром>,
+    где имя файла включает номер кадра, размер и формат. Каталоги FRAMES_DIR_PATH/<имя видеофайла>/
+    содержат жёсткие ссылки на эти объекты, поэтому кадры видеофайлов с одинаковым содержимым
+    и разными именами декодируются и занимают место на диске один раз. Если файловая система
+    не поддерживает жёсткие ссылки, файлы копируются.
+
+    Attributes:
+        frames_dir_path: Каталог с извлечёнными кадрами.
+    """
+    frames_dir_path: str
+
+    def __init__(self, frames_dir_path: str) -> None:
+        self.frames_dir_path = frames_dir_path
+
+    @property
+    def objects_dir_path(self) -> str:
+        return os.path.join(self.frames_dir_path, OBJECTS_DIR_NAME)
+
+    def object_path(self, digest: str, name: str) -> str:
+        return os.path.join(self.objects_dir_path, digest, name)
+
+    def link_frames(self, digest: str, frame_dir: str, names: List[str]) -> bool:
+        """Создаёт в каталоге видеофайла ссылки на ранее сохранённые кадры видеофайла с тем же содержимым.
+
+        Время изменения кадров обновляется, чтобы кеш кадров считал их записанными
+        после последнего изменения видеофайла.
+
+        Args:
+            digest: Хеш содержимого видеофайла.
+            frame_dir: Каталог для сохранения кадров.
+            names: Имена файлов с кадрами.
+
+        Returns:
+            True, если все кадры есть в хранилище и ссылки на них созданы.
+        """
+        missing = [x for x in names if not os.path.isfile(self.object_path(digest, x))]
+        if missing and not self._fetch(digest, missing):
+            return False
+
+        os.makedirs(frame_dir, exist_ok=True)
+        for name in names:
+            frame_path = os.path.join(frame_dir, name)
+            try:
+                _link_file(self.object_path(digest, name), frame_path)
+                os.utime(frame_path)
+            except FileNotFoundError:
+                # объект удалён при очистке хранилища, кадры будут извлечены заново
+                return False
+        frames_deduplicated.inc(len(names))
+        return True
+
+    def store_frames(self, digest: str, frame_dir: str, names: List[str]) -> None:
+        """Добавляет записанные в каталог видеофайла кадры в хранилище.
+
+        Кадры, уже сохранённые в хранилище, не перезаписываются.
+
+        Args:
+            digest: Хеш содержимого видеофайла.
+            frame_dir: Каталог с кадрами.
+            names: Имена файлов с кадрами.
+        """
+        os.makedirs(os.path.join(self.objects_dir_path, digest), exist_ok=True)
+        stored = []
+        for name in names:
+            object_path = self.object_path(digest, name)
+            if os.path.isfile(object_path):
+                continue
+            try:
+                _link_file(os.path.join(frame_dir, name), object_path, replace=False)
+            except FileNotFoundError:
+                continue
+            stored.append(name)
+        if stored:
+            self._publish(digest, stored)
+
+    def _fetch(self, digest: str, names: List[str]) -> bool:
+        """Загружает отсутствующие локально кадры из внешнего хранилища.
+        """
+        return False
+
+    def _publish(self, digest: str, names: List[str]) -> None:
+        """Выгружает добавленные кадры во внешнее хранилище.
+        """
+
+
+class S3FrameStorage(LocalFrameStorage):
+    """Хранилище кадров с копией объектов в S3-совместимом хранилище.
+
+    Локальное хранилище используется как кеш: добавленные кадры ставятся в очередь и выгружаются
+    фоновым потоком в bucket по ключу <prefix><хеш видеофайла>/<имя файла с кадром>, поэтому
+    запрос не ждёт выгрузки. Отсутствующие локально кадры загружаются из bucket перед созданием
+    ссылок, только если список объектов хеша содержит их все. Список объектов запрашивается
+    одним обращением на хеш и хранится listing_ttl секунд, поэтому видеофайлы, кадров которых
+    нет в bucket, не проверяются при каждом запросе. Ошибки обращения к S3 не прерывают запрос:
+    кадры извлекаются из видеофайла или остаются только локально.
+
+    Attributes:
+        client: Клиент S3 с методами list_objects_v2, upload_file и download_file (boto3.client('s3')).
+        bucket: Имя bucket.
+        prefix: Префикс ключей объектов.
+        listing_ttl: Время в секундах, в течение которого используется полученный список объектов хеша.
+        max_listings: Максимальное число хранимых списков объектов.
+    """
+    client: Any
+    bucket: str
+    prefix: str
+    listing_ttl: float
+    max_listings: int
+
+    def __init__(
+            self,
+            frames_dir_path: str,
+            client: Any,
+            bucket: str,
+            prefix: str = 'frames/',
+            listing_ttl: float = 60,
+            max_listings: int = 1024
+    ) -> None:
+        super().__init__(frames_dir_path)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+        self.listing_ttl = listing_ttl
+        self.max_listings = max_listings
+        # хеш видеофайла -> (время получения списка, имена объектов в bucket)
+        self._listings: 'OrderedDict[str, Tuple[float, Set[str]]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._uploads: 'queue.Queue[Tuple[str, List[str]]]' = queue.Queue()
+        self._uploader: Optional[threading.Thread] = None
+
+    def object_key(self, digest: str, name: str) -> str:
+        return f'{self.prefix}{digest}/{name}'
+
+    def flush(self) -> None:
+        """Ожидает выгрузки кадров, поставленных в очередь.
+        """
+        self._uploads.join()
+
+    def _fetch(self, digest: str, names: List[str]) -> bool:
+        stored = self._stored_names(digest)
+        if stored is None or not stored.issuperset(names):
+            return False
+        os.makedirs(os.path.join(self.objects_dir_path, digest), exist_ok=True)
+        for name in names:
+            object_path = self.object_path(digest, name)
+            tmp_path = _tmp_path(object_path)
+            try:
+                self.client.download_file(self.bucket, self.object_key(digest, name), tmp_path)
+                os.replace(tmp_path, object_path)
+            except Exception:
+                # объект удалён из bucket или S3 недоступно
+                _remove_file(tmp_path)
+                self._forget(digest)
+                return False
+        return True
+
+    def _publish(self, digest: str, names: List[str]) -> None:
+        self._uploads.put((digest, names))
+        with self._lock:
+            if self._uploader is None:
+                self._uploader = threading.Thread(target=self._upload, name='frame-storage-upload', daemon=True)
+                self._uploader.start()
+
+    def _upload(self) -> None:
+        while True:
+            (digest, names) = self._uploads.get()
+            try:
+                stored = self._stored_names(digest)
+                if stored is None:
+                    # S3 недоступно, кадры остаются только в локальном хранилище
+                    continue
+                for name in names:
+                    if name in stored:
+                        continue
+                    key = self.object_key(digest, name)
+                    try:
+                        self.client.upload_file(self.object_path(digest, name), self.bucket, key)
+                    except Exception:
+                        # кадр удалён из локального хранилища или S3 недоступно
+                        continue
+                    with self._lock:
+                        stored.add(name)
+            finally:
+                self._uploads.task_done()
+
+    def _stored_names(self, digest: str) -> Optional[Set[str]]:
+        """Возвращает имена объектов хеша в bucket, запрашивая список не чаще раза в listing_ttl секунд.
+
+        Returns:
+            Имена объектов или None, если S3 недоступно.
+        """
+        now = time.monotonic()
+        with self._lock:
+            listing = self._listings.get(digest)
+            if listing is not None and now - listing[0] < self.listing_ttl:
+                self._listings.move_to_end(digest)
+                return listing[1]
+
+        key_prefix = self.object_key(digest, '')
+        names = set()
+        kwargs = {'Bucket': self.bucket, 'Prefix': key_prefix}
+        try:
+            while True:
+                response = self.client.list_objects_v2(**kwargs)
+                names.update(x['Key'][len(key_prefix):] for x in response.get('Contents', []))
+                if not response.get('IsTruncated'):
+                    break
+                kwargs['ContinuationToken'] = response['NextContinuationToken']
+        except Exception:
+            return None
+
+        with self._lock:
+            self._listings[digest] = (now, names)
+            self._listings.move_to_end(digest)
+            while len(self._listings) > self.max_listings:
+                self._listings.popitem(last=False)
+        return names
+
+    def _forget(self, digest: str) -> None:
+        with self._lock:
+            self._listings.pop(digest, None)
+
+
+def remove_orphan_objects(frames_dir_path: str, max_age: Optional[float] = None) -> int:
+    """Удаляет из хранилища кадры, на которые не ссылается ни один каталог видеофайла.
+
+    Args:
+        frames_dir_path: Каталог с извлечёнными кадрами.
+        max_age: Время в секундах после последнего использования, после которого кадр удаляется
+            (None - удаляются все кадры без ссылок).
+
+    Returns:
+        Размер удалённых файлов.
+    """
+    objects_dir_path = os.path.join(frames_dir_path, OBJECTS_DIR_NAME)
+    now = time.time()
+    size = 0
+    try:
+        digest_entries = list(os.scandir(objects_dir_path))
+    except FileNotFoundError:
+        return 0
+    for digest_entry in digest_entries:
+        if not digest_entry.is_dir(follow_symlinks=False):
+            continue
+        for entry in os.scandir(digest_entry.path):
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_nlink > 1 or (max_age is not None and now - stat.st_mtime <= max_age):
+                continue
+            if _remove_file(entry.path):
+                size += stat.st_size
+        try:
+            os.rmdir(digest_entry.path)
+        except OSError:
+            # в каталоге остались кадры
+            pass
+    return size
+
+
+def _link_file(src: str, dst: str, replace: bool = True) -> None:
+    """Создаёт жёсткую ссылку или, если это невозможно, копию файла.
+
+    Ссылка создаётся под временным именем и переименовывается, поэтому читатели
+    не видят неполный файл.
+
+    Args:
+        src: Путь к файлу.
+        dst: Путь к ссылке.
+        replace: Заменить существующий файл dst.
+    """
+    tmp_path = _tmp_path(dst)
+    try:
+        os.link(src, tmp_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # файловая система не поддерживает жёсткие ссылки или файлы на разных устройствах
+        shutil.copyfile(src, tmp_path)
+    try:
+        if replace:
+            os.replace(tmp_path, dst)
+        else:
+            try:
+                os.link(tmp_path, dst)
+            except FileExistsError:
+                pass
+    finally:
+        _remove_file(tmp_path)
+
+
+def _tmp_path(path: str) -> str:
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f'.{name}.{uuid.uuid4().hex}.tmp')
+
+
+def _remove_file(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+_frame_storage: Optional[LocalFrameStorage] = None
+_init_lock = threading.Lock()
+
+
+def get_frame_storage() -> LocalFrameStorage:
+    """Возвращает общее хранилище кадров, создавая его при первом обращении.
+
+    Тип хранилища задаётся параметром FRAME_STORAGE. Для хранилища s3 требуется пакет boto3.
+    """
+    global _frame_storage
+    with _init_lock:
+        if _frame_storage is None:
+            config = get_settings().fastAPI
+            if config.FRAME_STORAGE == S3_STORAGE:
+                import boto3
+
+                client = boto3.client('s3', endpoint_url=config.FRAME_STORAGE_S3_ENDPOINT_URL)
+                _frame_storage = S3FrameStorage(
+                    config.FRAMES_DIR_PATH, client, config.FRAME_STORAGE_S3_BUCKET, config.FRAME_STORAGE_S3_PREFIX
+                )
+            else:
+                _frame_storage = LocalFrameStorage(config.FRAMES_DIR_PATH)
+        return _frame_storage
+
+
+def use_frame_storage(storage: Optional[LocalFrameStorage]) -> None:
+    """Заменяет общее хранилище кадров, например хранилищем с клиентом S3 для тестов.
+
+    Args:
+        storage: Хранилище кадров (None - создать по конфигурации при следующем обращении).
+    """
+    global _frame_storage
+    with _init_lock:
+        _frame_storage = storage
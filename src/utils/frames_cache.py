@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select
+
+from src.models import engine
+from src.models import frame_service_informations
+from src.utils.config import get_settings
+from src.utils.frame_storage import OBJECTS_DIR_NAME, remove_orphan_objects
+from src.utils.save_frames import FrameSize, frame_file_name
+from src.utils.video_capture import CacheStats, video_file_key
+
+
+class FramesKey(NamedTuple):
+    """Ключ результата извлечения кадров.
+
+    Attributes:
+        video_path: Полный путь к видеофайлу.
+        video_mtime_ns: Время изменения видеофайла в наносекундах.
+        video_size: Размер видеофайла.
+        first_frame: Номер первого извлечённого кадра.
+        count: Число извлечённых кадров.
+        ext: Расширение (формат) файлов с кадрами.
+        size: Размер уменьшенных кадров (None - исходный размер).
+    """
+    video_path: str
+    video_mtime_ns: int
+    video_size: int
+    first_frame: int
+    count: int
+    ext: str
+    size: Optional[FrameSize] = None
+
+
+class FramesCache():
+    """Кеш извлечённых кадров, хранящихся в каталоге FRAMES_DIR_PATH/<имя видеофайла>/.
+
+    Результат считается действительным, если все файлы с кадрами существуют, не пусты
+    и записаны после последнего изменения видеофайла. Каталоги с кадрами, к которым
+    долго не обращались, вытесняются по возрасту и по суммарному размеру. Кадры,
+    сохранённые в базе данных, кадры, записанные после начала проверки, и каталоги, в которые
+    идёт запись (writing), не удаляются. Кадры хранилища кадров (каталог .objects),
+    на которые не осталось ссылок, удаляются при проверке ограничений, а если задан max_age -
+    после max_age секунд без использования.
+
+    Attributes:
+        frames_dir_path: Каталог с извлечёнными кадрами.
+        max_bytes: Максимальный суммарный размер кадров (None - без ограничения).
+        max_age: Время в секундах, после которого неиспользуемый каталог удаляется (None - без ограничения).
+        sweep_interval: Минимальный интервал в секундах между проверками ограничений.
+        stats: Счётчики попаданий, промахов и вытеснений каталогов.
+    """
+    frames_dir_path: str
+    max_bytes: Optional[int]
+    max_age: Optional[int]
+    sweep_interval: int
+    stats: CacheStats
+
+    def __init__(
+            self,
+            frames_dir_path: str,
+            max_bytes: Optional[int] = None,
+            max_age: Optional[int] = None,
+            sweep_interval: int = 60
+    ) -> None:
+        self.frames_dir_path = frames_dir_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sweep_interval = sweep_interval
+        self.stats = CacheStats()
+        self._last_access: Dict[str, float] = {}
+        # число извлечений, записывающих кадры в каталог видеофайла
+        self._writers: Dict[str, int] = {}
+        self._last_sweep = time.monotonic()
+        self._sweeping = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(
+            video_path: str,
+            first_frame: int,
+            count: int,
+            ext: str = 'png',
+            frame_size: Optional[FrameSize] = None
+    ) -> FramesKey:
+        """Формирует ключ результата извлечения кадров для текущей версии видеофайла.
+        """
+        path, mtime_ns, size = video_file_key(video_path)
+        return FramesKey(path, mtime_ns, size, first_frame, count, ext, frame_size)
+
+    def frame_dir(self, file_name: str) -> str:
+        return os.path.join(self.frames_dir_path, file_name)
+
+    def frame_paths(self, file_name: str, key: FramesKey) -> List[str]:
+        frame_dir = self.frame_dir(file_name)
+        return [
+            os.path.join(frame_dir, frame_file_name(key.first_frame + i, key.ext, key.size))
+            for i in range(key.count)
+        ]
+
+    def get(self, file_name: str, key: FramesKey) -> Optional[List[str]]:
+        """Возвращает пути к ранее извлечённым кадрам, если они сохранены на диске и действительны.
+
+        Args:
+            file_name: Имя видеофайла.
+            key: Ключ результата извлечения кадров.
+
+        Returns:
+            Список путей к файлам с кадрами или None.
+        """
+        frame_paths = self.frame_paths(file_name, key)
+        for frame_path in frame_paths:
+            try:
+                stat = os.stat(frame_path)
+            except OSError:
+                self.stats.misses += 1
+                return None
+            if stat.st_size == 0 or stat.st_mtime_ns < key.video_mtime_ns:
+                self.stats.misses += 1
+                return None
+
+        self.stats.hits += 1
+        self._touch(file_name)
+        return frame_paths
+
+    def put(self, file_name: str) -> None:
+        """Отмечает запись кадров в каталог видеофайла и при необходимости запускает проверку ограничений.
+
+        Args:
+            file_name: Имя видеофайла.
+        """
+        self._touch(file_name)
+        if self.max_bytes is None and self.max_age is None:
+            return
+        with self._lock:
+            if self._sweeping or time.monotonic() - self._last_sweep < self.sweep_interval:
+                return
+            self._sweeping = True
+        threading.Thread(target=self.sweep, daemon=True).start()
+
+    @contextmanager
+    def writing(self, file_name: str) -> Iterator[None]:
+        """Отмечает запись кадров в каталог видеофайла: каталог не вытесняется до конца блока with.
+
+        Args:
+            file_name: Имя видеофайла.
+        """
+        with self._lock:
+            self._writers[file_name] = self._writers.get(file_name, 0) + 1
+        self._touch(file_name)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writers[file_name] -= 1
+                if not self._writers[file_name]:
+                    del self._writers[file_name]
+            self._touch(file_name)
+
+    def sweep(self) -> None:
+        """Удаляет каталоги с кадрами, превышающие ограничения по возрасту и суммарному размеру.
+        """
+        try:
+            now = time.time()
+            dirs = []
+            total_size = 0
+            for entry in os.scandir(self.frames_dir_path):
+                if not entry.is_dir(follow_symlinks=False) or entry.name == OBJECTS_DIR_NAME:
+                    continue
+                size, last_used = 0, self._last_access.get(entry.name, 0.0)
+                try:
+                    file_entries = list(os.scandir(entry.path))
+                except FileNotFoundError:
+                    continue
+                for file_entry in file_entries:
+                    try:
+                        stat = file_entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        # кадр удалён или заменён во время проверки
+                        continue
+                    size += stat.st_size
+                    last_used = max(last_used, stat.st_mtime)
+                dirs.append((last_used, entry.name, size))
+                total_size += size
+
+            # сначала вытесняются каталоги, к которым дольше всего не обращались
+            dirs.sort()
+            for last_used, file_name, size in dirs:
+                expired = self.max_age is not None and now - last_used > self.max_age
+                oversized = self.max_bytes is not None and total_size > self.max_bytes
+                if not expired and not oversized:
+                    continue
+                removed_size = self._evict_dir(file_name, now)
+                if removed_size:
+                    total_size -= removed_size
+                    self.stats.evictions += 1
+            # кадры хранилища, на которые больше не ссылаются каталоги видеофайлов
+            remove_orphan_objects(self.frames_dir_path, self.max_age)
+        finally:
+            with self._lock:
+                self._last_sweep = time.monotonic()
+                self._sweeping = False
+
+    def _touch(self, file_name: str) -> None:
+        self._last_access[file_name] = time.time()
+
+    def _evict_dir(self, file_name: str, scan_started: float) -> int:
+        """Удаляет из каталога видеофайла все кадры, кроме сохранённых в базе данных, их копий
+        и кадров, записанных после начала проверки. Каталог, к которому обращались после начала
+        проверки или в который идёт запись, не изменяется.
+
+        Args:
+            file_name: Имя видеофайла.
+            scan_started: Время начала проверки.
+
+        Returns:
+            Размер удалённых файлов.
+        """
+        if self._in_use(file_name, scan_started):
+            return 0
+        saved_paths = set()
+        with engine.connect() as conn:
+            rows = conn.execute(
+                select(frame_service_informations.c.frame_file_path, frame_service_informations.c.variants)
+                .where(frame_service_informations.c.video_file_name == file_name)
+            )
+            for (frame_file_path, variants) in rows:
+                saved_paths.add(frame_file_path)
+                saved_paths.update(x['frame_path'] for x in variants or [])
+
+        frame_dir = self.frame_dir(file_name)
+        size = 0
+        try:
+            entries = list(os.scandir(frame_dir))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if entry.path in saved_paths or not entry.is_file(follow_symlinks=False):
+                continue
+            if self._in_use(file_name, scan_started):
+                return size
+            try:
+                stat = entry.stat()
+                if stat.st_mtime >= scan_started:
+                    continue
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            size += stat.st_size
+
+        with self._lock:
+            if self._writers.get(file_name):
+                return size
+            try:
+                # удаляется только пустой каталог
+                os.rmdir(frame_dir)
+            except OSError:
+                return size
+            self._last_access.pop(file_name, None)
+        return size
+
+    def _in_use(self, file_name: str, scan_started: float) -> bool:
+        with self._lock:
+            return bool(self._writers.get(file_name)) or self._last_access.get(file_name, 0.0) >= scan_started
+
+_frames_cache: Optional[FramesCache] = None
+_init_lock = threading.Lock()
+
+
+def current_frames_cache() -> Optional[FramesCache]:
+    """Возвращает общий кеш извлечённых кадров, не создавая его.
+    """
+    return _frames_cache
+
+
+def get_frames_cache() -> FramesCache:
+    """Возвращает общий кеш извлечённых кадров, создавая его при первом обращении.
+    """
+    global _frames_cache
+    with _init_lock:
+        if _frames_cache is None:
+            config = get_settings()
+            _frames_cache = FramesCache(
+                config.fastAPI.FRAMES_DIR_PATH,
+                max_bytes=config.fastAPI.FRAMES_CACHE_MAX_BYTES,
+                max_age=config.fastAPI.FRAMES_CACHE_MAX_AGE,
+                sweep_interval=config.fastAPI.FRAMES_CACHE_SWEEP_INTERVAL,
+            )
+        return _frames_cache
@@ -1,45 +1,531 @@
-from typing import List, Tuple, Optional, TYPE_CHECKING
+import os
+from typing import Dict, Iterator, List, Sequence, Tuple, Optional, TYPE_CHECKING
 
 import cv2
 
-from src.utils.config import Config
+from src.utils.config import get_settings
+from src.utils.keyframes import frames_in_duration, get_keyframe_index_store
+from src.utils.metrics import (
+    DECODE_STAGE, OPEN_CAPTURE_STAGE, SCAN_STAGE, SEEK_STAGE, frames_decoded, frames_kept, timed, timed_function,
+)
+from src.utils.save_frames import FrameSize, FrameWriter, encode_params, frame_extension, frame_file_name
+from src.utils.video_capture import VideoMetadata, get_capture_pool, get_video_metadata, open_capture
 
 if TYPE_CHECKING:
     from numpy import ndarray
 
 
-def extract_frame(video_path: str, time_in_video: int) -> Tuple[Optional[int], List['ndarray']]:
+# способы извлечения кадров, сообщаются клиенту в заголовке ответа
+SEEK_METHOD = 'seek'
+LINEAR_METHOD = 'linear'
+CACHE_METHOD = 'cache'
+RESIZE_METHOD = 'resize'
+DEDUP_METHOD = 'dedup'
+
+
+class FramesExtractionError(Exception):
+    """Ошибка извлечения или сохранения кадров, сообщение передаётся клиенту.
+    """
+
+
+def make_frame_dir(frame_dir: str) -> None:
+    """Создаёт каталог для сохранения кадров, если его ещё нет.
+
+    Каталог может одновременно создаваться несколькими обработчиками, поэтому
+    существование не проверяется заранее.
+
+    Raises:
+        FramesExtractionError: По пути каталога находится файл.
+    """
+    try:
+        os.makedirs(frame_dir, exist_ok=True)
+    except FileExistsError:
+        raise FramesExtractionError('Frame directory is file')
+
+
+def window_in_range(metadata: VideoMetadata, first_frame: int, count: int) -> bool:
+    """Проверяет, что диапазон кадров не выходит за пределы видеофайла.
+
+    Если число кадров неизвестно (0 или меньше), диапазон считается допустимым.
+
+    Args:
+        metadata: Параметры видеофайла.
+        first_frame: Номер первого кадра диапазона.
+        count: Число кадров.
+    """
+    return metadata.frame_count <= 0 or first_frame + count <= metadata.frame_count
+
+
+def frame_at_time(video_path: str, metadata: VideoMetadata, time_ms: int) -> int:
+    """Возвращает номер кадра, показываемого в указанное время от начала видеофайла.
+
+    Если для видеофайла построен индекс ключевых кадров, время отсчитывается от времени
+    показа (pts) ближайшего предшествующего ключевого кадра, иначе номер кадра вычисляется
+    по частоте кадров от начала видеофайла.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        metadata: Параметры видеофайла.
+        time_ms: Время от начала видеофайла в миллисекундах.
+    """
+    index = get_keyframe_index_store().get(video_path)
+    if index is None:
+        return frames_in_duration(time_ms * 1000, metadata.fps)
+    return index.frame_at_time(time_ms * 1000, metadata.fps)
+
+
+def extract_and_save_frames(
+        video_path: str,
+        frame_dir: str,
+        first_frame: int,
+        count: int,
+        frame_format: str = 'png',
+        sizes: Sequence[Optional[FrameSize]] = (None,)
+) -> Tuple[int, List[str], str]:
+    """Функция для извлечения кадров из видеофайла и сохранения их в файлы.
+
+    Выполняется в пуле обработчиков, в том числе в отдельном процессе. Каждый кадр
+    декодируется один раз и сохраняется во всех указанных размерах.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        frame_dir: Каталог для сохранения кадров.
+        first_frame: Номер первого извлекаемого кадра.
+        count: Число извлекаемых кадров.
+        frame_format: Формат файлов с кадрами: png, jpeg или webp.
+        sizes: Размеры сохраняемых кадров (None - исходный размер).
+
+    Returns:
+        Номер первого извлечённого кадра, список путей к файлам с кадрами первого
+        из указанных размеров и способ извлечения.
+
+    Raises:
+        FramesExtractionError: Кадры не удалось извлечь или сохранить.
+    """
+    first_frame, frames, method = extract_frame(video_path, first_frame, count)
+    if len(frames) != count or first_frame is None:
+        raise FramesExtractionError('Failed to extract frames.')
+
+    make_frame_dir(frame_dir)
+    ext = frame_extension(frame_format)
+    writer = FrameWriter(encode_params(frame_format))
+    for (i, frame) in enumerate(frames):
+        for size in sizes:
+            writer.submit(frame, os.path.join(frame_dir, frame_file_name(first_frame + i, ext, size)), size)
+    writer.close()
+
+    frame_paths = [
+        os.path.join(frame_dir, frame_file_name(first_frame + i, ext, sizes[0]))
+        for i in range(len(frames))
+    ]
+    return first_frame, frame_paths, method
+
+
+@timed_function
+def extract_frame(video_path: str, first_frame: int, count: int) -> Tuple[Optional[int], List['ndarray'], str]:
     """Функция для извлечения кадров из видеофайла.
 
+    Видеофайл берётся из пула открытых видеофайлов, его параметры - из кеша.
+    Сначала выполняется позиционирование на нужный кадр: по индексу ключевых кадров
+    декодирование начинается с ближайшего предшествующего ключевого кадра. Если контейнер не поддерживает
+    надёжное позиционирование, кадры извлекаются последовательным чтением с начала файла.
+
     Args:
         video_path: Полный путь к видеофайлу.
-        time_in_video: Время от начала видеофайла в секундах.
+        first_frame: Номер первого извлекаемого кадра.
+        count: Число извлекаемых кадров.
 
     Returns:
-        Номер первого извлечённого кадра и список извлечённых кадров.
+        Номер первого извлечённого кадра, список извлечённых кадров и способ извлечения.
     """
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    if not cap.isOpened():
-        return
-    frame_counter = 0
-    images = []
-    save_frames_count = Config().fastAPI['SAVE_FRAMES_COUNT']
-    while frame_counter < total_frames:
+    with get_capture_pool().acquire(video_path) as cap:
+        metadata = get_video_metadata(video_path, cap)
+        if metadata is None:
+            return None, [], SEEK_METHOD
+        total_frames = metadata.frame_count
+
+        # число кадров неизвестно (повреждённый контейнер), позиционированию нельзя доверять:
+        # кадры читаются с начала файла до конца диапазона или до конца видеофайла
+        if total_frames > 0:
+            if not window_in_range(metadata, first_frame, count):
+                return None, [], SEEK_METHOD
+            keyframe = _preceding_keyframe(video_path, first_frame)
+            images = _seek_frames(cap, first_frame, count, keyframe)
+            if images is not None:
+                frames_kept.inc(count)
+                return first_frame, images, SEEK_METHOD
+
+        # видеофайл из пула открывается заново, чтобы чтение началось с первого кадра
+        _reopen(cap, video_path)
+        images = _scan_frames(cap, first_frame, total_frames, count)
+        if len(images) == count:
+            frames_kept.inc(count)
+            return first_frame, images, LINEAR_METHOD
+        else:
+            return None, [], LINEAR_METHOD
+
+
+def iter_frames(
+        video_path: str,
+        first_frame: int,
+        count: int,
+        dedicated: bool = False
+) -> Iterator[Tuple[int, 'ndarray']]:
+    """Генератор кадров из видеофайла: кадры декодируются по одному по мере запроса.
+
+    В отличие от extract_frame, в памяти одновременно находится только один кадр.
+    Видеофайл из пула занят до завершения или закрытия генератора.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        first_frame: Номер первого извлекаемого кадра.
+        count: Число извлекаемых кадров.
+        dedicated: Открыть видеофайл вне пула, не занимая копии видеофайла, используемые запросами.
+
+    Yields:
+        Номер кадра и кадр.
+
+    Raises:
+        FramesExtractionError: Кадры не удалось извлечь, в том числе после выдачи части кадров.
+    """
+    capture = open_capture(video_path) if dedicated else get_capture_pool().acquire(video_path)
+    with capture as cap:
+        metadata = get_video_metadata(video_path, cap)
+        if metadata is None:
+            raise FramesExtractionError('Failed to extract frames.')
+        total_frames = metadata.frame_count
+
+        if not window_in_range(metadata, first_frame, count):
+            raise FramesExtractionError('Failed to extract frames.')
+        if total_frames > 0 and _seek(cap, first_frame, _preceding_keyframe(video_path, first_frame)):
+            images = _iter_read_frames(cap, count)
+        else:
+            _reopen(cap, video_path)
+            images = _iter_scan_frames(cap, first_frame, total_frames, count)
+
+        frames_count = 0
+        for image in images:
+            frames_kept.inc()
+            yield first_frame + frames_count, image
+            frames_count += 1
+        if frames_count != count:
+            raise FramesExtractionError('Failed to extract frames.')
+
+
+def iter_video_frames(video_path: str, step: int = 1) -> Iterator[Tuple[int, 'ndarray']]:
+    """Генератор кадров при последовательном чтении видеофайла с первого кадра до конца.
+
+    Преобразуются в изображение (retrieve) только кадры с номерами, кратными step,
+    остальные кадры только захватываются (grab).
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        step: Шаг между возвращаемыми кадрами.
+
+    Yields:
+        Номер кадра и кадр.
+
+    Raises:
+        FramesExtractionError: Видеофайл не удалось открыть.
+    """
+    with get_capture_pool().acquire(video_path) as cap:
+        if get_video_metadata(video_path, cap) is None:
+            raise FramesExtractionError('Failed to extract frames.')
+        # видеофайл из пула открывается заново, чтобы чтение началось с первого кадра
+        _reopen(cap, video_path)
+        frame_number = 0
+        while True:
+            if frame_number % step:
+                if not _grab(cap):
+                    return
+            else:
+                success, image = _read(cap)
+                if not success:
+                    return
+                yield frame_number, image
+            frame_number += 1
+
+
+def extract_and_save_frame_windows(
+        video_path: str,
+        frame_dir: str,
+        first_frames: List[int],
+        frame_format: str = 'png'
+) -> Dict[int, List[str]]:
+    """Функция для извлечения нескольких диапазонов кадров за один проход по видеофайлу и сохранения их в файлы.
+
+    Диапазоны сортируются и объединяются, кадры декодируются в порядке возрастания номеров
+    и сразу передаются на запись, поэтому в памяти не накапливаются.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        frame_dir: Каталог для сохранения кадров.
+        first_frames: Номера первых кадров диапазонов по SAVE_FRAMES_COUNT кадров.
+        frame_format: Формат файлов с кадрами: png, jpeg или webp.
+
+    Returns:
+        Пути к файлам с кадрами для каждого успешно извлечённого диапазона по номеру его первого кадра.
+
+    Raises:
+        FramesExtractionError: Каталог для сохранения кадров является файлом.
+    """
+    count = get_settings().fastAPI.SAVE_FRAMES_COUNT
+    make_frame_dir(frame_dir)
+
+    ext = frame_extension(frame_format)
+    writer = FrameWriter(encode_params(frame_format))
+    saved = set()
+    try:
+        for (frame_number, frame) in iter_frame_ranges(video_path, merge_frame_ranges(first_frames, count)):
+            writer.submit(frame, os.path.join(frame_dir, f'{frame_number}.{ext}'))
+            saved.add(frame_number)
+    finally:
+        writer.close()
+
+    return {
+        first_frame: [os.path.join(frame_dir, f'{first_frame + i}.{ext}') for i in range(count)]
+        for first_frame in first_frames
+        if all(first_frame + i in saved for i in range(count))
+    }
+
+
+def merge_frame_ranges(first_frames: List[int], count: int) -> List[Tuple[int, int]]:
+    """Сортирует и объединяет пересекающиеся и смежные диапазоны кадров.
+
+    Args:
+        first_frames: Номера первых кадров диапазонов.
+        count: Число кадров в каждом диапазоне.
+
+    Returns:
+        Список диапазонов [начало, конец) в порядке возрастания.
+    """
+    ranges: List[Tuple[int, int]] = []
+    for first_frame in sorted(set(first_frames)):
+        if ranges and first_frame <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], first_frame + count)
+        else:
+            ranges.append((first_frame, first_frame + count))
+    return ranges
+
+
+def iter_frame_ranges(video_path: str, ranges: List[Tuple[int, int]]) -> Iterator[Tuple[int, 'ndarray']]:
+    """Генератор кадров из нескольких диапазонов за один проход по видеофайлу.
+
+    Между близкими диапазонами декодер продвигается захватом кадров (grab), к далёким
+    диапазонам выполняется позиционирование. Если есть индекс ключевых кадров, диапазон
+    считается близким, когда между текущей позицией и диапазоном нет ключевого кадра. Если позиционирование ненадёжно, видеофайл
+    читается последовательно с начала. Кадры диапазонов за последним кадром видеофайла
+    пропускаются, при ошибке чтения генератор завершается.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        ranges: Непересекающиеся диапазоны [начало, конец) в порядке возрастания.
+
+    Yields:
+        Номер кадра и кадр.
+    """
+    seek_min_distance = get_settings().fastAPI.SEEK_MIN_DISTANCE
+    with get_capture_pool().acquire(video_path) as cap:
+        metadata = get_video_metadata(video_path, cap)
+        if metadata is None:
+            return
+        keyframe_index = get_keyframe_index_store().get(video_path)
+        total_frames = metadata.frame_count
+        # позиционированию нельзя доверять, если число кадров неизвестно
+        can_seek = total_frames > 0
+        position = None
+        if not can_seek:
+            _reopen(cap, video_path)
+            position = 0
+
+        for (start, stop) in ranges:
+            if total_frames > 0:
+                # объединённый диапазон может заканчиваться за последним кадром, кадры до конца видеофайла выдаются
+                if start >= total_frames:
+                    break
+                stop = min(stop, total_frames)
+            keyframe = keyframe_index.preceding_keyframe(start) if keyframe_index is not None else None
+            if keyframe_index is not None and position is not None and position <= start:
+                # позиционирование декодировало бы те же кадры от ключевого кадра, уже пройденного декодером
+                near = keyframe is None or keyframe <= position
+            else:
+                near = position is not None and 0 <= start - position < seek_min_distance
+            if can_seek and not near:
+                if _seek(cap, start, keyframe):
+                    position = start
+                else:
+                    can_seek = False
+                    _reopen(cap, video_path)
+                    position = 0
+
+            while position < start:
+                if not _grab(cap):
+                    return
+                position += 1
+            for frame_number in range(start, stop):
+                success, image = _read(cap)
+                if not success:
+                    return
+                position += 1
+                frames_kept.inc()
+                yield frame_number, image
+
+
+@timed(SEEK_STAGE)
+def _seek(cap: cv2.VideoCapture, first_frame: int, keyframe: Optional[int] = None) -> bool:
+    """Позиционирует видеофайл на указанный кадр.
+
+    Если известен предшествующий ключевой кадр, видеофайл позиционируется на него,
+    а кадры до указанного декодируются без преобразования (grab).
+
+    Args:
+        cap: Открытый видеофайл.
+        first_frame: Номер кадра.
+        keyframe: Номер ближайшего ключевого кадра, не следующего за first_frame.
+
+    Returns:
+        True, если декодер встал именно на запрошенный кадр.
+    """
+    position = first_frame if keyframe is None else keyframe
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, position):
+        return False
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != position:
+        return False
+    while position < first_frame:
+        if not cap.grab():
+            return False
+        frames_decoded.inc()
+        position += 1
+    return True
+
+
+def _reopen(cap: cv2.VideoCapture, video_path: str) -> None:
+    """Открывает видеофайл заново, чтобы чтение началось с первого кадра.
+    """
+    with timed(OPEN_CAPTURE_STAGE):
+        cap.open(video_path)
+
+
+def _grab(cap: cv2.VideoCapture) -> bool:
+    """Декодирует следующий кадр без преобразования в изображение (пропуск кадра).
+    """
+    with timed(SCAN_STAGE):
+        success = cap.grab()
+    frames_decoded.inc()
+    return success
+
+
+def _read(cap: cv2.VideoCapture) -> Tuple[bool, 'ndarray']:
+    """Декодирует следующий кадр и преобразует его в изображение.
+    """
+    with timed(DECODE_STAGE):
         success, image = cap.read()
-        frame_counter += 1
+    frames_decoded.inc()
+    return success, image
+
+
+def _preceding_keyframe(video_path: str, frame_number: int) -> Optional[int]:
+    """Возвращает номер ближайшего ключевого кадра не позже указанного или None, если индекса нет.
+    """
+    index = get_keyframe_index_store().get(video_path)
+    if index is None:
+        return None
+    return index.preceding_keyframe(frame_number)
+
+
+def _seek_frames(
+        cap: cv2.VideoCapture,
+        first_frame: int,
+        count: int,
+        keyframe: Optional[int] = None
+) -> Optional[List['ndarray']]:
+    """Извлекает кадры после позиционирования на первый кадр.
+
+    Args:
+        cap: Открытый видеофайл.
+        first_frame: Номер первого извлекаемого кадра.
+        count: Число извлекаемых кадров.
+        keyframe: Номер ближайшего ключевого кадра, не следующего за first_frame.
+
+    Returns:
+        Список извлечённых кадров или None, если позиционирование оказалось неточным.
+    """
+    if not _seek(cap, first_frame, keyframe):
+        return None
+
+    images = list(_iter_read_frames(cap, count))
+    if len(images) != count or int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != first_frame + count:
+        return None
+    return images
+
+
+def _iter_read_frames(cap: cv2.VideoCapture, count: int) -> Iterator['ndarray']:
+    """Читает подряд указанное число кадров с текущей позиции, останавливаясь при ошибке чтения.
+    """
+    for _ in range(count):
+        success, image = _read(cap)
         if not success:
-            continue
+            return
+        yield image
+
+
+def _scan_frames(
+        cap: cv2.VideoCapture,
+        start_position: float,
+        total_frames: int,
+        count: int
+) -> List['ndarray']:
+    """Извлекает кадры последовательным чтением видеофайла с первого кадра.
+
+    Args:
+        cap: Открытый видеофайл, позиционированный на начало.
+        start_position: Номер первого извлекаемого кадра (дробная часть отбрасывается).
+        total_frames: Число кадров в видеофайле.
+        count: Число извлекаемых кадров.
+
+    Returns:
+        Список извлечённых кадров.
+    """
+    return list(_iter_scan_frames(cap, start_position, total_frames, count))
+
+
+def _iter_scan_frames(
+        cap: cv2.VideoCapture,
+        start_position: float,
+        total_frames: int,
+        count: int
+) -> Iterator['ndarray']:
+    """Генератор кадров, извлекаемых последовательным чтением видеофайла с первого кадра.
+
+    Кадры до начала извлекаемого диапазона только захватываются (grab) без
+    преобразования в изображение, изображения получаются (retrieve) только для
+    кадров из диапазона. Если число кадров неизвестно (0 или меньше), чтение
+    прекращается на первом кадре, который не удалось захватить (конец видеофайла).
+
+    Args:
+        cap: Открытый видеофайл, позиционированный на начало.
+        start_position: Номер первого извлекаемого кадра (дробная часть отбрасывается).
+        total_frames: Число кадров в видеофайле.
+        count: Число извлекаемых кадров.
+
+    Yields:
+        Извлечённые кадры.
+    """
+    known_length = total_frames > 0
+    frame_counter = 0
+    while not known_length or frame_counter < total_frames:
+        frame_counter += 1
         # зная количество кадров в секунду (fps), здесь можно определить кадр,
         # соответствующий заданному времени на видео
-        if time_in_video * fps + save_frames_count < frame_counter:
+        if start_position + count < frame_counter:
             break
 
-        if time_in_video * fps < frame_counter:
-            images.append(image)
-
-    if len(images) == save_frames_count:
-        return int(time_in_video * fps), images
-    else:
-        return None, []
+        if start_position < frame_counter:
+            # read выполняет grab и retrieve: кадр, который не удалось захватить, пропускается
+            success, image = _read(cap)
+            if success:
+                yield image
+        else:
+            success = _grab(cap)
+        if not success and not known_length:
+            return
@@ -0,0 +1,381 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models import engine
+from src.models import extraction_jobs
+from src.utils.config import get_settings
+from src.utils.frame_storage import get_frame_storage
+from src.utils.frames_cache import get_frames_cache
+from src.utils.get_frames import FramesExtractionError, iter_frames, make_frame_dir
+from src.utils.save_frames import FrameSize, FrameWriter, encode_params, frame_extension, frame_file_name
+from src.utils.video_index import get_video_digest
+
+
+# состояния заданий извлечения кадров
+QUEUED_STATUS = 'queued'
+RUNNING_STATUS = 'running'
+DONE_STATUS = 'done'
+FAILED_STATUS = 'failed'
+
+
+class ExtractionJob(NamedTuple):
+    """Задание извлечения кадров.
+
+    Attributes:
+        job_id: Идентификатор задания.
+        video_file_name: Имя видеофайла.
+        first_frame: Номер первого кадра.
+        count: Число кадров.
+        frame_format: Формат файлов с кадрами.
+        size: Размер уменьшенных кадров (None - исходный размер).
+        priority: Приоритет: задания с большим приоритетом выполняются раньше.
+    """
+    job_id: str
+    video_file_name: str
+    first_frame: int
+    count: int
+    frame_format: str
+    size: Optional[FrameSize] = None
+    priority: int = 0
+
+
+def create_job_id() -> str:
+    return uuid.uuid4().hex
+
+
+def job_values(job: ExtractionJob) -> Dict[str, object]:
+    """Возвращает значения столбцов таблицы extraction_job для нового задания.
+    """
+    now = time.time()
+    return {
+        'job_id': job.job_id,
+        'video_file_name': job.video_file_name,
+        'first_frame': job.first_frame,
+        'frame_count': job.count,
+        'frame_format': job.frame_format,
+        'frame_width': job.size[0] if job.size is not None else None,
+        'frame_height': job.size[1] if job.size is not None else None,
+        'priority': job.priority,
+        'status': QUEUED_STATUS,
+        'frames_decoded': 0,
+        'created_at': now,
+        'updated_at': now,
+    }
+
+
+def job_from_row(row: object) -> ExtractionJob:
+    size = (row.frame_width, row.frame_height) if row.frame_width is not None else None
+    return ExtractionJob(
+        row.job_id, row.video_file_name, row.first_frame, row.frame_count, row.frame_format, size, row.priority
+    )
+
+
+class JobScheduler():
+    """Очередь заданий с приоритетами и чередованием видеофайлов.
+
+    Сначала выдаются задания с большим приоритетом. При равном приоритете задания разных
+    видеофайлов чередуются: каждому заданию назначается очередь (виртуальное время) на единицу
+    позже предыдущего задания того же видеофайла, поэтому тысячи заданий одного видеофайла
+    не задерживают единственное задание другого.
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[int, int, int, ExtractionJob]] = []
+        # последняя назначенная очередь для видеофайлов с заданиями в очереди
+        self._last_turn: Dict[str, int] = {}
+        self._virtual_time = 0
+        self._sequence = itertools.count()
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, job: ExtractionJob) -> None:
+        with self._condition:
+            turn = max(self._virtual_time, self._last_turn.get(job.video_file_name, -1) + 1)
+            self._last_turn[job.video_file_name] = turn
+            heapq.heappush(self._heap, (-job.priority, turn, next(self._sequence), job))
+            self._condition.notify()
+
+    def pop(self, timeout: Optional[float] = None) -> Optional[ExtractionJob]:
+        """Возвращает следующее задание, ожидая его появления.
+
+        Args:
+            timeout: Время ожидания в секундах (None - без ограничения).
+
+        Returns:
+            Задание или None, если очередь закрыта или время ожидания истекло.
+        """
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._heap or self._closed, timeout) or self._closed:
+                return None
+            (_, turn, _, job) = heapq.heappop(self._heap)
+            self._virtual_time = max(self._virtual_time, turn)
+            if self._last_turn.get(job.video_file_name, turn) < self._virtual_time:
+                del self._last_turn[job.video_file_name]
+            return job
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+def execute_extraction_job(job: ExtractionJob, progress: Callable[[int], None]) -> List[str]:
+    """Функция для извлечения и сохранения кадров задания с отчётом о прогрессе.
+
+    Как и /api/frames, возвращает ранее извлечённые кадры и кадры видеофайла с тем же
+    содержимым без декодирования. Кадры декодируются по одному и сразу передаются на запись,
+    поэтому число кадров задания не ограничено памятью. Видеофайл открывается вне пула,
+    поэтому длительное задание не занимает копии видеофайла, используемые запросами.
+
+    Args:
+        job: Задание.
+        progress: Функция, получающая число декодированных кадров.
+
+    Returns:
+        Пути к файлам с кадрами.
+
+    Raises:
+        FramesExtractionError: Кадры не удалось извлечь или сохранить.
+    """
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, job.video_file_name)
+    frames_cache = get_frames_cache()
+    frame_dir = frames_cache.frame_dir(job.video_file_name)
+    ext = frame_extension(job.frame_format)
+    frame_paths = frames_cache.get(
+        job.video_file_name, frames_cache.make_key(video_path, job.first_frame, job.count, ext, job.size)
+    )
+    if frame_paths is not None:
+        return frame_paths
+
+    names = [frame_file_name(job.first_frame + i, ext, job.size) for i in range(job.count)]
+    with frames_cache.writing(job.video_file_name):
+        digest = get_video_digest(job.video_file_name, video_path)
+        storage = get_frame_storage()
+        if digest is None or not storage.link_frames(digest, frame_dir, names):
+            make_frame_dir(frame_dir)
+            writer = FrameWriter(encode_params(job.frame_format))
+            try:
+                frames = iter_frames(video_path, job.first_frame, job.count, dedicated=True)
+                for (i, (frame_number, frame)) in enumerate(frames, 1):
+                    frame_path = os.path.join(frame_dir, frame_file_name(frame_number, ext, job.size))
+                    writer.submit(frame, frame_path, job.size)
+                    progress(i)
+            finally:
+                writer.close()
+            if digest is not None:
+                storage.store_frames(digest, frame_dir, names)
+    frames_cache.put(job.video_file_name)
+    return [os.path.join(frame_dir, x) for x in names]
+
+
+class _ProgressWriter():
+    """Сохраняет в БД число декодированных кадров задания не чаще одного раза в interval секунд.
+    """
+    def __init__(self, job_id: str, interval: float) -> None:
+        self.job_id = job_id
+        self.interval = interval
+        self._last_write = time.monotonic()
+
+    def __call__(self, frames_decoded: int) -> None:
+        now = time.monotonic()
+        if now - self._last_write < self.interval:
+            return
+        self._last_write = now
+        with engine.begin() as conn:
+            conn.execute(
+                update(extraction_jobs)
+                .where(extraction_jobs.c.job_id == self.job_id)
+                .values(frames_decoded=frames_decoded, updated_at=time.time())
+            )
+
+
+class JobRunner():
+    """Выполняет задания извлечения кадров в ограниченном пуле потоков.
+
+    Состояние заданий хранится в таблице extraction_job. Задание выполняется только после того,
+    как поток пула перевёл его из состояния queued в running, поэтому при нескольких процессах
+    приложения задание выполняется один раз. Потоки пула не занимают пул обработчиков
+    /api/frames и выполняют задания и в режиме DECODE_WORKERS_MODE=process.
+
+    Attributes:
+        workers: Число потоков, одновременно выполняющих задания.
+        queue_limit: Максимальное число заданий в очереди.
+        progress_interval: Минимальный интервал в секундах между сохранениями прогресса.
+        stale_timeout: Время в секундах без обновления прогресса, после которого выполняемое
+            задание считается прерванным и при запуске приложения ставится в очередь заново.
+    """
+    workers: int
+    queue_limit: int
+    progress_interval: float
+    stale_timeout: float
+
+    def __init__(
+            self,
+            workers: int,
+            queue_limit: int,
+            progress_interval: float = 0.5,
+            stale_timeout: float = 60
+    ) -> None:
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.progress_interval = progress_interval
+        self.stale_timeout = stale_timeout
+        self._scheduler = JobScheduler()
+        self._running = 0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f'extraction-job-{i}', daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def queued(self) -> int:
+        return len(self._scheduler)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def is_full(self) -> bool:
+        return self.queued >= self.queue_limit
+
+    def submit(self, job: ExtractionJob) -> None:
+        """Ставит в очередь задание, уже сохранённое в БД в состоянии queued.
+        """
+        self._scheduler.push(job)
+
+    def recover(self) -> int:
+        """Ставит в очередь невыполненные задания из БД, в том числе прерванные остановкой приложения.
+
+        Returns:
+            Число заданий, поставленных в очередь.
+        """
+        with engine.begin() as conn:
+            conn.execute(
+                update(extraction_jobs)
+                .where(extraction_jobs.c.status == RUNNING_STATUS)
+                .where(extraction_jobs.c.updated_at < time.time() - self.stale_timeout)
+                .values(status=QUEUED_STATUS, frames_decoded=0, updated_at=time.time())
+            )
+            rows = conn.execute(
+                select(extraction_jobs)
+                .where(extraction_jobs.c.status == QUEUED_STATUS)
+                .order_by(extraction_jobs.c.created_at)
+            ).all()
+        for row in rows:
+            self.submit(job_from_row(row))
+        return len(rows)
+
+    def stop(self) -> None:
+        """Прекращает выдачу заданий потокам. Выполняемые задания завершаются, задания из очереди
+        остаются в БД в состоянии queued.
+        """
+        self._scheduler.close()
+
+    def _work(self) -> None:
+        while True:
+            job = self._scheduler.pop()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            except SQLAlchemyError:
+                # состояние задания не сохранено, прерванное задание повторяется при запуске приложения
+                pass
+
+    def _run(self, job: ExtractionJob) -> None:
+        if not self._claim(job.job_id):
+            return
+        with self._lock:
+            self._running += 1
+        try:
+            try:
+                frame_paths = execute_extraction_job(job, _ProgressWriter(job.job_id, self.progress_interval))
+            except FramesExtractionError as err:
+                self._finish(job.job_id, status=FAILED_STATUS, error=str(err))
+            except Exception:
+                self._finish(job.job_id, status=FAILED_STATUS, error='Something went wrong')
+            else:
+                self._finish(job.job_id, status=DONE_STATUS, frames_decoded=job.count, frame_paths=frame_paths)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _claim(self, job_id: str) -> bool:
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(extraction_jobs)
+                .where(extraction_jobs.c.job_id == job_id)
+                .where(extraction_jobs.c.status == QUEUED_STATUS)
+                .values(status=RUNNING_STATUS, updated_at=time.time())
+            )
+            return result.rowcount == 1
+
+    def _finish(self, job_id: str, **values: object) -> None:
+        with engine.begin() as conn:
+            conn.execute(
+                update(extraction_jobs)
+                .where(extraction_jobs.c.job_id == job_id)
+                .values(updated_at=time.time(), **values)
+            )
+
+
+_job_runner: Optional[JobRunner] = None
+_init_lock = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """Возвращает общий пул выполнения заданий, создавая его при первом обращении.
+    """
+    global _job_runner
+    with _init_lock:
+        if _job_runner is None:
+            config = get_settings()
+            _job_runner = JobRunner(
+                config.fastAPI.JOB_WORKERS,
+                config.fastAPI.JOB_QUEUE_LIMIT,
+                progress_interval=config.fastAPI.JOB_PROGRESS_INTERVAL,
+                stale_timeout=config.fastAPI.JOB_STALE_TIMEOUT,
+            )
+        return _job_runner
+
+
+def current_job_runner() -> Optional[JobRunner]:
+    """Возвращает общий пул выполнения заданий, не создавая его.
+
+    Returns:
+        Пул или None, если он ещё не создан или уже остановлен.
+    """
+    return _job_runner
+
+
+def start_job_runner() -> None:
+    """Запускает пул выполнения заданий и ставит в очередь невыполненные задания из БД.
+    """
+    try:
+        get_job_runner().recover()
+    except SQLAlchemyError:
+        # таблица ещё не создана или БД недоступна, новые задания выполняются
+        pass
+
+
+def stop_job_runner() -> None:
+    """Останавливает общий пул выполнения заданий, если он был создан.
+    """
+    global _job_runner
+    with _init_lock:
+        if _job_runner is not None:
+            _job_runner.stop()
+            _job_runner = None
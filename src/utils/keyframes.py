@@ -0,0 +1,337 @@
+import glob
+import hashlib
+import io
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from src.utils.config import get_settings
+from src.utils.save_frames import write_file_atomic
+from src.utils.video_capture import video_file_key
+
+
+# контейнеры MP4, внутри которых ищутся таблицы сэмплов видеодорожки
+_CONTAINER_BOXES = {b'moov', b'trak', b'mdia', b'minf', b'stbl'}
+# версия формата файлов индекса, входит в имя файла
+_INDEX_FORMAT_VERSION = 2
+
+
+class KeyframeIndex():
+    """Индекс ключевых кадров видеофайла.
+
+    Хранит по строке на ключевой кадр: номер кадра в порядке показа, смещение сэмпла
+    в файле в байтах и время показа (pts) в микросекундах от первого кадра. Строки упорядочены
+    по номеру кадра.
+
+    Attributes:
+        entries: Массив int64 размером (число ключевых кадров, 3).
+    """
+    entries: np.ndarray
+
+    FRAME_NUMBER = 0
+    BYTE_OFFSET = 1
+    PTS = 2
+
+    def __init__(self, entries: np.ndarray) -> None:
+        self.entries = entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def preceding_keyframe(self, frame_number: int) -> Optional[int]:
+        """Возвращает номер ближайшего ключевого кадра, не следующего за указанным кадром.
+
+        Args:
+            frame_number: Номер кадра.
+
+        Returns:
+            Номер ключевого кадра или None, если кадр предшествует первому ключевому кадру.
+        """
+        frame_numbers = self.entries[:, self.FRAME_NUMBER]
+        i = int(np.searchsorted(frame_numbers, frame_number, side='right')) - 1
+        if i < 0:
+            return None
+        return int(frame_numbers[i])
+
+    def frame_at_time(self, time_us: int, fps: float) -> int:
+        """Возвращает номер кадра, показываемого в указанное время.
+
+        Время отсчитывается от времени показа ближайшего предшествующего ключевого кадра,
+        поэтому погрешность частоты кадров не накапливается от начала видеофайла.
+
+        Args:
+            time_us: Время от начала видеофайла в микросекундах.
+            fps: Частота кадров.
+        """
+        pts = self.entries[:, self.PTS]
+        i = int(np.searchsorted(pts, time_us, side='right')) - 1
+        if i < 0:
+            return frames_in_duration(time_us, fps)
+        return int(self.entries[i, self.FRAME_NUMBER]) + frames_in_duration(time_us - int(pts[i]), fps)
+
+    def save(self, path: str) -> None:
+        """Сохраняет индекс в файл формата .npy.
+        """
+        buffer = io.BytesIO()
+        np.save(buffer, np.ascontiguousarray(self.entries, dtype=np.int64))
+        write_file_atomic(path, buffer.getvalue())
+
+    @classmethod
+    def load(cls, path: str) -> 'KeyframeIndex':
+        """Загружает индекс из файла формата .npy, отображая его в память.
+        """
+        return cls(np.load(path, mmap_mode='r'))
+
+
+class KeyframeIndexStore():
+    """Хранилище индексов ключевых кадров: в памяти (LRU) и в файлах .npy на диске.
+
+    Индекс строится при первом обращении к видеофайлу разбором таблиц сэмплов MP4.
+    Имя файла индекса содержит время изменения и размер видеофайла, поэтому после изменения
+    видеофайла индекс строится заново. Для видеофайлов, которые не удалось разобрать,
+    индекс не строится.
+
+    Attributes:
+        index_dir_path: Каталог с файлами индексов.
+        max_size: Число индексов в памяти.
+    """
+    index_dir_path: str
+    max_size: int
+
+    def __init__(self, index_dir_path: str, max_size: int) -> None:
+        self.index_dir_path = index_dir_path
+        self.max_size = max_size
+        self._items: 'OrderedDict[Tuple[str, int, int], Optional[KeyframeIndex]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_path: str) -> Optional[KeyframeIndex]:
+        """Возвращает индекс ключевых кадров видеофайла, строя его при необходимости.
+
+        Args:
+            video_path: Полный путь к видеофайлу.
+
+        Returns:
+            Индекс или None, если видеофайл не удалось разобрать.
+        """
+        key = video_file_key(video_path)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+        index = self._load_or_build(key)
+        with self._lock:
+            self._items[key] = index
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+        return index
+
+    def index_path(self, key: Tuple[str, int, int]) -> str:
+        video_path, mtime_ns, size = key
+        digest = hashlib.sha1(video_path.encode()).hexdigest()
+        return os.path.join(self.index_dir_path, f'{digest}-{mtime_ns}-{size}-v{_INDEX_FORMAT_VERSION}.npy')
+
+    def _load_or_build(self, key: Tuple[str, int, int]) -> Optional[KeyframeIndex]:
+        path = self.index_path(key)
+        if os.path.isfile(path):
+            return KeyframeIndex.load(path)
+
+        entries = build_keyframe_entries(key[0])
+        if entries is None or len(entries) == 0:
+            return None
+        index = KeyframeIndex(entries)
+        try:
+            os.makedirs(self.index_dir_path, exist_ok=True)
+            # индексы предыдущих версий видеофайла и формата больше не нужны
+            digest = os.path.basename(path).split('-', 1)[0]
+            for stale_path in glob.glob(os.path.join(self.index_dir_path, f'{digest}-*.npy')):
+                os.remove(stale_path)
+            index.save(path)
+        except OSError:
+            # индекс остаётся только в памяти
+            pass
+        return index
+
+
+def build_keyframe_entries(video_path: str) -> Optional[np.ndarray]:
+    """Строит индекс ключевых кадров по таблицам сэмплов первой видеодорожки MP4.
+
+    Номер кадра ключевого сэмпла - его позиция среди всех сэмплов, упорядоченных по времени
+    показа (декодирование и показ кадров с B-кадрами идут в разном порядке). Время показа
+    отсчитывается от первого кадра, как в OpenCV. Списки редактирования (elst) не учитываются.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+
+    Returns:
+        Массив строк (номер кадра, смещение в байтах, время показа) или None,
+        если файл не является MP4 или не содержит видеодорожки.
+    """
+    try:
+        with open(video_path, 'rb') as file:
+            moov = _read_top_level_box(file, b'moov')
+        if moov is None:
+            return None
+        for trak in _iter_child_boxes(moov, b'trak'):
+            tables = _collect_boxes(trak)
+            if tables.get(b'hdlr', b'')[8:12] == b'vide':
+                return _keyframe_entries(tables)
+    except (OSError, struct.error, ValueError, IndexError):
+        # повреждённые таблицы: номера кадров вычисляются по частоте кадров или последовательным чтением
+        return None
+    return None
+
+
+def _read_top_level_box(file: io.BufferedReader, box_type: bytes) -> Optional[bytes]:
+    """Читает содержимое box верхнего уровня, пропуская остальные (в том числе mdat) без чтения.
+    """
+    file_size = os.fstat(file.fileno()).st_size
+    position = 0
+    while position + 8 <= file_size:
+        file.seek(position)
+        size, current_type = struct.unpack('>I4s', file.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack('>Q', file.read(8))[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - position
+        if size < header_size:
+            return None
+        if current_type == box_type:
+            return file.read(size - header_size)
+        position += size
+    return None
+
+
+def _iter_boxes(data: bytes) -> Iterator[Tuple[bytes, bytes]]:
+    position = 0
+    while position + 8 <= len(data):
+        size, box_type = struct.unpack_from('>I4s', data, position)
+        header_size = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, position + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = len(data) - position
+        if size < header_size:
+            return
+        yield box_type, data[position + header_size:position + size]
+        position += size
+
+
+def _iter_child_boxes(data: bytes, box_type: bytes) -> Iterator[bytes]:
+    for (current_type, payload) in _iter_boxes(data):
+        if current_type == box_type:
+            yield payload
+
+
+def _collect_boxes(data: bytes) -> Dict[bytes, bytes]:
+    """Собирает содержимое вложенных box дорожки по типу, спускаясь в контейнеры.
+    """
+    boxes = {}
+    for (box_type, payload) in _iter_boxes(data):
+        if box_type in _CONTAINER_BOXES:
+            boxes.update(_collect_boxes(payload))
+        else:
+            boxes.setdefault(box_type, payload)
+    return boxes
+
+
+def _full_box_table(payload: bytes, columns: int, fmt: str = '>I') -> np.ndarray:
+    """Читает таблицу из full box: версия и флаги, число строк и строки по columns значений.
+    """
+    count = struct.unpack_from('>I', payload, 4)[0]
+    dtype = np.dtype(fmt)
+    values = np.frombuffer(payload, dtype=dtype, count=count * columns, offset=8)
+    return values.astype(np.int64).reshape(count, columns)
+
+
+def _keyframe_entries(tables: Dict[bytes, bytes]) -> Optional[np.ndarray]:
+    if b'stts' not in tables or b'stsz' not in tables or b'stsc' not in tables or b'mdhd' not in tables:
+        return None
+    mdhd = tables[b'mdhd']
+    timescale = struct.unpack_from('>I', mdhd, 20 if mdhd[0] == 1 else 12)[0]
+    if timescale == 0:
+        return None
+
+    # время декодирования и показа каждого сэмпла
+    stts = _full_box_table(tables[b'stts'], 2)
+    dts = np.concatenate([[0], np.cumsum(np.repeat(stts[:, 1], stts[:, 0]))[:-1]])
+    pts = dts
+    if b'ctts' in tables:
+        version = tables[b'ctts'][0]
+        ctts = _full_box_table(tables[b'ctts'], 2, '>i' if version == 1 else '>I')
+        pts = dts + np.repeat(ctts[:, 1], ctts[:, 0])[:len(dts)]
+    sample_count = len(dts)
+
+    # размеры сэмплов и смещения от начала файла
+    stsz = tables[b'stsz']
+    sample_size, stsz_count = struct.unpack_from('>II', stsz, 4)
+    if sample_size:
+        sizes = np.full(stsz_count, sample_size, dtype=np.int64)
+    else:
+        sizes = np.frombuffer(stsz, dtype='>u4', count=stsz_count, offset=12).astype(np.int64)
+    if b'co64' in tables:
+        chunk_offsets = _full_box_table(tables[b'co64'], 1, '>Q')[:, 0]
+    elif b'stco' in tables:
+        chunk_offsets = _full_box_table(tables[b'stco'], 1)[:, 0]
+    else:
+        return None
+    stsc = _full_box_table(tables[b'stsc'], 3)
+    chunk_count = len(chunk_offsets)
+    first_chunks = np.append(stsc[:, 0] - 1, chunk_count)
+    samples_per_chunk = np.repeat(stsc[:, 1], np.diff(first_chunks))
+    sample_chunks = np.repeat(np.arange(chunk_count), samples_per_chunk)
+    sample_count = min(sample_count, len(sizes), len(sample_chunks))
+    sizes = sizes[:sample_count]
+    sample_chunks = sample_chunks[:sample_count]
+    size_before = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    chunk_first_sample = np.concatenate([[0], np.cumsum(samples_per_chunk)[:-1]])
+    offsets = chunk_offsets[sample_chunks] + size_before - size_before[chunk_first_sample[sample_chunks]]
+
+    # номер кадра в порядке показа
+    pts = pts[:sample_count]
+    frame_numbers = np.empty(sample_count, dtype=np.int64)
+    frame_numbers[np.argsort(pts, kind='stable')] = np.arange(sample_count)
+
+    if b'stss' in tables:
+        keyframes = _full_box_table(tables[b'stss'], 1)[:, 0] - 1
+        keyframes = keyframes[(keyframes >= 0) & (keyframes < sample_count)]
+    else:
+        # без таблицы stss все сэмплы являются ключевыми
+        keyframes = np.arange(sample_count)
+
+    pts_us = np.round((pts - pts.min()) * 1_000_000 / timescale).astype(np.int64)
+    entries = np.stack([frame_numbers[keyframes], offsets[keyframes], pts_us[keyframes]], axis=1)
+    return entries[np.argsort(entries[:, KeyframeIndex.FRAME_NUMBER], kind='stable')]
+
+
+def frames_in_duration(duration_us: int, fps: float) -> int:
+    """Возвращает число кадров, показ которых начинается раньше указанного времени
+    при постоянной частоте кадров (смещение кадра, показываемого в это время).
+    """
+    # допуск компенсирует погрешность дробной частоты кадров (например 30000/1001)
+    return int(duration_us * fps / 1_000_000 + 1e-6)
+
+
+_keyframe_index_store: Optional[KeyframeIndexStore] = None
+_init_lock = threading.Lock()
+
+
+def get_keyframe_index_store() -> KeyframeIndexStore:
+    """Возвращает общее хранилище индексов ключевых кадров, создавая его при первом обращении.
+    """
+    global _keyframe_index_store
+    with _init_lock:
+        if _keyframe_index_store is None:
+            config = get_settings()
+            _keyframe_index_store = KeyframeIndexStore(
+                config.fastAPI.KEYFRAME_INDEX_DIR_PATH,
+                config.fastAPI.KEYFRAME_INDEX_CACHE_SIZE
+            )
+        return _keyframe_index_store
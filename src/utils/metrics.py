@@ -0,0 +1,358 @@
+import asyncio
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+
+# этапы обработки запросов, время которых измеряется гистограммой stage_seconds
+OPEN_CAPTURE_STAGE = 'open_capture'
+PROBE_STAGE = 'probe'
+SEEK_STAGE = 'seek'
+SCAN_STAGE = 'scan'
+DECODE_STAGE = 'decode'
+RESIZE_STAGE = 'resize'
+ENCODE_STAGE = 'encode'
+WRITE_STAGE = 'write'
+DB_EXECUTE_STAGE = 'db_execute'
+
+# границы интервалов гистограмм в секундах: от декодирования одного кадра до обработки запроса
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+F = TypeVar('F', bound=Callable[..., Any])
+M = TypeVar('M', bound='Metric')
+
+
+class Metric():
+    """Метрика в текстовом формате Prometheus.
+
+    Значения метрики хранятся отдельно для каждого набора значений меток.
+
+    Attributes:
+        name: Имя метрики.
+        documentation: Описание метрики.
+        labelnames: Имена меток.
+    """
+    kind = 'untyped'
+    name: str
+    documentation: str
+    labelnames: Tuple[str, ...]
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        """Возвращает строки метрики в текстовом формате Prometheus.
+        """
+        lines = [
+            f'# HELP {self.name} {_escape_help(self.documentation)}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+    def _label_values(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if not labels and not self.labelnames:
+            return ()
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple([str(labels[x]) for x in self.labelnames])
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Монотонно возрастающий счётчик.
+    """
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Увеличивает счётчик.
+
+        Args:
+            amount: Неотрицательное приращение.
+            labels: Значения меток.
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for (key, value) in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    """Значение, которое может как увеличиваться, так и уменьшаться.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for (key, value) in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """Распределение значений (как правило, длительностей в секундах) по интервалам.
+
+    Attributes:
+        buckets: Верхние границы интервалов в порядке возрастания.
+    """
+    kind = 'histogram'
+    buckets: Tuple[float, ...]
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: Sequence[str] = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # для каждого набора меток: число значений в каждом интервале (последний - выше всех границ) и сумма
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Учитывает значение.
+
+        Args:
+            value: Значение.
+            labels: Значения меток.
+        """
+        self._observe(self._label_values(labels), value)
+
+    def count(self, **labels: Any) -> int:
+        entry = self._values.get(self._label_values(labels))
+        return sum(entry[0]) if entry is not None else 0
+
+    def time(self, **labels: Any) -> 'Timer':
+        """Возвращает таймер, записывающий в гистограмму время выполнения блока with или функции.
+        """
+        return Timer(self, labels)
+
+    def _observe(self, key: Tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = ([0] * (len(self.buckets) + 1), [0.0])
+                self._values[key] = entry
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for (key, (counts, total)) in self._values.items():
+            cumulative = 0
+            for (bound, count) in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames + ('le',), key + (_format_value(bound),))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total[0])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class Timer():
+    """Измеряет время выполнения блока with или декорированной функции и записывает его в гистограмму.
+
+    Экземпляр, использованный как декоратор, создаёт отдельный таймер для каждого вызова,
+    поэтому функция может выполняться одновременно в нескольких потоках. Асинхронные функции
+    измеряются до завершения сопрограммы.
+
+    Attributes:
+        histogram: Гистограмма.
+        labels: Значения меток.
+    """
+    __slots__ = ('histogram', 'labels', '_key', '_start')
+    histogram: Histogram
+    labels: Dict[str, Any]
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]) -> None:
+        self.histogram = histogram
+        self.labels = labels
+        self._key = histogram._label_values(labels)
+        self._start = 0.0
+
+    def __enter__(self) -> 'Timer':
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.histogram._observe(self._key, time.perf_counter() - self._start)
+
+    def __call__(self, fn: F) -> F:
+        histogram = self.histogram
+        labels = self.labels
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with Timer(histogram, labels):
+                    return await fn(*args, **kwargs)
+            return async_wrapper  # type: ignore[return-value]
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with Timer(histogram, labels):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+
+
+class MetricsRegistry():
+    """Набор метрик процесса.
+
+    Кроме постоянных метрик, при каждом считывании вызываются сборщики: они возвращают метрики,
+    построенные по счётчикам пулов и кешей на момент считывания.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: M) -> M:
+        with self._lock:
+            if any(x.name == metric.name for x in self._metrics):
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Возвращает все метрики в текстовом формате Prometheus.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for collector in collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not labelnames:
+        return ''
+    pairs = ','.join(f'{name}="{_escape_label(value)}"' for (name, value) in zip(labelnames, values))
+    return '{' + pairs + '}'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(Histogram(
+    'frame_service_stage_seconds',
+    'Time spent in frame extraction stages.',
+    ['stage'],
+))
+function_seconds = registry.register(Histogram(
+    'frame_service_function_seconds',
+    'Time spent in instrumented functions and route handlers.',
+    ['function'],
+))
+frames_decoded = registry.register(Counter(
+    'frame_service_frames_decoded_total',
+    'Frames decoded by OpenCV, including frames skipped while scanning to a requested frame.',
+))
+frames_kept = registry.register(Counter(
+    'frame_service_frames_kept_total',
+    'Decoded frames returned to callers.',
+))
+bytes_written = registry.register(Counter(
+    'frame_service_frame_bytes_written_total',
+    'Bytes of encoded frames written to files.',
+))
+frames_deduplicated = registry.register(Counter(
+    'frame_service_frames_deduplicated_total',
+    'Frames linked from the content-addressed frame storage instead of being decoded.',
+))
+decode_pool_rejected = registry.register(Counter(
+    'frame_service_decode_pool_rejected_total',
+    'Tasks rejected because every decode worker was busy and the queue was full.',
+))
+
+
+def timed(stage: str) -> Timer:
+    """Возвращает таймер этапа обработки: контекстный менеджер или декоратор.
+
+    Время записывается в гистограмму frame_service_stage_seconds. Накладные расходы -
+    два вызова perf_counter и захват блокировки гистограммы, что на порядки меньше
+    декодирования или кодирования одного кадра.
+
+    Args:
+        stage: Этап обработки, например DECODE_STAGE.
+    """
+    return Timer(stage_seconds, {'stage': stage})
+
+
+def timed_function(fn: Optional[F] = None, *, name: Optional[str] = None) -> Any:
+    """Декоратор, записывающий время выполнения функции в гистограмму frame_service_function_seconds.
+
+    Подходит и для обработчиков маршрутов FastAPI: сигнатура функции сохраняется.
+
+    Args:
+        fn: Декорируемая функция.
+        name: Значение метки function (по умолчанию имя функции).
+    """
+    def decorate(fn: F) -> F:
+        return Timer(function_seconds, {'function': name or fn.__name__})(fn)
+
+    if fn is not None:
+        return decorate(fn)
+    return decorate
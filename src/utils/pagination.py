@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from typing import Any, List
+
+
+class InvalidCursor(ValueError):
+    """Курсор постраничной выборки повреждён или создан для другой выборки.
+    """
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Кодирует значения ключа последней выданной записи в непрозрачный курсор.
+
+    Args:
+        values: Значения полей ключа сортировки, сериализуемые в JSON.
+
+    Returns:
+        Строка base64url без символов выравнивания.
+    """
+    data = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str, types: List[type]) -> List[Any]:
+    """Декодирует курсор и проверяет типы значений ключа.
+
+    Args:
+        cursor: Курсор, полученный из encode_cursor.
+        types: Ожидаемые типы значений ключа.
+
+    Returns:
+        Значения полей ключа сортировки.
+
+    Raises:
+        InvalidCursor: Курсор не удалось декодировать или значения имеют неверные типы.
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError) as err:
+        raise InvalidCursor(cursor) from err
+    if (
+        not isinstance(values, list) or len(values) != len(types)
+        # bool является подклассом int, но не может быть значением ключа
+        or any(type(value) is not type_ for (value, type_) in zip(values, types))
+    ):
+        raise InvalidCursor(cursor)
+    return values
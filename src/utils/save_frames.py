@@ -0,0 +1,353 @@
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Sequence, Set, Tuple, Union, TYPE_CHECKING
+
+import cv2
+
+from src.utils.config import get_settings
+from src.utils.metrics import ENCODE_STAGE, RESIZE_STAGE, WRITE_STAGE, bytes_written, timed
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+
+_encode_executor: Optional[ThreadPoolExecutor] = None
+_init_lock = threading.Lock()
+
+
+def get_encode_executor() -> ThreadPoolExecutor:
+    """Возвращает общий пул потоков для кодирования и записи кадров, создавая его при первом обращении.
+
+    OpenCV освобождает GIL на время кодирования, поэтому кадры кодируются параллельно.
+    """
+    global _encode_executor
+    with _init_lock:
+        if _encode_executor is None:
+            _encode_executor = ThreadPoolExecutor(
+                get_settings().fastAPI.ENCODE_WORKERS, thread_name_prefix='encode'
+            )
+        return _encode_executor
+
+
+# поддерживаемые форматы кадров и расширения их файлов
+FRAME_FORMATS = {
+    'png': 'png',
+    'jpeg': 'jpg',
+    'webp': 'webp',
+}
+FRAME_FORMAT_PATTERN = '^(png|jpeg|webp)$'
+
+# способы интерполяции при уменьшении кадров
+RESIZE_INTERPOLATIONS = {
+    'nearest': cv2.INTER_NEAREST,
+    'linear': cv2.INTER_LINEAR,
+    'area': cv2.INTER_AREA,
+}
+
+# ширина и высота кадра
+FrameSize = Tuple[int, int]
+
+# имя файла с кадром: <номер>.<расширение> или <номер>_<ширина>x<высота>.<расширение>
+_FRAME_FILE_NAME_RE = re.compile(r'^(\d+)(?:_(\d+)x(\d+))?\.(\w+)$')
+
+
+def frame_extension(frame_format: str) -> str:
+    """Возвращает расширение файлов с кадрами указанного формата.
+    """
+    return FRAME_FORMATS[frame_format]
+
+
+def frame_media_type(frame_format: str) -> str:
+    """Возвращает MIME-тип кадров указанного формата.
+    """
+    return f'image/{frame_format}'
+
+
+def default_frame_format(width: int, height: int) -> str:
+    """Возвращает формат кадров по умолчанию с учётом их размера.
+
+    Для кадров больше LARGE_FRAME_PIXELS пикселей используется FRAME_FORMAT_LARGE, если он задан.
+
+    Args:
+        width: Ширина кадра.
+        height: Высота кадра.
+    """
+    config = get_settings().fastAPI
+    if config.FRAME_FORMAT_LARGE and width * height > config.LARGE_FRAME_PIXELS:
+        return config.FRAME_FORMAT_LARGE
+    return config.FRAME_FORMAT
+
+
+def fit_frame_size(
+        width: int,
+        height: int,
+        max_width: Optional[int] = None,
+        max_height: Optional[int] = None,
+        max_side: Optional[int] = None
+) -> Optional[FrameSize]:
+    """Возвращает размер кадра, уменьшенного с сохранением пропорций до указанных ограничений.
+
+    Кадры не увеличиваются.
+
+    Args:
+        width: Ширина кадра.
+        height: Высота кадра.
+        max_width: Максимальная ширина.
+        max_height: Максимальная высота.
+        max_side: Максимальный размер наибольшей стороны.
+
+    Returns:
+        Ширина и высота уменьшенного кадра или None, если кадр уменьшать не нужно.
+    """
+    if width <= 0 or height <= 0:
+        return None
+    scale = 1.0
+    if max_width is not None:
+        scale = min(scale, max_width / width)
+    if max_height is not None:
+        scale = min(scale, max_height / height)
+    if max_side is not None:
+        scale = min(scale, max_side / max(width, height))
+    if scale >= 1:
+        return None
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+@timed(RESIZE_STAGE)
+def resize_frame(frame: 'ndarray', size: FrameSize) -> 'ndarray':
+    """Уменьшает кадр до указанного размера способом интерполяции RESIZE_INTERPOLATION.
+    """
+    interpolation = RESIZE_INTERPOLATIONS[get_settings().fastAPI.RESIZE_INTERPOLATION]
+    return cv2.resize(frame, size, interpolation=interpolation)
+
+
+def frame_file_name(frame_number: int, ext: str, size: Optional[FrameSize] = None) -> str:
+    """Возвращает имя файла с кадром исходного размера или уменьшенной копией кадра.
+    """
+    if size is None:
+        return f'{frame_number}.{ext}'
+    return f'{frame_number}_{size[0]}x{size[1]}.{ext}'
+
+
+def parse_frame_file_name(file_name: str) -> Optional[Tuple[int, Optional[FrameSize], str]]:
+    """Разбирает имя файла с кадром.
+
+    Returns:
+        Номер кадра, размер уменьшенной копии (None - исходный размер) и расширение
+        или None, если имя не является именем файла с кадром.
+    """
+    match = _FRAME_FILE_NAME_RE.match(file_name)
+    if match is None:
+        return None
+    frame_number, width, height, ext = match.groups()
+    size = (int(width), int(height)) if width is not None else None
+    return int(frame_number), size, ext
+
+
+def encode_params(frame_format: str = 'png') -> List[int]:
+    """Возвращает параметры кодирования кадров указанного формата из конфигурационного файла.
+    """
+    config = get_settings().fastAPI
+    if frame_format == 'jpeg':
+        return [cv2.IMWRITE_JPEG_QUALITY, config.JPEG_QUALITY]
+    if frame_format == 'webp':
+        # качество больше 100 включает сжатие без потерь
+        quality = 101 if config.WEBP_LOSSLESS else config.WEBP_QUALITY
+        return [cv2.IMWRITE_WEBP_QUALITY, quality]
+    return [cv2.IMWRITE_PNG_COMPRESSION, config.PNG_COMPRESSION]
+
+
+def write_frames(frames: Sequence['ndarray'], frame_paths: Sequence[str], params: Sequence[int] = ()) -> None:
+    """Функция для параллельного кодирования и записи кадров в файлы.
+
+    Каждый файл записывается атомарно: во временный файл в том же каталоге с последующим
+    переименованием. Функция завершается только после сброса на диск всех файлов и каталога.
+
+    Args:
+        frames: Кадры.
+        frame_paths: Пути к файлам с кадрами, формат определяется расширением.
+        params: Параметры кодирования cv2.imencode.
+
+    Raises:
+        OSError: Кадр не удалось закодировать или записать.
+    """
+    writer = FrameWriter(params)
+    for (frame, frame_path) in zip(frames, frame_paths):
+        writer.submit(frame, frame_path)
+    writer.close()
+
+
+class FrameWriter():
+    """Параллельное кодирование и запись кадров по мере их поступления.
+
+    Число кадров, ожидающих записи, ограничено, чтобы при декодировании быстрее записи
+    кадры не накапливались в памяти: submit ждёт освобождения места.
+
+    Attributes:
+        params: Параметры кодирования cv2.imencode.
+    """
+    params: Sequence[int]
+
+    def __init__(self, params: Sequence[int] = (), max_pending: Optional[int] = None) -> None:
+        self.params = params
+        self._executor = get_encode_executor()
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * get_settings().fastAPI.ENCODE_WORKERS)
+        self._futures: List[Future] = []
+        self._dirs: Set[str] = set()
+
+    def submit(self, frame: 'ndarray', frame_path: str, size: Optional[FrameSize] = None) -> None:
+        """Ставит кадр в очередь на запись.
+
+        Args:
+            frame: Кадр.
+            frame_path: Путь к файлу с кадром, формат определяется расширением.
+            size: Размер, до которого кадр уменьшается перед кодированием (None - исходный размер).
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(write_frame, frame, frame_path, self.params, size)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.append(future)
+        self._dirs.add(os.path.dirname(frame_path))
+
+    def close(self) -> None:
+        """Дожидается записи всех кадров и сбрасывает каталоги на диск.
+
+        Raises:
+            OSError: Кадр не удалось закодировать или записать.
+        """
+        for future in self._futures:
+            future.result()
+        for frame_dir in self._dirs:
+            _fsync_dir(frame_dir)
+
+
+def write_frame(
+        frame: 'ndarray',
+        frame_path: str,
+        params: Sequence[int] = (),
+        size: Optional[FrameSize] = None
+) -> None:
+    """Функция для кодирования кадра и его атомарной записи в файл.
+
+    Args:
+        frame: Кадр.
+        frame_path: Путь к файлу с кадром, формат определяется расширением.
+        params: Параметры кодирования cv2.imencode.
+        size: Размер, до которого кадр уменьшается перед кодированием (None - исходный размер).
+
+    Raises:
+        OSError: Кадр не удалось закодировать или записать.
+    """
+    if size is not None:
+        frame = resize_frame(frame, size)
+    buffer = encode_frame(frame, os.path.splitext(frame_path)[1], params)
+    write_frame_file(frame_path, buffer)
+
+
+def write_frame_file(frame_path: str, buffer: 'ndarray') -> None:
+    """Функция для атомарной записи закодированного кадра в файл с учётом в метриках.
+
+    Args:
+        frame_path: Путь к файлу с кадром.
+        buffer: Закодированное изображение.
+    """
+    with timed(WRITE_STAGE):
+        write_file_atomic(frame_path, buffer)
+    bytes_written.inc(buffer.nbytes)
+
+
+def resize_frame_files(
+        source_paths: Sequence[str],
+        frame_paths: Sequence[str],
+        size: FrameSize,
+        params: Sequence[int] = ()
+) -> None:
+    """Функция для записи уменьшенных копий ранее сохранённых кадров без декодирования видеофайла.
+
+    Файлы читаются, уменьшаются и записываются параллельно в пуле кодирования.
+
+    Args:
+        source_paths: Пути к файлам с кадрами большего размера.
+        frame_paths: Пути к файлам с уменьшенными кадрами, формат определяется расширением.
+        size: Размер уменьшенных кадров.
+        params: Параметры кодирования cv2.imencode.
+
+    Raises:
+        OSError: Кадр не удалось прочитать, закодировать или записать.
+    """
+    executor = get_encode_executor()
+    futures = [
+        executor.submit(_resize_frame_file, source_path, frame_path, size, params)
+        for (source_path, frame_path) in zip(source_paths, frame_paths)
+    ]
+    for future in futures:
+        future.result()
+    for frame_dir in {os.path.dirname(x) for x in frame_paths}:
+        _fsync_dir(frame_dir)
+
+
+def _resize_frame_file(source_path: str, frame_path: str, size: FrameSize, params: Sequence[int]) -> None:
+    frame = cv2.imread(source_path, cv2.IMREAD_COLOR)
+    if frame is None:
+        raise OSError(f'Failed to read frame {source_path}')
+    write_frame(frame, frame_path, params, size)
+
+
+@timed(ENCODE_STAGE)
+def encode_frame(frame: 'ndarray', ext: str, params: Sequence[int] = ()) -> 'ndarray':
+    """Функция для кодирования кадра в формат изображения.
+
+    Args:
+        frame: Кадр.
+        ext: Расширение файла с точкой, определяет формат.
+        params: Параметры кодирования cv2.imencode.
+
+    Returns:
+        Закодированное изображение.
+
+    Raises:
+        OSError: Кадр не удалось закодировать.
+    """
+    success, buffer = cv2.imencode(ext, frame, list(params))
+    if not success:
+        raise OSError(f'Failed to encode frame to {ext}')
+    return buffer
+
+
+def write_file_atomic(file_path: str, data: Union[bytes, 'ndarray']) -> None:
+    """Функция для атомарной записи файла: во временный файл в том же каталоге с последующим переименованием.
+
+    Args:
+        file_path: Путь к файлу.
+        data: Содержимое файла.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), prefix='.', suffix='.tmp')
+    try:
+        # mkstemp создаёт файл с правами 0600, кадры должны быть доступны для чтения как при cv2.imwrite
+        os.fchmod(fd, 0o644)
+        with os.fdopen(fd, 'wb') as file:
+            file.write(memoryview(data))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _fsync_dir(dir_path: str) -> None:
+    """Сбрасывает на диск каталог, чтобы переименования файлов в нём были сохранены.
+    """
+    fd = os.open(dir_path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
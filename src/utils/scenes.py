@@ -0,0 +1,340 @@
+import glob
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+from src.utils.config import get_settings
+from src.utils.get_frames import FramesExtractionError, iter_frame_ranges, iter_video_frames, make_frame_dir
+from src.utils.metrics import RESIZE_STAGE, timed
+from src.utils.save_frames import (
+    FrameWriter, encode_params, fit_frame_size, frame_extension, frame_file_name, write_file_atomic
+)
+from src.utils.video_capture import video_file_key
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+
+# способы оценки отличия кадра от предыдущего
+HISTOGRAM_METRIC = 'histogram'
+DIFFERENCE_METRIC = 'difference'
+METRIC_PATTERN = '^(histogram|difference)$'
+
+# число интервалов гистограммы яркости
+HISTOGRAM_BINS = 32
+# число уменьшенных кадров, оцениваемых за одну векторную операцию
+SCORE_BLOCK_FRAMES = 256
+# префикс имён файлов с оценками кадров в каталоге индексов ключевых кадров
+_SCORES_FILE_PREFIX = 'scenes'
+
+
+def histogram_scores(frames: 'ndarray', bins: int = HISTOGRAM_BINS) -> 'ndarray':
+    """Функция для оценки отличия гистограмм яркости соседних кадров.
+
+    Гистограммы всех кадров строятся одним вызовом np.bincount: к номеру интервала
+    каждого пикселя прибавляется смещение, уникальное для кадра.
+
+    Args:
+        frames: Кадры в оттенках серого формы (n, высота, ширина), тип uint8.
+        bins: Число интервалов гистограммы.
+
+    Returns:
+        n - 1 оценок от 0 (одинаковые гистограммы) до 1: половина расстояния L1
+        между нормированными гистограммами кадра и предыдущего кадра.
+    """
+    n = frames.shape[0]
+    indices = (frames.reshape(n, -1).astype(np.intp) * bins) >> 8
+    indices += np.arange(n, dtype=np.intp)[:, None] * bins
+    histograms = np.bincount(indices.ravel(), minlength=n * bins).reshape(n, bins)
+    histograms = histograms / frames[0].size
+    return 0.5 * np.abs(np.diff(histograms, axis=0)).sum(axis=1)
+
+
+def difference_scores(frames: 'ndarray') -> 'ndarray':
+    """Функция для оценки попиксельного отличия соседних кадров.
+
+    Args:
+        frames: Кадры в оттенках серого формы (n, высота, ширина), тип uint8.
+
+    Returns:
+        n - 1 оценок от 0 до 1: среднее абсолютное отличие яркости кадра от предыдущего кадра.
+    """
+    return np.abs(np.diff(frames.astype(np.int16), axis=0)).mean(axis=(1, 2)) / 255
+
+
+SCORE_FUNCTIONS: Dict[str, Callable[['ndarray'], 'ndarray']] = {
+    HISTOGRAM_METRIC: histogram_scores,
+    DIFFERENCE_METRIC: difference_scores,
+}
+
+
+def scan_scene_scores(
+        video_path: str,
+        metric: str = HISTOGRAM_METRIC,
+        step: int = 1,
+        analysis_side: int = 64
+) -> Tuple['ndarray', 'ndarray']:
+    """Функция для оценки отличия каждого кадра видеофайла от предыдущего за один проход.
+
+    Кадры уменьшаются до analysis_side пикселей по наибольшей стороне и переводятся
+    в оттенки серого, оценки вычисляются векторно для блоков по SCORE_BLOCK_FRAMES кадров,
+    поэтому в памяти находится только блок уменьшенных кадров.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        metric: Способ оценки: histogram или difference.
+        step: Оцениваются кадры с номерами, кратными step; отличие считается от предыдущего оцениваемого кадра.
+        analysis_side: Размер наибольшей стороны уменьшенных кадров.
+
+    Returns:
+        Номера оценённых кадров и их оценки от 0 до 1. Оценка первого кадра равна 1.
+
+    Raises:
+        FramesExtractionError: Видеофайл не удалось открыть или в нём нет кадров.
+    """
+    score_frames = SCORE_FUNCTIONS[metric]
+    frame_numbers: List[int] = []
+    scores: List['ndarray'] = [np.ones(1)]
+    # блок начинается с последнего кадра предыдущего блока
+    block: List['ndarray'] = []
+    for (frame_number, frame) in iter_video_frames(video_path, step):
+        size = fit_frame_size(frame.shape[1], frame.shape[0], max_side=analysis_side)
+        with timed(RESIZE_STAGE):
+            if size is not None:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            block.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+        frame_numbers.append(frame_number)
+        if len(block) > SCORE_BLOCK_FRAMES:
+            scores.append(score_frames(np.stack(block)))
+            block = block[-1:]
+
+    if not frame_numbers:
+        raise FramesExtractionError('Failed to extract frames.')
+    if len(block) > 1:
+        scores.append(score_frames(np.stack(block)))
+    return np.asarray(frame_numbers), np.concatenate(scores)
+
+
+def select_scene_frames(
+        frame_numbers: 'ndarray',
+        scores: 'ndarray',
+        count: int,
+        min_distance: int = 1
+) -> List[int]:
+    """Функция для выбора кадров с наибольшим отличием от предыдущих (границ сцен).
+
+    Кадры перебираются по убыванию оценки, кадр пропускается, если он ближе min_distance
+    кадров к уже выбранному.
+
+    Args:
+        frame_numbers: Номера кадров.
+        scores: Оценки кадров.
+        count: Число выбираемых кадров.
+        min_distance: Минимальное расстояние между выбранными кадрами.
+
+    Returns:
+        Номера выбранных кадров в порядке возрастания (не больше count).
+    """
+    selected = np.empty(0, dtype=frame_numbers.dtype)
+    for index in np.argsort(-scores, kind='stable'):
+        frame_number = frame_numbers[index]
+        if selected.size and np.abs(selected - frame_number).min() < min_distance:
+            continue
+        selected = np.append(selected, frame_number)
+        if selected.size == count:
+            break
+    return sorted(int(x) for x in selected)
+
+
+class SceneScoreStore():
+    """Хранилище оценок кадров видеофайлов в файлах .npy рядом с индексами ключевых кадров.
+
+    Оценка требует декодирования всего видеофайла, поэтому выполняется один раз для видеофайла,
+    способа оценки, шага и размера уменьшенных кадров в отдельном пуле потоков, не ограниченном
+    временем ожидания запроса: запрос, не дождавшийся оценки, может повторить её позже и получить
+    сохранённый результат. Одновременные запросы с одинаковыми параметрами ожидают одну оценку.
+    Имя файла содержит время изменения и размер видеофайла, поэтому после изменения видеофайла
+    оценки вычисляются заново.
+
+    Attributes:
+        index_dir_path: Каталог с файлами оценок.
+        workers: Число одновременно оцениваемых видеофайлов.
+    """
+    index_dir_path: str
+    workers: int
+
+    def __init__(self, index_dir_path: str, workers: int = 1) -> None:
+        self.index_dir_path = index_dir_path
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='scene-scan')
+        self._scans: Dict[str, 'Future[Tuple[ndarray, ndarray]]'] = {}
+        self._lock = threading.Lock()
+
+    def scores_path(self, video_path: str, metric: str, step: int, analysis_side: int) -> str:
+        video_path, mtime_ns, size = video_file_key(video_path)
+        digest = hashlib.sha1(video_path.encode()).hexdigest()
+        return os.path.join(
+            self.index_dir_path,
+            f'{_SCORES_FILE_PREFIX}-{digest}-{mtime_ns}-{size}-{metric}-{step}-{analysis_side}.npy'
+        )
+
+    def scan(
+            self,
+            video_path: str,
+            metric: str = HISTOGRAM_METRIC,
+            step: int = 1,
+            analysis_side: int = 64
+    ) -> 'Future[Tuple[ndarray, ndarray]]':
+        """Возвращает будущий результат scan_scene_scores, загружая его из файла или запуская оценку в пуле.
+
+        Args:
+            video_path: Полный путь к видеофайлу.
+            metric: Способ оценки: histogram или difference.
+            step: Шаг между оцениваемыми кадрами.
+            analysis_side: Размер наибольшей стороны уменьшенных кадров.
+
+        Returns:
+            Future с номерами оценённых кадров и их оценками.
+        """
+        path = self.scores_path(video_path, metric, step, analysis_side)
+        with self._lock:
+            future = self._scans.get(path)
+        if future is None and os.path.isfile(path):
+            try:
+                scores = _load_scores(path)
+            except (OSError, ValueError):
+                # файл повреждён, видеофайл оценивается заново
+                pass
+            else:
+                future = Future()
+                future.set_result(scores)
+                return future
+        with self._lock:
+            future = self._scans.get(path)
+            if future is not None:
+                return future
+            future = self._executor.submit(self._scan_and_save, path, video_path, metric, step, analysis_side)
+            self._scans[path] = future
+        future.add_done_callback(lambda _: self._forget(path))
+        return future
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _scan_and_save(
+            self,
+            path: str,
+            video_path: str,
+            metric: str,
+            step: int,
+            analysis_side: int
+    ) -> Tuple['ndarray', 'ndarray']:
+        frame_numbers, scores = scan_scene_scores(video_path, metric, step, analysis_side)
+        try:
+            os.makedirs(self.index_dir_path, exist_ok=True)
+            # оценки предыдущих версий видеофайла больше не нужны
+            (digest, mtime_ns, size) = os.path.basename(path).split('-')[1:4]
+            current_prefix = f'{_SCORES_FILE_PREFIX}-{digest}-{mtime_ns}-{size}-'
+            for stale_path in glob.glob(os.path.join(self.index_dir_path, f'{_SCORES_FILE_PREFIX}-{digest}-*.npy')):
+                if not os.path.basename(stale_path).startswith(current_prefix):
+                    os.remove(stale_path)
+            buffer = io.BytesIO()
+            np.save(buffer, np.stack([frame_numbers.astype(np.float64), scores]))
+            write_file_atomic(path, buffer.getvalue())
+        except OSError:
+            # оценки не сохраняются, следующий запрос оценит видеофайл заново
+            pass
+        return frame_numbers, scores
+
+    def _forget(self, path: str) -> None:
+        with self._lock:
+            self._scans.pop(path, None)
+
+
+def _load_scores(path: str) -> Tuple['ndarray', 'ndarray']:
+    data = np.load(path)
+    return data[0].astype(np.int64), data[1]
+
+
+def extract_and_save_scene_frames(
+        video_path: str,
+        frame_dir: str,
+        frame_numbers: 'ndarray',
+        scores: 'ndarray',
+        count: int,
+        frame_format: str = 'png',
+        min_distance: int = 1
+) -> List[Tuple[int, float, str]]:
+    """Функция для выбора кадров на границах сцен видеофайла и сохранения их в файлы.
+
+    Выполняется в пуле обработчиков после оценки кадров (SceneScoreStore.scan). Выбранные кадры
+    исходного размера извлекаются за один проход с позиционированием к каждому кадру
+    (iter_frame_ranges) и сохраняются с теми же именами, что и кадры /api/frames.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        frame_dir: Каталог для сохранения кадров.
+        frame_numbers: Номера оценённых кадров.
+        scores: Оценки кадров.
+        count: Число выбираемых кадров.
+        frame_format: Формат файлов с кадрами: png, jpeg или webp.
+        min_distance: Минимальное расстояние в кадрах между выбранными кадрами.
+
+    Returns:
+        Номер, оценка и путь к файлу каждого выбранного кадра в порядке возрастания номеров.
+
+    Raises:
+        FramesExtractionError: Кадры не удалось извлечь или сохранить.
+    """
+    selected = select_scene_frames(frame_numbers, scores, count, min_distance)
+    frame_scores = dict(zip(frame_numbers.tolist(), scores.tolist()))
+
+    make_frame_dir(frame_dir)
+    ext = frame_extension(frame_format)
+    frame_paths = {x: os.path.join(frame_dir, frame_file_name(x, ext)) for x in selected}
+    writer = FrameWriter(encode_params(frame_format))
+    saved = set()
+    try:
+        for (frame_number, frame) in iter_frame_ranges(video_path, [(x, x + 1) for x in selected]):
+            writer.submit(frame, frame_paths[frame_number])
+            saved.add(frame_number)
+    finally:
+        writer.close()
+    if len(saved) != len(selected):
+        raise FramesExtractionError('Failed to extract frames.')
+
+    return [(x, round(frame_scores[x], 6), frame_paths[x]) for x in selected]
+
+
+_scene_score_store: Optional[SceneScoreStore] = None
+_init_lock = threading.Lock()
+
+
+def get_scene_score_store() -> SceneScoreStore:
+    """Возвращает общее хранилище оценок кадров, создавая его при первом обращении.
+    """
+    global _scene_score_store
+    with _init_lock:
+        if _scene_score_store is None:
+            config = get_settings()
+            _scene_score_store = SceneScoreStore(
+                config.fastAPI.KEYFRAME_INDEX_DIR_PATH,
+                config.fastAPI.SCENE_SCAN_WORKERS
+            )
+        return _scene_score_store
+
+
+def shutdown_scene_score_store() -> None:
+    """Останавливает пул оценки кадров, если он был создан. Выполняемые оценки не прерываются.
+    """
+    global _scene_score_store
+    with _init_lock:
+        if _scene_score_store is not None:
+            _scene_score_store.shutdown()
+            _scene_score_store = None
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight():
+    """Объединяет одновременные вызовы с одинаковым ключом: выполняется только первый из них,
+    остальные ожидают его результат.
+
+    Вызов выполняется в отдельной задаче, поэтому отмена ожидающего запроса (например,
+    при разрыве соединения клиентом) не отменяет вызов для остальных запросов.
+    Результат не сохраняется после завершения вызова.
+
+    Attributes:
+        coalesced: Число вызовов, получивших результат другого вызова.
+    """
+    coalesced: int
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._calls: Dict[Hashable, 'asyncio.Task[Any]'] = {}
+
+    def pending(self) -> int:
+        """Число выполняющихся вызовов.
+        """
+        return len(self._calls)
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет асинхронную функцию или ожидает результат уже выполняющегося вызова с тем же ключом.
+
+        Args:
+            key: Ключ вызова.
+            fn: Асинхронная функция без аргументов.
+
+        Returns:
+            Результат функции. Исключение функции передаётся всем ожидающим вызовам.
+        """
+        task = self._calls.get(key)
+        # задача, созданная в другом цикле событий, не может быть ожидаема
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: 'asyncio.Task[Any]') -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # исключение считается полученным, даже если все ожидавшие запросы были отменены
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,130 @@
+import os
+import time
+import uuid
+import zipfile
+from typing import Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+from src.utils.get_frames import iter_frames, make_frame_dir
+from src.utils.save_frames import (
+    FrameSize, encode_frame, encode_params, frame_extension, frame_file_name, resize_frame, write_frame_file
+)
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+
+
+ZIP_ARCHIVE = 'zip'
+MULTIPART_ARCHIVE = 'multipart'
+ARCHIVE_PATTERN = '^(zip|multipart)$'
+
+
+def iter_encoded_frames(
+        video_path: str,
+        first_frame: int,
+        count: int,
+        frame_format: str,
+        frame_dir: Optional[str] = None,
+        size: Optional[FrameSize] = None
+) -> Iterator[Tuple[int, 'ndarray']]:
+    """Генератор закодированных кадров: каждый кадр кодируется сразу после декодирования.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        first_frame: Номер первого кадра.
+        count: Число кадров.
+        frame_format: Формат кадров: png, jpeg или webp.
+        frame_dir: Каталог для сохранения кадров. Если не указан, кадры не сохраняются.
+        size: Размер, до которого кадры уменьшаются перед кодированием (None - исходный размер).
+
+    Yields:
+        Номер кадра и закодированное изображение.
+    """
+    ext = frame_extension(frame_format)
+    params = encode_params(frame_format)
+    if frame_dir is not None:
+        make_frame_dir(frame_dir)
+
+    for (frame_number, frame) in iter_frames(video_path, first_frame, count):
+        if size is not None:
+            frame = resize_frame(frame, size)
+        buffer = encode_frame(frame, f'.{ext}', params)
+        if frame_dir is not None:
+            write_frame_file(os.path.join(frame_dir, frame_file_name(frame_number, ext, size)), buffer)
+        yield frame_number, buffer
+
+
+class MultipartWriter():
+    """Формирует тело ответа multipart/mixed по частям.
+
+    Attributes:
+        boundary: Разделитель частей.
+    """
+    boundary: str
+
+    def __init__(self) -> None:
+        self.boundary = uuid.uuid4().hex
+
+    @property
+    def media_type(self) -> str:
+        return f'multipart/mixed; boundary={self.boundary}'
+
+    def add(self, file_name: str, media_type: str, data: bytes, frame_number: int) -> List[bytes]:
+        """Возвращает фрагменты тела ответа с очередной частью.
+        """
+        headers = (
+            f'--{self.boundary}\r\n'
+            f'Content-Type: {media_type}\r\n'
+            f'Content-Disposition: attachment; filename="{file_name}"\r\n'
+            f'Content-Length: {len(data)}\r\n'
+            f'X-Frame-Number: {frame_number}\r\n'
+            '\r\n'
+        )
+        return [headers.encode(), data, b'\r\n']
+
+    def close(self) -> List[bytes]:
+        """Возвращает завершающий фрагмент тела ответа.
+        """
+        return [f'--{self.boundary}--\r\n'.encode()]
+
+
+class _ChunkBuffer():
+    """Файлоподобный объект без позиционирования, накапливающий записанные zipfile фрагменты.
+    """
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> List[bytes]:
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+
+class ZipStreamWriter():
+    """Формирует ZIP-архив по частям без записи на диск и без хранения архива в памяти.
+
+    Изображения уже сжаты, поэтому файлы добавляются без сжатия.
+    """
+    media_type = 'application/zip'
+
+    def __init__(self) -> None:
+        self._buffer = _ChunkBuffer()
+        # zipfile записывает размеры файлов после их содержимого, так как позиционирование недоступно
+        self._zip = zipfile.ZipFile(self._buffer, 'w', zipfile.ZIP_STORED)
+
+    def add(self, file_name: str, media_type: str, data: bytes, frame_number: int) -> List[bytes]:
+        """Возвращает фрагменты архива с очередным файлом.
+        """
+        self._zip.writestr(zipfile.ZipInfo(file_name, time.localtime()[:6]), data)
+        return self._buffer.drain()
+
+    def close(self) -> List[bytes]:
+        """Возвращает завершающий фрагмент архива (центральный каталог).
+        """
+        self._zip.close()
+        return self._buffer.drain()
@@ -0,0 +1,312 @@
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import cv2
+
+from src.utils.config import get_settings
+from src.utils.metrics import OPEN_CAPTURE_STAGE, PROBE_STAGE, timed
+
+
+class VideoMetadata(NamedTuple):
+    """Параметры видеофайла, полученные при его открытии.
+
+    Attributes:
+        fps: Количество кадров в секунду.
+        frame_count: Число кадров (0 или меньше, если контейнер его не сообщает).
+        duration: Длительность в секундах.
+        width: Ширина кадра.
+        height: Высота кадра.
+        codec: Код FourCC видеокодека.
+    """
+    fps: float
+    frame_count: int
+    duration: float
+    width: int
+    height: int
+    codec: str
+
+
+class CacheStats():
+    """Счётчики обращений к кешу.
+
+    Attributes:
+        hits: Число попаданий.
+        misses: Число промахов.
+        evictions: Число вытесненных элементов.
+    """
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+def video_file_key(video_path: str) -> Tuple[str, int, int]:
+    """Возвращает ключ видеофайла, меняющийся при изменении файла.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+
+    Returns:
+        Путь, время изменения в наносекундах и размер файла.
+    """
+    stat = os.stat(video_path)
+    return video_path, stat.st_mtime_ns, stat.st_size
+
+
+@timed(PROBE_STAGE)
+def probe_video(cap: cv2.VideoCapture) -> Optional[VideoMetadata]:
+    """Считывает параметры открытого видеофайла.
+
+    Args:
+        cap: Видеофайл.
+
+    Returns:
+        Параметры видеофайла или None, если файл не удалось открыть.
+    """
+    if not cap.isOpened():
+        return None
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = frame_count / fps if fps > 0 and frame_count > 0 else 0.0
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC)) & 0xFFFFFFFF
+    codec = fourcc.to_bytes(4, 'little').decode('ascii', errors='replace').strip('\x00 ')
+    return VideoMetadata(
+        fps=fps,
+        frame_count=frame_count,
+        duration=duration,
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        codec=codec,
+    )
+
+
+class _PooledVideo():
+    """Открытые копии одного видеофайла в пуле, не выданные запросам.
+    """
+    def __init__(self) -> None:
+        self.idle: List[cv2.VideoCapture] = []
+        self.evicted = False
+
+    def close(self) -> None:
+        while self.idle:
+            self.idle.pop().release()
+
+
+class CapturePool():
+    """Ограниченный по размеру пул открытых видеофайлов с вытеснением давно не использовавшихся (LRU).
+
+    Ключ пула включает время изменения файла, поэтому изменённый файл открывается заново.
+    Один и тот же открытый видеофайл никогда не используется двумя запросами одновременно:
+    запрос получает свободную копию видеофайла из пула или, если все копии заняты, открывает
+    новую, поэтому одновременные запросы к одному видеофайлу не ждут друг друга.
+    После использования в пуле остаётся не больше max_handles копий каждого видеофайла.
+
+    Attributes:
+        max_size: Максимальное число видеофайлов в пуле.
+        max_handles: Максимальное число свободных открытых копий одного видеофайла.
+        stats: Счётчики попаданий, промахов и вытеснений.
+    """
+    max_size: int
+    max_handles: int
+    stats: CacheStats
+
+    def __init__(self, max_size: int, max_handles: int = 4) -> None:
+        self.max_size = max_size
+        self.max_handles = max_handles
+        self.stats = CacheStats()
+        self._items: 'OrderedDict[Tuple[str, int], _PooledVideo]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, video_path: str) -> Iterator[cv2.VideoCapture]:
+        """Выдаёт открытый видеофайл в монопольное пользование на время блока with.
+
+        Args:
+            video_path: Полный путь к видеофайлу.
+
+        Yields:
+            Видеофайл. Его позиция не определена, перед чтением необходимо позиционирование.
+        """
+        path, mtime_ns, _ = video_file_key(video_path)
+        key = (path, mtime_ns)
+        cap = None
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                entry = _PooledVideo()
+                self._items[key] = entry
+                self._evict()
+            else:
+                self._items.move_to_end(key)
+            if entry.idle:
+                self.stats.hits += 1
+                cap = entry.idle.pop()
+            else:
+                self.stats.misses += 1
+
+        if cap is None or not cap.isOpened():
+            with timed(OPEN_CAPTURE_STAGE):
+                cap = cv2.VideoCapture(video_path)
+        try:
+            yield cap
+        finally:
+            with self._lock:
+                # видеофайл, вытесненный во время использования, и лишние копии закрываются
+                keep = not entry.evicted and len(entry.idle) < self.max_handles
+                if keep:
+                    entry.idle.append(cap)
+            if not keep:
+                cap.release()
+
+    def size(self) -> int:
+        return len(self._items)
+
+    def clear(self) -> None:
+        """Закрывает все свободные видеофайлы пула, занятые закрываются после использования.
+        """
+        with self._lock:
+            while self._items:
+                self._evict_oldest()
+
+    def _evict(self) -> None:
+        while len(self._items) > self.max_size:
+            self._evict_oldest()
+            self.stats.evictions += 1
+
+    def _evict_oldest(self) -> None:
+        _, entry = self._items.popitem(last=False)
+        entry.evicted = True
+        entry.close()
+
+
+@contextmanager
+def open_capture(video_path: str) -> Iterator[cv2.VideoCapture]:
+    """Открывает видеофайл вне пула на время блока with.
+
+    Используется для длительного чтения (фоновые задания), чтобы оно не занимало копии
+    видеофайла из пула, общего с запросами.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+
+    Yields:
+        Видеофайл.
+    """
+    with timed(OPEN_CAPTURE_STAGE):
+        cap = cv2.VideoCapture(video_path)
+    try:
+        yield cap
+    finally:
+        cap.release()
+
+
+class MetadataCache():
+    """Ограниченный по размеру кеш параметров видеофайлов с вытеснением давно не использовавшихся (LRU).
+
+    Attributes:
+        max_size: Максимальное число элементов.
+        stats: Счётчики попаданий, промахов и вытеснений.
+    """
+    max_size: int
+    stats: CacheStats
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._items: 'OrderedDict[Tuple[str, int, int], VideoMetadata]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[VideoMetadata]:
+        with self._lock:
+            metadata = self._items.get(key)
+            if metadata is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+                self._items.move_to_end(key)
+            return metadata
+
+    def put(self, key: Tuple[str, int, int], metadata: VideoMetadata) -> None:
+        with self._lock:
+            self._items[key] = metadata
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+                self.stats.evictions += 1
+
+    def size(self) -> int:
+        return len(self._items)
+
+
+_capture_pool: Optional[CapturePool] = None
+_metadata_cache: Optional[MetadataCache] = None
+_init_lock = threading.Lock()
+
+
+def current_capture_pool() -> Optional[CapturePool]:
+    """Возвращает общий пул открытых видеофайлов, не создавая его.
+    """
+    return _capture_pool
+
+
+def current_metadata_cache() -> Optional[MetadataCache]:
+    """Возвращает общий кеш параметров видеофайлов, не создавая его.
+    """
+    return _metadata_cache
+
+
+def get_capture_pool() -> CapturePool:
+    """Возвращает общий пул открытых видеофайлов, создавая его при первом обращении.
+    """
+    global _capture_pool
+    with _init_lock:
+        if _capture_pool is None:
+            config = get_settings()
+            _capture_pool = CapturePool(config.fastAPI.CAPTURE_POOL_SIZE, config.fastAPI.CAPTURE_POOL_HANDLES)
+        return _capture_pool
+
+
+def get_metadata_cache() -> MetadataCache:
+    """Возвращает общий кеш параметров видеофайлов, создавая его при первом обращении.
+    """
+    global _metadata_cache
+    with _init_lock:
+        if _metadata_cache is None:
+            _metadata_cache = MetadataCache(get_settings().fastAPI.METADATA_CACHE_SIZE)
+        return _metadata_cache
+
+
+def get_video_metadata(video_path: str, cap: Optional[cv2.VideoCapture] = None) -> Optional[VideoMetadata]:
+    """Возвращает параметры видеофайла из кеша, при промахе считывает их из видеофайла.
+
+    Args:
+        video_path: Полный путь к видеофайлу.
+        cap: Уже выданный пулом видеофайл. Если не указан, видеофайл берётся из пула.
+
+    Returns:
+        Параметры видеофайла или None, если файл не удалось открыть.
+    """
+    key = video_file_key(video_path)
+    cache = get_metadata_cache()
+    metadata = cache.get(key)
+    if metadata is not None:
+        return metadata
+
+    if cap is None:
+        with get_capture_pool().acquire(video_path) as pooled_cap:
+            metadata = probe_video(pooled_cap)
+    else:
+        metadata = probe_video(cap)
+    if metadata is not None:
+        cache.put(key, metadata)
+    return metadata
@@ -0,0 +1,212 @@
+import bisect
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from src.utils.config import get_settings
+from src.utils.video_capture import VideoMetadata
+from src.utils.video_index import get_indexed_video_metadata
+
+
+NAME_SORT = 'name'
+SIZE_SORT = 'size'
+MTIME_SORT = 'mtime'
+SORT_PATTERN = '^(name|size|mtime)$'
+ORDER_PATTERN = '^(asc|desc)$'
+
+
+class VideoEntry(NamedTuple):
+    """Видеофайл каталога.
+
+    Attributes:
+        file_name: Имя видеофайла.
+        file_path: Полный путь к видеофайлу.
+        size: Размер видеофайла.
+        mtime_ns: Время изменения видеофайла в наносекундах.
+    """
+    file_name: str
+    file_path: str
+    size: int
+    mtime_ns: int
+
+
+class VideoCatalogue():
+    """Хранящийся в памяти список видеофайлов каталога VIDEOS_DIR_PATH.
+
+    Список строится одним проходом os.scandir и обновляется, когда меняется время изменения
+    каталога (файл добавлен, удалён или переименован): при обновлении заново считываются
+    параметры только новых файлов. Перезапись существующего файла не меняет время изменения
+    каталога, поэтому не реже одного раза в rescan_interval секунд параметры всех файлов
+    считываются заново в фоновом потоке, а запросы тем временем получают предыдущий список.
+
+    Attributes:
+        videos_dir_path: Каталог с видеофайлами.
+        rescan_interval: Интервал полного обновления в секундах (None - без полного обновления).
+    """
+    videos_dir_path: str
+    rescan_interval: Optional[float]
+
+    def __init__(self, videos_dir_path: str, rescan_interval: Optional[float] = None) -> None:
+        self.videos_dir_path = videos_dir_path
+        self.rescan_interval = rescan_interval
+        self._entries: Dict[str, VideoEntry] = {}
+        self._sorted: Dict[str, List[VideoEntry]] = {}
+        self._names: List[str] = []
+        self._metadata: Dict[str, Tuple[VideoEntry, Optional[VideoMetadata]]] = {}
+        self._dir_mtime_ns: Optional[int] = None
+        self._last_rescan = 0.0
+        self._rescanning = False
+        self._lock = threading.Lock()
+        # проходы по каталогу выполняются по одному и без блокировки чтения списка
+        self._scan_lock = threading.Lock()
+
+    def page(
+            self,
+            prefix: str = '',
+            sort: str = NAME_SORT,
+            descending: bool = False,
+            offset: int = 0,
+            limit: Optional[int] = None
+    ) -> Tuple[List[VideoEntry], int]:
+        """Возвращает страницу списка видеофайлов.
+
+        Args:
+            prefix: Начало имени видеофайла.
+            sort: Поле сортировки: name, size или mtime.
+            descending: Сортировка по убыванию.
+            offset: Число пропускаемых видеофайлов.
+            limit: Число видеофайлов на странице (None - все).
+
+        Returns:
+            Видеофайлы страницы и общее число видеофайлов, удовлетворяющих фильтру.
+        """
+        self._refresh()
+        with self._lock:
+            by_name = self._sorted[NAME_SORT]
+            if prefix:
+                # имена упорядочены, поэтому файлы с общим началом имени идут подряд
+                start = bisect.bisect_left(self._names, prefix)
+                stop = start
+                while stop < len(by_name) and self._names[stop].startswith(prefix):
+                    stop += 1
+                entries = by_name[start:stop]
+                if sort != NAME_SORT:
+                    entries.sort(key=_SORT_KEYS[sort])
+            else:
+                entries = self._sorted_by(sort)
+
+        if descending:
+            entries = entries[::-1]
+        stop = None if limit is None else offset + limit
+        return entries[offset:stop], len(entries)
+
+    def metadata(self, entry: VideoEntry) -> Optional[VideoMetadata]:
+        """Возвращает параметры видеофайла из памяти, при первом обращении или после изменения
+        видеофайла - из таблицы video_metadata или из самого видеофайла.
+        """
+        with self._lock:
+            cached = self._metadata.get(entry.file_name)
+        if cached is not None and cached[0] == entry:
+            return cached[1]
+        metadata = get_indexed_video_metadata(entry.file_name, entry.file_path)
+        with self._lock:
+            if self._entries.get(entry.file_name) == entry:
+                self._metadata[entry.file_name] = (entry, metadata)
+        return metadata
+
+    def rescan(self) -> None:
+        """Считывает заново параметры всех видеофайлов каталога.
+        """
+        try:
+            with self._scan_lock:
+                self._scan(full=True)
+        finally:
+            with self._lock:
+                self._last_rescan = time.monotonic()
+                self._rescanning = False
+
+    def _refresh(self) -> None:
+        if os.stat(self.videos_dir_path).st_mtime_ns != self._dir_mtime_ns:
+            # пока каталог обходится другим потоком, запрос получает предыдущий список;
+            # список ещё не построен - ждать его построения
+            if self._scan_lock.acquire(blocking=self._dir_mtime_ns is None):
+                try:
+                    if os.stat(self.videos_dir_path).st_mtime_ns != self._dir_mtime_ns:
+                        self._scan(full=self._dir_mtime_ns is None)
+                finally:
+                    self._scan_lock.release()
+
+        with self._lock:
+            rescan = (
+                self.rescan_interval is not None
+                and not self._rescanning
+                and time.monotonic() - self._last_rescan >= self.rescan_interval
+            )
+            if rescan:
+                self._rescanning = True
+        if rescan:
+            threading.Thread(target=self.rescan, name='video-catalogue-rescan', daemon=True).start()
+
+    def _scan(self, full: bool) -> None:
+        """Обходит каталог и заменяет список видеофайлов. Выполняется под блокировкой _scan_lock.
+
+        Args:
+            full: Считать параметры всех файлов, а не только новых.
+        """
+        # время изменения считывается до обхода: изменение во время обхода приведёт к следующему обходу
+        dir_mtime_ns = os.stat(self.videos_dir_path).st_mtime_ns
+        previous_entries = self._entries
+        entries = {}
+        with os.scandir(self.videos_dir_path) as dir_entries:
+            for dir_entry in dir_entries:
+                if not dir_entry.is_file():
+                    continue
+                previous = previous_entries.get(dir_entry.name)
+                if previous is not None and not full:
+                    entries[dir_entry.name] = previous
+                    continue
+                stat = dir_entry.stat()
+                entries[dir_entry.name] = VideoEntry(dir_entry.name, dir_entry.path, stat.st_size, stat.st_mtime_ns)
+
+        by_name = sorted(entries.values(), key=_SORT_KEYS[NAME_SORT])
+        with self._lock:
+            self._entries = entries
+            self._sorted = {NAME_SORT: by_name}
+            self._names = [x.file_name for x in by_name]
+            self._metadata = {
+                name: cached for (name, cached) in self._metadata.items() if entries.get(name) == cached[0]
+            }
+            if full:
+                self._last_rescan = time.monotonic()
+            self._dir_mtime_ns = dir_mtime_ns
+
+    def _sorted_by(self, sort: str) -> List[VideoEntry]:
+        if sort not in self._sorted:
+            self._sorted[sort] = sorted(self._sorted[NAME_SORT], key=_SORT_KEYS[sort])
+        return self._sorted[sort]
+
+
+_SORT_KEYS = {
+    NAME_SORT: lambda x: x.file_name,
+    SIZE_SORT: lambda x: (x.size, x.file_name),
+    MTIME_SORT: lambda x: (x.mtime_ns, x.file_name),
+}
+
+
+_video_catalogue: Optional[VideoCatalogue] = None
+_init_lock = threading.Lock()
+
+
+def get_video_catalogue() -> VideoCatalogue:
+    """Возвращает общий каталог видеофайлов, создавая его при первом обращении.
+    """
+    global _video_catalogue
+    with _init_lock:
+        if _video_catalogue is None:
+            config = get_settings()
+            _video_catalogue = VideoCatalogue(
+                config.fastAPI.VIDEOS_DIR_PATH,
+                config.fastAPI.VIDEO_CATALOGUE_RESCAN_INTERVAL
+            )
+        return _video_catalogue
@@ -0,0 +1,356 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import cv2
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+from src.models import engine
+from src.models import video_metadatas
+from src.utils.config import get_settings
+from src.utils.metrics import OPEN_CAPTURE_STAGE, timed
+from src.utils.video_capture import (
+    VideoMetadata, get_metadata_cache, get_video_metadata, probe_video, video_file_key
+)
+
+if TYPE_CHECKING:
+    from src.utils.video_catalogue import VideoEntry
+
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def get_indexed_video_metadata(file_name: str, video_path: str) -> Optional[VideoMetadata]:
+    """Возвращает параметры видеофайла, открывая видеофайл только если их нет ни в кеше, ни в БД.
+
+    Параметры ищутся в кеше параметров, затем в таблице video_metadata по имени, размеру
+    и времени изменения видеофайла. При промахе видеофайл открывается, а его параметры
+    сохраняются в БД. Если БД недоступна, параметры считываются из видеофайла.
+
+    Args:
+        file_name: Имя видеофайла относительно каталога VIDEOS_DIR_PATH.
+        video_path: Полный путь к видеофайлу.
+
+    Returns:
+        Параметры видеофайла или None, если файл не удалось открыть.
+    """
+    key = video_file_key(video_path)
+    metadata = get_metadata_cache().get(key)
+    if metadata is not None:
+        return metadata
+
+    try:
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(video_metadatas)
+                .where(video_metadatas.c.file_name == file_name)
+                .where(video_metadatas.c.file_size == key[2])
+                .where(video_metadatas.c.mtime_ns == key[1])
+            ).first()
+        if row is not None:
+            if row.fps is None:
+                return None
+            metadata = VideoMetadata(row.fps, row.frame_count, row.duration, row.width, row.height, row.codec)
+            get_metadata_cache().put(key, metadata)
+            return metadata
+    except SQLAlchemyError:
+        # таблица ещё не создана или БД недоступна
+        return get_video_metadata(video_path)
+
+    metadata = get_video_metadata(video_path)
+    try:
+        with engine.begin() as conn:
+            replace_video_metadata(conn, [(file_name, key, metadata, None)])
+    except SQLAlchemyError:
+        pass
+    return metadata
+
+
+def replace_video_metadata(
+        conn: Connection,
+        items: Iterable[Tuple[str, Tuple[str, int, int], Optional[VideoMetadata], Optional[str]]]
+) -> None:
+    """Сохраняет параметры видеофайлов, удаляя записи о предыдущих версиях этих видеофайлов.
+
+    Args:
+        conn: Подключение к базе данных в транзакции.
+        items: Имя видеофайла, его ключ (путь, время изменения, размер), параметры и хеш содержимого.
+    """
+    rows = []
+    for (file_name, (_, mtime_ns, size), metadata, digest) in items:
+        row = {'file_name': file_name, 'file_size': size, 'mtime_ns': mtime_ns, 'content_digest': digest}
+        row.update(metadata._asdict() if metadata is not None else dict.fromkeys(VideoMetadata._fields))
+        rows.append(row)
+    if not rows:
+        return
+    conn.execute(delete(video_metadatas).where(video_metadatas.c.file_name.in_([x['file_name'] for x in rows])))
+    conn.execute(insert(video_metadatas), rows)
+
+
+def file_digest(path: str) -> str:
+    """Функция для вычисления хеша SHA-256 содержимого файла без чтения файла в память целиком.
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(DIGEST_CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class VideoDigests():
+    """Хеши содержимого видеофайлов для хранилища кадров.
+
+    Хеш ищется в ограниченном по размеру кеше (LRU), затем в таблице video_metadata
+    по имени, размеру и времени изменения видеофайла. Хеш видеофайла, которого нет ни там,
+    ни там, вычисляется в фоновом потоке и сохраняется в таблицу, а запрос обходится без хеша:
+    чтение видеофайла целиком не задерживает запросы. Хеши всех видеофайлов каталога
+    вычисляет также фоновое заполнение video_metadata (VideoProber).
+
+    Attributes:
+        max_size: Максимальное число элементов кеша.
+    """
+    max_size: int
+
+    def __init__(self, max_size: int, workers: int = 1) -> None:
+        self.max_size = max_size
+        self._items: 'OrderedDict[Tuple[str, int, int], str]' = OrderedDict()
+        self._pending: Set[Tuple[str, int, int]] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='digest')
+
+    def get(self, file_name: str, video_path: str) -> Optional[str]:
+        """Возвращает известный хеш содержимого видеофайла, при его отсутствии запускает вычисление в фоне.
+
+        Args:
+            file_name: Имя видеофайла относительно каталога VIDEOS_DIR_PATH.
+            video_path: Полный путь к видеофайлу.
+
+        Returns:
+            Хеш в шестнадцатеричной записи или None, если он ещё не вычислен.
+        """
+        key = video_file_key(video_path)
+        with self._lock:
+            digest = self._items.get(key)
+            if digest is not None:
+                self._items.move_to_end(key)
+                return digest
+
+        digest = _load_digest(file_name, key)
+        if digest is not None:
+            self.put(key, digest)
+            return digest
+
+        with self._lock:
+            if key in self._pending:
+                return None
+            self._pending.add(key)
+        self._executor.submit(self._compute_pending, file_name, video_path, key)
+        return None
+
+    def compute(self, file_name: str, video_path: str) -> str:
+        """Вычисляет хеш содержимого видеофайла и сохраняет его в кеш и в таблицу video_metadata.
+        """
+        key = video_file_key(video_path)
+        digest = file_digest(video_path)
+        self.put(key, digest)
+        _save_digest(file_name, key, digest)
+        return digest
+
+    def put(self, key: Tuple[str, int, int], digest: str) -> None:
+        with self._lock:
+            self._items[key] = digest
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def _compute_pending(self, file_name: str, video_path: str, key: Tuple[str, int, int]) -> None:
+        try:
+            if video_file_key(video_path) == key:
+                self.compute(file_name, video_path)
+        except OSError:
+            # видеофайл удалён или изменён, хеш будет вычислен при следующем обращении
+            pass
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+
+def _load_digest(file_name: str, key: Tuple[str, int, int]) -> Optional[str]:
+    try:
+        with engine.connect() as conn:
+            return conn.execute(
+                select(video_metadatas.c.content_digest)
+                .where(video_metadatas.c.file_name == file_name)
+                .where(video_metadatas.c.file_size == key[2])
+                .where(video_metadatas.c.mtime_ns == key[1])
+            ).scalar()
+    except SQLAlchemyError:
+        # таблица ещё не создана или БД недоступна
+        return None
+
+
+def _save_digest(file_name: str, key: Tuple[str, int, int], digest: str) -> None:
+    try:
+        with engine.begin() as conn:
+            conn.execute(
+                update(video_metadatas)
+                .where(video_metadatas.c.file_name == file_name)
+                .where(video_metadatas.c.file_size == key[2])
+                .where(video_metadatas.c.mtime_ns == key[1])
+                .values(content_digest=digest)
+            )
+    except SQLAlchemyError:
+        # хеш остаётся только в кеше
+        pass
+
+
+class VideoProber():
+    """Заполняет таблицу video_metadata параметрами и хешами содержимого всех видеофайлов каталога.
+
+    Видеофайлы, параметры и хеш которых уже сохранены для текущих размера и времени изменения,
+    не открываются. Записи об удалённых видеофайлах удаляются.
+
+    Attributes:
+        workers: Число одновременно открываемых видеофайлов.
+        chunk_size: Число видеофайлов, параметры которых сохраняются в одной транзакции.
+    """
+    workers: int
+    chunk_size: int
+
+    def __init__(self, workers: int, chunk_size: int = 256) -> None:
+        self.workers = workers
+        self.chunk_size = chunk_size
+
+    def probe_all(self, entries: List['VideoEntry']) -> int:
+        """Считывает и сохраняет параметры видеофайлов, которых нет в таблице.
+
+        Args:
+            entries: Видеофайлы каталога.
+
+        Returns:
+            Число открытых видеофайлов.
+        """
+        with engine.connect() as conn:
+            rows = conn.execute(select(
+                video_metadatas.c.file_name, video_metadatas.c.file_size, video_metadatas.c.mtime_ns,
+                video_metadatas.c.content_digest
+            )).all()
+        indexed = {(x.file_name, x.file_size, x.mtime_ns) for x in rows}
+        # у записей, добавленных при запросах, хеш может быть ещё не вычислен
+        complete = {(x.file_name, x.file_size, x.mtime_ns) for x in rows if x.content_digest is not None}
+        missing = [x for x in entries if (x.file_name, x.size, x.mtime_ns) not in complete]
+        names = {x.file_name for x in entries}
+        removed = {x[0] for x in indexed if x[0] not in names}
+        if removed:
+            with engine.begin() as conn:
+                conn.execute(delete(video_metadatas).where(video_metadatas.c.file_name.in_(removed)))
+
+        with ThreadPoolExecutor(self.workers, thread_name_prefix='probe') as executor:
+            # параметры сохраняются частями, чтобы прерванный обход не начинался с начала
+            for i in range(0, len(missing), self.chunk_size):
+                chunk = missing[i:i + self.chunk_size]
+                probed = list(executor.map(_probe_file, [x.file_path for x in chunk]))
+                with engine.begin() as conn:
+                    replace_video_metadata(conn, [
+                        (entry.file_name, (entry.file_path, entry.mtime_ns, entry.size), metadata, digest)
+                        for (entry, (metadata, digest)) in zip(chunk, probed)
+                    ])
+                for (entry, (metadata, digest)) in zip(chunk, probed):
+                    key = (entry.file_path, entry.mtime_ns, entry.size)
+                    if metadata is not None:
+                        get_metadata_cache().put(key, metadata)
+                    if digest is not None:
+                        get_video_digests().put(key, digest)
+        return len(missing)
+
+
+def _probe_file(video_path: str) -> Tuple[Optional[VideoMetadata], Optional[str]]:
+    # видеофайл открывается отдельно от пула, чтобы не вытеснять из него используемые видеофайлы
+    with timed(OPEN_CAPTURE_STAGE):
+        cap = cv2.VideoCapture(video_path)
+    try:
+        metadata = probe_video(cap)
+    finally:
+        cap.release()
+    try:
+        digest = file_digest(video_path)
+    except OSError:
+        digest = None
+    return metadata, digest
+
+
+class _ProberThread(threading.Thread):
+    """Поток, периодически обновляющий таблицу video_metadata.
+    """
+    def __init__(self, prober: VideoProber, interval: Optional[float]) -> None:
+        super().__init__(name='video-prober', daemon=True)
+        self.prober = prober
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        # модуль каталога импортирует этот модуль
+        from src.utils.video_catalogue import get_video_catalogue
+
+        while not self.stopped.is_set():
+            try:
+                self.prober.probe_all(get_video_catalogue().page()[0])
+            except Exception:
+                # повторная попытка при следующем обходе
+                pass
+            if self.interval is None:
+                return
+            self.stopped.wait(self.interval)
+
+
+_prober_thread: Optional[_ProberThread] = None
+_video_digests: Optional[VideoDigests] = None
+_init_lock = threading.Lock()
+
+
+def get_video_digests() -> VideoDigests:
+    """Возвращает общий кеш хешей содержимого видеофайлов, создавая его при первом обращении.
+    """
+    global _video_digests
+    with _init_lock:
+        if _video_digests is None:
+            _video_digests = VideoDigests(get_settings().fastAPI.METADATA_CACHE_SIZE)
+        return _video_digests
+
+
+def get_video_digest(file_name: str, video_path: str) -> Optional[str]:
+    """Возвращает известный хеш содержимого видеофайла или None, запуская его вычисление в фоне.
+
+    Args:
+        file_name: Имя видеофайла относительно каталога VIDEOS_DIR_PATH.
+        video_path: Полный путь к видеофайлу.
+    """
+    return get_video_digests().get(file_name, video_path)
+
+
+def start_video_prober() -> None:
+    """Запускает фоновое заполнение таблицы video_metadata, если оно ещё не запущено.
+    """
+    global _prober_thread
+    with _init_lock:
+        if _prober_thread is None:
+            config = get_settings()
+            _prober_thread = _ProberThread(
+                VideoProber(config.fastAPI.VIDEO_PROBER_WORKERS),
+                config.fastAPI.VIDEO_PROBER_INTERVAL
+            )
+            _prober_thread.start()
+
+
+def stop_video_prober() -> None:
+    """Останавливает фоновое заполнение таблицы video_metadata.
+    """
+    global _prober_thread
+    with _init_lock:
+        if _prober_thread is not None:
+            _prober_thread.stopped.set()
+            _prober_thread = None
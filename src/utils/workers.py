@@ -0,0 +1,231 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, AsyncIterator, Callable, Iterator, NamedTuple, Optional
+
+from src.utils.config import get_settings
+from src.utils.metrics import decode_pool_rejected
+
+
+THREAD_MODE = 'thread'
+PROCESS_MODE = 'process'
+
+_STOP = object()
+# интервал проверки отмены при ожидании места в очереди элементов итератора
+_PUT_POLL_INTERVAL = 0.1
+
+
+class WorkerPoolBusy(Exception):
+    """Очередь пула обработчиков заполнена, запрос следует повторить позже.
+    """
+
+
+class DecodeWorkerPool():
+    """Выделенный пул обработчиков для декодирования и кодирования кадров.
+
+    Не занимает общий пул потоков FastAPI, поэтому медленное декодирование не блокирует
+    остальные маршруты. В режиме process задачи выполняются в отдельных процессах,
+    функции и их аргументы должны сериализоваться pickle.
+
+    Attributes:
+        max_workers: Число обработчиков.
+        mode: Режим работы: thread или process.
+        queue_limit: Максимальное число задач, ожидающих свободного обработчика.
+        timeout: Время ожидания результата задачи в секундах (None - без ограничения).
+    """
+    max_workers: int
+    mode: str
+    queue_limit: int
+    timeout: Optional[float]
+
+    def __init__(
+            self,
+            max_workers: int,
+            mode: str = THREAD_MODE,
+            queue_limit: int = 0,
+            timeout: Optional[float] = None
+    ) -> None:
+        self.max_workers = max_workers
+        self.mode = mode
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        if mode == PROCESS_MODE:
+            # fork процесса с работающими потоками OpenCV и asyncio небезопасен
+            self._executor: Executor = ProcessPoolExecutor(
+                max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+            # генераторы нельзя передать в другой процесс, они выполняются в потоках
+            self._thread_executor = ThreadPoolExecutor(max_workers, thread_name_prefix='decode')
+        elif mode == THREAD_MODE:
+            self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='decode')
+            self._thread_executor = self._executor
+        else:
+            raise ValueError(f'Unknown worker pool mode: {mode}')
+
+    @property
+    def pending(self) -> int:
+        """Число выполняемых и ожидающих выполнения задач.
+        """
+        return self._pending
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Выполняет функцию в пуле обработчиков и возвращает её результат.
+
+        Args:
+            fn: Функция.
+            args: Аргументы функции.
+
+        Raises:
+            WorkerPoolBusy: Все обработчики заняты и очередь заполнена.
+            asyncio.TimeoutError: Задача не завершилась за отведённое время.
+        """
+        self._acquire()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # место в очереди освобождается по завершении задачи, а не по истечении времени ожидания:
+        # запущенную задачу прервать нельзя, и она продолжает занимать обработчик
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    async def iterate(self, iterator: Iterator[Any], buffer_size: int = 4) -> AsyncIterator[Any]:
+        """Выдаёт элементы итератора, вычисляемые в потоке пула.
+
+        Итератор выполняется целиком в одном потоке пула и складывает элементы в очередь
+        из buffer_size элементов, поэтому декодирование не ждёт, пока клиент запросит
+        очередной элемент. Если клиент не забирает элемент из заполненной очереди за отведённое
+        время или прекратил чтение, итератор закрывается в том же потоке, освобождая занятый
+        видеофайл. Итератор занимает одно место в очереди пула, пока поток не завершит работу
+        с ним. Ограничение времени ожидания применяется к каждому элементу.
+
+        Args:
+            iterator: Итератор, например генератор кадров.
+            buffer_size: Число элементов, вычисляемых заранее.
+
+        Raises:
+            WorkerPoolBusy: Все обработчики заняты и очередь заполнена.
+            asyncio.TimeoutError: Элемент не был получен за отведённое время.
+        """
+        loop = asyncio.get_running_loop()
+        items: 'asyncio.Queue[Any]' = asyncio.Queue(buffer_size)
+        stopped = threading.Event()
+
+        def put(item: Any) -> bool:
+            try:
+                future = asyncio.run_coroutine_threadsafe(items.put(item), loop)
+            except RuntimeError:
+                # цикл событий остановлен
+                return False
+            deadline = None if self.timeout is None else time.monotonic() + self.timeout
+            while True:
+                try:
+                    future.result(_PUT_POLL_INTERVAL)
+                    return True
+                except FutureTimeoutError:
+                    if stopped.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                        future.cancel()
+                        return False
+
+        self._acquire()
+        try:
+            future = self._thread_executor.submit(_produce, iterator, put, stopped)
+        except BaseException:
+            self._release()
+            raise
+        # место в очереди освобождается, когда поток закончил работу с итератором и закрыл его
+        future.add_done_callback(lambda _: self._release())
+        try:
+            while True:
+                item = await asyncio.wait_for(items.get(), self.timeout)
+                if item is _STOP:
+                    return
+                if isinstance(item, _Failure):
+                    raise item.error
+                yield item
+        finally:
+            stopped.set()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._thread_executor is not self._executor:
+            self._thread_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_workers + self.queue_limit:
+                decode_pool_rejected.inc()
+                raise WorkerPoolBusy()
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+
+
+class _Failure(NamedTuple):
+    """Исключение, возникшее в итераторе, для передачи в цикл событий.
+    """
+    error: BaseException
+
+
+def _produce(iterator: Iterator[Any], put: Callable[[Any], bool], stopped: threading.Event) -> None:
+    """Складывает элементы итератора в очередь до его исчерпания, ошибки или отмены и закрывает итератор.
+    """
+    try:
+        for item in iterator:
+            if stopped.is_set() or not put(item):
+                return
+        put(_STOP)
+    except Exception as err:
+        put(_Failure(err))
+    finally:
+        # генератор закрывается в том же потоке: при закрытии он освобождает занятый видеофайл
+        close = getattr(iterator, 'close', None)
+        if close is not None:
+            close()
+
+
+_decode_pool: Optional[DecodeWorkerPool] = None
+_init_lock = threading.Lock()
+
+
+def current_decode_pool() -> Optional[DecodeWorkerPool]:
+    """Возвращает общий пул обработчиков, не создавая его.
+
+    Returns:
+        Пул или None, если он ещё не создан или уже остановлен.
+    """
+    return _decode_pool
+
+
+def get_decode_pool() -> DecodeWorkerPool:
+    """Возвращает общий пул обработчиков для декодирования кадров, создавая его при первом обращении.
+    """
+    global _decode_pool
+    with _init_lock:
+        if _decode_pool is None:
+            config = get_settings()
+            _decode_pool = DecodeWorkerPool(
+                config.fastAPI.DECODE_WORKERS,
+                mode=config.fastAPI.DECODE_WORKERS_MODE,
+                queue_limit=config.fastAPI.DECODE_QUEUE_LIMIT,
+                timeout=config.fastAPI.DECODE_TIMEOUT,
+            )
+        return _decode_pool
+
+
+def shutdown_decode_pool() -> None:
+    """Останавливает общий пул обработчиков, если он был создан.
+    """
+    global _decode_pool
+    with _init_lock:
+        if _decode_pool is not None:
+            _decode_pool.shutdown()
+            _decode_pool = None
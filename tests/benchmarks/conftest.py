@@ -0,0 +1,223 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Sequence
+
+import cv2
+import numpy as np
+import pytest
+
+
+class BenchmarkOptions(NamedTuple):
+    """Параметры бенчмарков из переменных окружения.
+
+    Attributes:
+        repeat: Число повторов каждого замера (BENCHMARK_REPEAT).
+        concurrency: Число одновременных запросов нагрузочного теста (BENCHMARK_CONCURRENCY).
+        requests: Число запросов нагрузочного теста (BENCHMARK_REQUESTS).
+        output: Путь к JSON файлу с результатами (BENCHMARK_OUTPUT, по умолчанию результаты только печатаются).
+    """
+    repeat: int
+    concurrency: int
+    requests: int
+    output: Optional[str]
+
+
+def latency_summary(latencies: Sequence[float]) -> Dict[str, float]:
+    """Функция для вычисления перцентилей задержки.
+
+    Args:
+        latencies: Длительности в секундах.
+
+    Returns:
+        Число замеров, среднее, p50, p95, p99 и максимум в миллисекундах.
+    """
+    values = np.asarray(latencies, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': int(values.size),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(p50), 3),
+        'p95_ms': round(float(p95), 3),
+        'p99_ms': round(float(p99), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def current_rss_mb() -> float:
+    """Функция возвращает текущий размер резидентной памяти процесса в мегабайтах.
+
+    В Linux значение читается из /proc/self/statm. В других системах текущий размер недоступен
+    без дополнительных пакетов, и возвращается пиковый размер за время работы процесса (ru_maxrss).
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            resident_pages = int(file.read().split()[1])
+        return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        # в macOS ru_maxrss в байтах
+        scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class RssSampler():
+    """Периодически измеряет текущий размер резидентной памяти процесса в фоновом потоке.
+
+    Пиковый размер отсчитывается от последнего вызова reset, поэтому у каждого замера свой пик,
+    а не наибольший пик всех предыдущих замеров процесса, как у ru_maxrss. Кратковременные
+    пики между измерениями могут быть пропущены.
+
+    Attributes:
+        interval: Интервал между измерениями в секундах.
+    """
+    interval: float
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self._peak = current_rss_mb()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+        self._thread.start()
+
+    def reset(self) -> None:
+        """Начинает отсчёт пикового размера заново.
+        """
+        with self._lock:
+            self._peak = current_rss_mb()
+
+    def peak_mb(self) -> float:
+        """Возвращает пиковый размер с последнего вызова reset в мегабайтах.
+        """
+        self._sample()
+        return round(self._peak, 1)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _sample(self) -> None:
+        rss = current_rss_mb()
+        with self._lock:
+            self._peak = max(self._peak, rss)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._sample()
+
+
+class BenchmarkReport():
+    """Результаты бенчмарков сессии pytest.
+
+    Результаты сохраняются по имени замера с сортировкой ключей и без отметок времени,
+    поэтому файлы, полученные на разных коммитах, можно сравнивать compare_benchmarks.py.
+    Пиковый размер памяти (peak_rss_mb) измеряется от начала теста или предыдущего замера.
+
+    Attributes:
+        results: Результаты замеров по имени замера.
+        rss_sampler: Измеритель размера резидентной памяти.
+    """
+    results: Dict[str, Dict[str, Any]]
+    rss_sampler: RssSampler
+
+    def __init__(self) -> None:
+        self.results = {}
+        self.rss_sampler = RssSampler()
+
+    def add(
+            self,
+            name: str,
+            latencies: Sequence[float],
+            elapsed: Optional[float] = None,
+            **extra: Any
+    ) -> Dict[str, Any]:
+        """Добавляет результат замера.
+
+        Args:
+            name: Имя замера, например extract_frame/sample-3.mp4/50%.
+            latencies: Длительности операций в секундах.
+            elapsed: Общее время замера в секундах для вычисления пропускной способности.
+            extra: Дополнительные значения результата.
+
+        Returns:
+            Результат замера.
+        """
+        result = latency_summary(latencies)
+        if elapsed is not None and elapsed > 0:
+            result['throughput_rps'] = round(len(latencies) / elapsed, 2)
+        result['peak_rss_mb'] = self.rss_sampler.peak_mb()
+        result.update(extra)
+        self.results[name] = result
+        self.rss_sampler.reset()
+        return result
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'environment': _environment(), 'results': self.results}
+
+
+def _environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'cpu_count': os.cpu_count(),
+        'database': os.getenv('SQLALCHEMY_DATABASE_URI', '').split(':', 1)[0],
+    }
+
+
+@pytest.fixture(scope='session')
+def benchmark_options() -> BenchmarkOptions:
+    """Функция для получения параметров бенчмарков из переменных окружения.
+
+    Returns:
+        Параметры бенчмарков.
+    """
+    return BenchmarkOptions(
+        repeat=int(os.getenv('BENCHMARK_REPEAT', '5')),
+        concurrency=int(os.getenv('BENCHMARK_CONCURRENCY', '8')),
+        requests=int(os.getenv('BENCHMARK_REQUESTS', '100')),
+        output=os.getenv('BENCHMARK_OUTPUT'),
+    )
+
+
+@pytest.fixture(scope='session')
+def benchmark_report(benchmark_options: BenchmarkOptions) -> Iterator[BenchmarkReport]:
+    """Функция для сбора результатов бенчмарков сессии и их вывода в формате JSON.
+
+    Args:
+        benchmark_options: Параметры бенчмарков.
+
+    Yields:
+        Результаты бенчмарков. По завершении сессии записываются в BENCHMARK_OUTPUT.
+    """
+    report = BenchmarkReport()
+    yield report
+    report.rss_sampler.stop()
+    if not report.results:
+        return
+    text = json.dumps(report.as_dict(), indent=2, sort_keys=True, ensure_ascii=False)
+    print(text)
+    if benchmark_options.output:
+        with open(benchmark_options.output, 'w') as file:
+            file.write(text + '\n')
+
+
+@pytest.fixture(autouse=True)
+def _reset_rss_peak(request: pytest.FixtureRequest) -> None:
+    """Функция для отсчёта пикового размера памяти замеров теста от его начала.
+
+    Args:
+        request: Запрос фикстуры.
+    """
+    if 'benchmark_report' in request.fixturenames:
+        request.getfixturevalue('benchmark_report').rss_sampler.reset()
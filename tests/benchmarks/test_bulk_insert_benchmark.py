@@ -0,0 +1,58 @@
+import os
+import shutil
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from src.utils.config import get_settings
+
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import Engine
+    from tests.benchmarks.conftest import BenchmarkReport
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+
+def test_benchmark_bulk_insert(client: 'TestClient', engine: 'Engine', benchmark_report: 'BenchmarkReport'):
+    """Функция измеряет время сохранения служебной информации о 1000 кадрах одним запросом
+       и 1000 запросами /api/saved_frames/new_frame.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    count = 1000
+    video_file_name = 'bulk-benchmark.mp4'
+    frame_dir = os.path.join(get_settings().fastAPI.FRAMES_DIR_PATH, video_file_name)
+    os.makedirs(frame_dir, exist_ok=True)
+    try:
+        for frame_number in range(1, 2 * count + 1):
+            open(os.path.join(frame_dir, f'{frame_number}.png'), 'wb').close()
+        benchmark_report.rss_sampler.reset()
+
+        start = time.perf_counter()
+        response = client.post('/api/saved_frames/bulk', json=[
+            {'file_path': video_file_name, 'frame_number': x} for x in range(1, count + 1)
+        ])
+        bulk_elapsed = time.perf_counter() - start
+        assert response.status_code == 200
+        assert all(x['status'] == 'created' for x in response.json())
+        benchmark_report.add('saved_frames/bulk', [bulk_elapsed], frames=count)
+
+        latencies = []
+        start = time.perf_counter()
+        for frame_number in range(count + 1, 2 * count + 1):
+            request_start = time.perf_counter()
+            response = client.post('/api/saved_frames/new_frame', json={
+                'file_path': video_file_name, 'frame_number': frame_number
+            })
+            latencies.append(time.perf_counter() - request_start)
+            assert response.status_code == 201
+        single_elapsed = time.perf_counter() - start
+        benchmark_report.add('saved_frames/new_frame', latencies, single_elapsed, frames=count)
+    finally:
+        shutil.rmtree(frame_dir)
@@ -0,0 +1,94 @@
+import glob
+import os
+import time
+from typing import List, TYPE_CHECKING
+
+import pytest
+
+from src.utils.config import get_settings
+from src.utils.get_frames import extract_frame
+from src.utils.save_frames import FRAME_FORMATS, encode_params, frame_extension, write_frames
+from src.utils.video_capture import get_video_metadata
+
+if TYPE_CHECKING:
+    from tests.benchmarks.conftest import BenchmarkOptions, BenchmarkReport
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+# смещения первого кадра в долях видеофайла
+OFFSETS = (0.0, 0.25, 0.5, 0.9)
+
+
+def _video_paths() -> List[str]:
+    """Функция возвращает тестовые видеофайлы, из которых можно извлечь SAVE_FRAMES_COUNT кадров.
+    """
+    config = get_settings()
+    video_paths = sorted(glob.glob(os.path.join(config.fastAPI.VIDEOS_DIR_PATH, '*.mp4')))
+    count = config.fastAPI.SAVE_FRAMES_COUNT
+    return [
+        x for x in video_paths
+        if extract_frame(x, 0, count)[0] is not None
+    ]
+
+
+def test_benchmark_extract_frame(benchmark_options: 'BenchmarkOptions', benchmark_report: 'BenchmarkReport'):
+    """Функция измеряет время извлечения SAVE_FRAMES_COUNT кадров на разных смещениях от начала видеофайла.
+
+    Перед замером выполняется один прогревочный вызов, поэтому видеофайл уже открыт в пуле.
+
+    Args:
+        benchmark_options: Параметры бенчмарков.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    count = get_settings().fastAPI.SAVE_FRAMES_COUNT
+    for video_path in _video_paths():
+        frame_count = get_video_metadata(video_path).frame_count
+        for offset in OFFSETS:
+            first_frame = int(max(frame_count - count, 0) * offset)
+            extract_frame(video_path, first_frame, count)
+            latencies = []
+            for _ in range(benchmark_options.repeat):
+                start = time.perf_counter()
+                frame_number, frames, method = extract_frame(video_path, first_frame, count)
+                latencies.append(time.perf_counter() - start)
+                assert frame_number == first_frame and len(frames) == count
+            benchmark_report.add(
+                f'extract_frame/{os.path.basename(video_path)}/{int(offset * 100)}%',
+                latencies,
+                first_frame=first_frame,
+                method=method,
+            )
+
+
+def test_benchmark_write_frames(
+        tmp_path,
+        benchmark_options: 'BenchmarkOptions',
+        benchmark_report: 'BenchmarkReport'
+):
+    """Функция измеряет время кодирования и записи SAVE_FRAMES_COUNT кадров в каждом формате.
+
+    Args:
+        tmp_path: Временный каталог для кадров.
+        benchmark_options: Параметры бенчмарков.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    count = get_settings().fastAPI.SAVE_FRAMES_COUNT
+    for video_path in _video_paths():
+        _, frames, _ = extract_frame(video_path, 0, count)
+        for frame_format in FRAME_FORMATS:
+            ext = frame_extension(frame_format)
+            params = encode_params(frame_format)
+            latencies = []
+            for i in range(benchmark_options.repeat):
+                frame_paths = [os.path.join(tmp_path, f'{i}-{x}.{ext}') for x in range(len(frames))]
+                start = time.perf_counter()
+                write_frames(frames, frame_paths, params)
+                latencies.append(time.perf_counter() - start)
+            total_bytes = sum(os.path.getsize(x) for x in frame_paths)
+            benchmark_report.add(
+                f'write_frames/{os.path.basename(video_path)}/{frame_format}',
+                latencies,
+                frames=len(frames),
+                bytes_per_frame=total_bytes // len(frames),
+            )
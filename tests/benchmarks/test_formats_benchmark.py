@@ -0,0 +1,61 @@
+import glob
+import os
+import time
+from typing import TYPE_CHECKING
+
+import cv2
+import pytest
+
+from src.utils.config import get_settings
+from src.utils.save_frames import FRAME_FORMATS, encode_params, frame_extension
+
+if TYPE_CHECKING:
+    from tests.benchmarks.conftest import BenchmarkReport
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+
+def test_benchmark_frame_formats(benchmark_report: 'BenchmarkReport'):
+    """Функция сравнивает время кодирования и размер кадра в поддерживаемых форматах
+       с параметрами из конфигурационного файла на тестовых видеофайлах.
+
+    Args:
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    config = get_settings()
+    count = config.fastAPI.SAVE_FRAMES_COUNT
+    video_paths = sorted(glob.glob(os.path.join(config.fastAPI.VIDEOS_DIR_PATH, '*.mp4')))
+
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        while len(frames) < count:
+            success, frame = cap.read()
+            if not success:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            continue
+
+        height, width = frames[0].shape[:2]
+        # пиковый размер памяти замеров отсчитывается после чтения кадров
+        benchmark_report.rss_sampler.reset()
+        for frame_format in FRAME_FORMATS:
+            ext = '.' + frame_extension(frame_format)
+            params = encode_params(frame_format)
+            total_bytes = 0
+            latencies = []
+            for frame in frames:
+                start = time.perf_counter()
+                success, buffer = cv2.imencode(ext, frame, params)
+                latencies.append(time.perf_counter() - start)
+                assert success
+                total_bytes += buffer.size
+            benchmark_report.add(
+                f'encode/{os.path.basename(video_path)}/{frame_format}',
+                latencies,
+                resolution=f'{width}x{height}',
+                bytes_per_frame=total_bytes // len(frames),
+            )
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple, TYPE_CHECKING
+
+import httpx
+import pytest
+
+from src.models import async_engine
+from src.utils.config import get_settings
+from src.utils.video_capture import get_video_metadata
+from tests.conftest import create_frame_service_information
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+    from sqlalchemy import Engine
+    from tests.benchmarks.conftest import BenchmarkOptions, BenchmarkReport
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+# доли запросов каждого сценария нагрузки
+SCENARIOS = {
+    'videos': 0.1,
+    'frames_cached': 0.4,
+    'frames_uncached': 0.2,
+    'frames_stream': 0.1,
+    'saved_frames': 0.2,
+}
+VIDEO_FILE_NAME = 'sample-3.mp4'
+
+
+def _plan_requests(requests: int, frame_count: int, seed: int = 0) -> List[Tuple[str, str]]:
+    """Функция составляет воспроизводимый список запросов нагрузочного теста.
+
+    Args:
+        requests: Число запросов.
+        frame_count: Число кадров в видеофайле.
+        seed: Начальное значение генератора случайных чисел.
+
+    Returns:
+        Список пар: сценарий и адрес запроса.
+    """
+    rng = random.Random(seed)
+    count = get_settings().fastAPI.SAVE_FRAMES_COUNT
+    names = list(SCENARIOS)
+    plan = []
+    for name in rng.choices(names, weights=[SCENARIOS[x] for x in names], k=requests):
+        if name == 'videos':
+            url = '/api/videos?with_metadata=true'
+        elif name == 'frames_cached':
+            url = f'/api/frames?file_name={VIDEO_FILE_NAME}&frame_number=0'
+        elif name == 'frames_uncached':
+            url = f'/api/frames?file_name={VIDEO_FILE_NAME}&frame_number={rng.randrange(frame_count - count)}'
+        elif name == 'frames_stream':
+            url = f'/api/frames/stream?file_name={VIDEO_FILE_NAME}&frame_number={rng.randrange(frame_count - count)}'
+        else:
+            url = '/api/saved_frames?limit=50'
+        plan.append((name, url))
+    return plan
+
+
+async def _run_load(
+        app: 'FastAPI',
+        plan: List[Tuple[str, str]],
+        concurrency: int
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """Функция выполняет запросы через интерфейс ASGI приложения с указанным числом одновременных запросов.
+
+    Args:
+        app: FastAPI приложение.
+        plan: Список пар: сценарий и адрес запроса.
+        concurrency: Число одновременных запросов.
+
+    Returns:
+        Длительности запросов и число ошибок по сценариям, общее время.
+    """
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    queue: 'asyncio.Queue[Tuple[str, str]]' = asyncio.Queue()
+    for item in plan:
+        queue.put_nowait(item)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            name, url = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get(url)
+            await response.aread()
+            latencies[name].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors[name] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    finally:
+        # подключения пула привязаны к циклу событий, который завершится вместе с тестом
+        await async_engine.dispose()
+    return latencies, errors, elapsed
+
+
+def test_benchmark_load(
+        app: 'FastAPI',
+        engine: 'Engine',
+        clean_frames_dir: None,
+        benchmark_options: 'BenchmarkOptions',
+        benchmark_report: 'BenchmarkReport'
+):
+    """Функция измеряет задержки и пропускную способность приложения под нагрузкой смешанными запросами.
+
+    Запросы выполняются внутри процесса через интерфейс ASGI, без сети, с базой данных
+    из SQLALCHEMY_DATABASE_URI (по умолчанию SQLite). Ответы с ошибкой (например, 503 при
+    заполненной очереди декодирования) не прерывают замер и учитываются в поле errors.
+
+    Args:
+        app: FastAPI приложение.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+        benchmark_options: Параметры бенчмарков.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    config = get_settings()
+    for frame_number in range(1, 501):
+        create_frame_service_information(
+            engine, VIDEO_FILE_NAME, frame_number,
+            os.path.join(config.fastAPI.FRAMES_DIR_PATH, VIDEO_FILE_NAME, f'{frame_number}.png')
+        )
+    frame_count = get_video_metadata(os.path.join(config.fastAPI.VIDEOS_DIR_PATH, VIDEO_FILE_NAME)).frame_count
+    plan = _plan_requests(benchmark_options.requests, frame_count)
+
+    latencies, errors, elapsed = asyncio.run(_run_load(app, plan, benchmark_options.concurrency))
+
+    all_latencies = [x for values in latencies.values() for x in values]
+    benchmark_report.add(
+        f'load/concurrency={benchmark_options.concurrency}',
+        all_latencies,
+        elapsed,
+        errors=sum(errors.values()),
+    )
+    for (name, values) in sorted(latencies.items()):
+        benchmark_report.add(
+            f'load/concurrency={benchmark_options.concurrency}/{name}',
+            values,
+            errors=errors[name],
+        )
@@ -0,0 +1,49 @@
+import os
+import time
+from typing import TYPE_CHECKING
+
+import pytest
+
+from src.utils.metrics import DECODE_STAGE, frames_decoded, timed
+
+if TYPE_CHECKING:
+    from tests.benchmarks.conftest import BenchmarkOptions, BenchmarkReport
+
+
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+
+def test_benchmark_metrics_overhead(benchmark_options: 'BenchmarkOptions', benchmark_report: 'BenchmarkReport'):
+    """Функция измеряет накладные расходы таймера этапа и счётчика на один кадр.
+
+    Для сравнения: декодирование кадра 640x360 занимает порядка миллисекунды.
+
+    Args:
+        benchmark_options: Параметры бенчмарков.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    count = 200_000
+
+    latencies = []
+    overheads = []
+    for _ in range(benchmark_options.repeat):
+        start = time.perf_counter()
+        for _ in range(count):
+            pass
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(count):
+            with timed(DECODE_STAGE):
+                pass
+            frames_decoded.inc()
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        overheads.append(elapsed - baseline)
+
+    benchmark_report.add(
+        'metrics_overhead',
+        latencies,
+        iterations=count,
+        overhead_us_per_frame=round(min(overheads) / count * 1e6, 3),
+    )
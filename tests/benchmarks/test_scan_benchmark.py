@@ -0,0 +1,130 @@
+import glob
+import multiprocessing
+import os
+import platform
+import resource
+import time
+from typing import Any, Dict, List, TYPE_CHECKING
+
+import cv2
+import pytest
+
+from src.utils.config import get_settings
+from src.utils.get_frames import _scan_frames
+
+if TYPE_CHECKING:
+    from numpy import ndarray
+    from tests.benchmarks.conftest import BenchmarkOptions, BenchmarkReport
+
+
+# бенчмарки долгие, поэтому запускаются только по явному запросу: RUN_BENCHMARKS=1 pytest -s tests/benchmarks
+pytestmark = pytest.mark.skipif(not os.getenv('RUN_BENCHMARKS'), reason='RUN_BENCHMARKS is not set')
+
+
+def _read_scan_frames(
+        cap: cv2.VideoCapture,
+        start_position: float,
+        total_frames: int,
+        count: int
+) -> List['ndarray']:
+    """Прежний вариант последовательного чтения: каждый кадр до диапазона декодируется в изображение (read).
+    """
+    frame_counter = 0
+    images = []
+    while frame_counter < total_frames:
+        success, image = cap.read()
+        frame_counter += 1
+        if not success:
+            continue
+        if start_position + count < frame_counter:
+            break
+
+        if start_position < frame_counter:
+            images.append(image)
+    return images
+
+
+SCANS = {
+    'read': _read_scan_frames,
+    'grab': _scan_frames,
+}
+
+
+def _run_scan(scan_name: str, video_path: str, count: int, repeat: int, queue: multiprocessing.Queue) -> None:
+    """Выполняет последовательное чтение в отдельном процессе, чтобы пиковый RSS относился только к нему.
+
+    Args:
+        scan_name: Вариант последовательного чтения.
+        video_path: Полный путь к видеофайлу.
+        count: Число извлекаемых кадров.
+        repeat: Число повторов замера.
+        queue: Очередь для передачи результатов замера.
+    """
+    latencies = []
+    cpu_start = time.process_time()
+    for _ in range(repeat):
+        cap = cv2.VideoCapture(video_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        # окно в конце файла: худший случай для последовательного чтения
+        start_position = max(total_frames - count - 1, 0)
+        start = time.perf_counter()
+        images = SCANS[scan_name](cap, start_position, total_frames, count)
+        latencies.append(time.perf_counter() - start)
+        cap.release()
+    cpu_time = time.process_time() - cpu_start
+
+    queue.put({
+        'latencies': latencies,
+        'frames': len(images),
+        'cpu_time_s': round(cpu_time / repeat, 4),
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+    })
+
+
+def _peak_rss_mb() -> float:
+    """Возвращает пиковый размер резидентной памяти процесса замера в мегабайтах.
+    """
+    # в macOS ru_maxrss в байтах
+    scale = 1024 * 1024 if platform.system() == 'Darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def _measure(scan_name: str, video_path: str, count: int, repeat: int) -> Dict[str, Any]:
+    """Запускает замер в новом процессе и возвращает его результаты.
+    """
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run_scan, args=(scan_name, video_path, count, repeat, queue))
+    process.start()
+    result = queue.get(timeout=600)
+    process.join()
+    return result
+
+
+def test_benchmark_scan_read_vs_grab(benchmark_options: 'BenchmarkOptions', benchmark_report: 'BenchmarkReport'):
+    """Функция сравнивает время, затраты процессорного времени и пиковый RSS прежнего (read)
+       и нового (grab/retrieve) последовательного чтения на тестовых видеофайлах.
+
+    Каждый вариант выполняется в отдельном процессе, поэтому пиковый RSS (ru_maxrss процесса замера)
+    относится только к этому замеру.
+
+    Args:
+        benchmark_options: Параметры бенчмарков.
+        benchmark_report: Результаты бенчмарков сессии.
+    """
+    config = get_settings()
+    count = config.fastAPI.SAVE_FRAMES_COUNT
+    video_paths = sorted(glob.glob(os.path.join(config.fastAPI.VIDEOS_DIR_PATH, '*.mp4')))
+
+    for video_path in video_paths:
+        cap = cv2.VideoCapture(video_path)
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        # окно в конце файла нельзя выбрать, если контейнер не сообщает число кадров
+        if frame_count <= 0:
+            continue
+        results = {name: _measure(name, video_path, count, benchmark_options.repeat) for name in SCANS}
+        assert results['read']['frames'] == results['grab']['frames']
+        for (name, result) in results.items():
+            latencies = result.pop('latencies')
+            benchmark_report.add(f'scan/{os.path.basename(video_path)}/{name}', latencies, **result)
@@ -1,13 +1,19 @@
 import os
 import shutil
-from typing import TYPE_CHECKING
+import tempfile
+from typing import Iterator, TYPE_CHECKING
+
+# без адреса базы данных тесты и бенчмарки выполняются с SQLite вместо PostgreSQL
+os.environ.setdefault(
+    'SQLALCHEMY_DATABASE_URI', 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'frame_service_test.db')
+)
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine, insert
 
 from src import create_fastAPI_app
-from src.utils.config import Config
+from src.utils.config import get_settings, load_settings
 from src.models import metadata
 from src.models import frame_service_informations
 
@@ -23,8 +29,10 @@ def app() -> 'FastAPI':
     Returns:
         FastAPI приложение.
     """
-    config = Config('config.yaml')
-    app = create_fastAPI_app(config.fastAPI)
+    settings = load_settings('config.yaml')
+    # фоновое заполнение video_metadata конкурировало бы с очисткой БД в тестах
+    settings.fastAPI.VIDEO_PROBER_ENABLED = False
+    app = create_fastAPI_app(settings)
     return app
 
 
@@ -43,24 +51,28 @@ def engine() -> 'Engine':
 
 
 @pytest.fixture(scope="function")
-def client(app: 'FastAPI') -> TestClient:
+def client(app: 'FastAPI') -> Iterator[TestClient]:
     """Функция для создания тестового клиента.
 
+    Клиент выполняет все запросы теста в одном цикле событий и вызывает обработчики
+    запуска и остановки приложения, которые закрывают пул асинхронных подключений к БД.
+
     Args:
         app: FastAPI приложение.
 
-    Returns:
+    Yields:
         Тестовый клиент.
     """
-    return TestClient(app)
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture(scope="function")
 def clean_frames_dir() -> None:
     """Функция для удаления всех файлов и каталогов из указанного в конфигурационном файле каталога с сохранёнными фреймами.
     """
-    config = Config()
-    frames_dir_path = config.fastAPI['FRAMES_DIR_PATH']
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
     for dir_name in os.listdir(frames_dir_path):
         dir_path = os.path.join(frames_dir_path, dir_name)
         shutil.rmtree(dir_path)
@@ -71,6 +83,7 @@ def create_frame_service_information(
         video_file_name: str,
         frame_number: int,
         frame_file_path: str,
+        frame_format: str = 'png',
 ) -> None:
     """Функция для добавления в базу данных строки со служебной информацией о вырезанном кадре.
 
@@ -79,12 +92,14 @@ def create_frame_service_information(
         video_file_name: Имя исходного видеофайла.
         frame_number: Порядковый номер вырезанного кадра от начала файла.
         frame_file_path: Полный путь к файлу с вырезанный кадром.
+        frame_format: Формат файла с кадром.
     """
     with engine.connect() as conn:
         stmt = insert(frame_service_informations).values(
             video_file_name=video_file_name,
             frame_number=frame_number,
-            frame_file_path=frame_file_path
+            frame_file_path=frame_file_path,
+            frame_format=frame_format
         )
         conn.execute(stmt)
         conn.commit()
@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+from sqlalchemy import event, text
+
+from src.models import async_engine, connect_async, pool_wait_stats
+
+
+def test_connect_async_pool_wait_excludes_connect():
+    """Функция проверяет, что время открытия нового подключения не входит в ожидание подключения из пула.
+    """
+    def slow_connect(dialect, connection_record, cargs, cparams) -> None:
+        time.sleep(0.2)
+
+    async def query() -> int:
+        async with connect_async() as conn:
+            return (await conn.execute(text('SELECT 1'))).scalar()
+
+    async def run() -> int:
+        # пул пуст, поэтому для запроса открывается новое подключение
+        await async_engine.dispose()
+        return await query()
+
+    count, total = pool_wait_stats.count, pool_wait_stats.total
+    event.listen(async_engine.sync_engine, 'do_connect', slow_connect)
+    try:
+        start = time.perf_counter()
+        assert asyncio.run(run()) == 1
+        assert time.perf_counter() - start >= 0.2
+    finally:
+        event.remove(async_engine.sync_engine, 'do_connect', slow_connect)
+
+    assert pool_wait_stats.count == count + 1
+    assert pool_wait_stats.total - total < 0.1
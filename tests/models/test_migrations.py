@@ -0,0 +1,50 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import create_engine, inspect, text
+
+from src.models.migrations import MIGRATIONS, migrate
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_migrate_legacy_database(tmp_path: 'Path'):
+    """Функция проверяет применение изменений схемы к базе данных, созданной до появления изменений.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    engine = create_engine(f'sqlite:///{tmp_path / "legacy.db"}')
+    with engine.begin() as conn:
+        conn.execute(text(
+            'CREATE TABLE frame_service_information ('
+            'video_file_name VARCHAR NOT NULL, frame_number INTEGER NOT NULL, frame_file_path VARCHAR NOT NULL, '
+            'PRIMARY KEY (video_file_name, frame_number))'
+        ))
+        conn.execute(text("INSERT INTO frame_service_information VALUES ('a.mp4', 1, '/frames/a.mp4/1.png')"))
+
+    assert migrate(engine) == [x.version for x in MIGRATIONS]
+
+    inspector = inspect(engine)
+    columns = {x['name'] for x in inspector.get_columns('frame_service_information')}
+    assert {'frame_format', 'variants'} <= columns
+    indexes = {x['name'] for x in inspector.get_indexes('frame_service_information')}
+    assert 'ix_frame_service_information_frame_number' in indexes
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT frame_format FROM frame_service_information')).scalar() == 'png'
+
+    # повторный запуск не применяет изменения
+    assert migrate(engine) == []
+
+
+def test_migrate_empty_database(tmp_path: 'Path'):
+    """Функция проверяет создание схемы в пустой базе данных.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    engine = create_engine(f'sqlite:///{tmp_path / "empty.db"}')
+    assert migrate(engine) == [x.version for x in MIGRATIONS]
+    assert 'frame_service_information' in inspect(engine).get_table_names()
+    assert 'extraction_job' in inspect(engine).get_table_names()
+
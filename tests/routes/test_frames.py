@@ -1,10 +1,27 @@
+import asyncio
+import io
 import os
+import shutil
+import time
+import zipfile
+from concurrent.futures import Future
+from types import SimpleNamespace
 from typing import TYPE_CHECKING
 
-from src.utils.config import Config
+import cv2
+import httpx
+import numpy as np
+
+from src.routes import frames as frames_route
+from src.utils.config import get_settings
+from src.utils.get_frames import extract_and_save_frames
+from src.utils.video_index import get_video_digests
 
 if TYPE_CHECKING:
+    import pytest
+    from fastapi import FastAPI
     from fastapi.testclient import TestClient
+    from sqlalchemy import Engine
 
 
 def test_route_frames_empty_query(client: 'TestClient'):
@@ -131,9 +148,9 @@ def test_route_frames_file_name_with_space(client: 'TestClient'):
     Args:
         client: Тестовый клиент.
     """
-    config = Config()
-    frames_dir_path = config.fastAPI['FRAMES_DIR_PATH']
-    save_frames_count = config.fastAPI['SAVE_FRAMES_COUNT']
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
 
     response = client.get(f'/api/frames?file_name=sample 0.mp4&time_in_video=1')
     assert response.status_code == 200
@@ -156,9 +173,9 @@ def test_route_frames_en_filename_sec_0(client: 'TestClient', clean_frames_dir:
         client: Тестовый клиент.
         clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
     """
-    config = Config()
-    frames_dir_path = config.fastAPI['FRAMES_DIR_PATH']
-    save_frames_count = config.fastAPI['SAVE_FRAMES_COUNT']
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
 
     response = client.get('/api/frames?file_name=sample-1.mp4&time_in_video=0')
     assert response.status_code == 200
@@ -194,9 +211,9 @@ def test_route_frames_en_filename_sec_2_fps_30(client: 'TestClient', clean_frame
         client: Тестовый клиент.
         clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
     """
-    config = Config()
-    frames_dir_path = config.fastAPI['FRAMES_DIR_PATH']
-    save_frames_count = config.fastAPI['SAVE_FRAMES_COUNT']
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
 
     response = client.get('/api/frames?file_name=sample-1.mp4&time_in_video=2')
     assert response.status_code == 200
@@ -254,9 +271,9 @@ def test_route_frames_ru_filename_sec_0(client: 'TestClient', clean_frames_dir:
         client: Тестовый клиент.
         clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
     """
-    config = Config()
-    frames_dir_path = config.fastAPI['FRAMES_DIR_PATH']
-    save_frames_count = config.fastAPI['SAVE_FRAMES_COUNT']
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
 
     response = client.get('/api/frames?file_name=пример-1.mp4&time_in_video=0')
     assert response.status_code == 200
@@ -284,3 +301,532 @@ def test_route_frames_ru_filename_sec_0(client: 'TestClient', clean_frames_dir:
     }
     file_names = set( os.listdir(f"{frames_dir_path}/пример-1.mp4") )
     assert file_names == set( f"{i}.png" for i in range(save_frames_count) )
+
+
+def test_route_frames_extraction_method(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет, что при поддерживающем позиционирование контейнере кадры извлекаются без чтения с начала файла.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=20')
+    assert response.status_code == 200
+    assert response.json()['first_frame'] == 600
+    assert response.headers['X-Extraction-Method'] == 'seek'
+
+
+def test_route_frames_cache(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет, что повторный запрос возвращает ранее сохранённые кадры без декодирования,
+       удалённые из каталога видеофайла кадры берутся из хранилища кадров, а удалённые
+       и из хранилища кадры извлекаются заново.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    # хеш содержимого вычисляется в фоне, без него кадры не добавляются в хранилище кадров
+    video_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+    get_video_digests().compute('sample-3.mp4', os.path.join(video_dir_path, 'sample-3.mp4'))
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'seek'
+    file_paths = response.json()['file_paths']
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'cache'
+    assert response.json() == {"first_frame": 90, "file_paths": file_paths}
+
+    os.remove(file_paths[-1])
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'dedup'
+    assert os.path.isfile(file_paths[-1])
+
+    os.remove(file_paths[-1])
+    shutil.rmtree(os.path.join(os.path.dirname(os.path.dirname(file_paths[-1])), '.objects'))
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'seek'
+    assert os.path.isfile(file_paths[-1])
+
+
+def test_route_frames_dedup(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет, что кадры видеофайла с тем же содержимым и другим именем не декодируются повторно,
+       а файлы с кадрами являются ссылками на одни и те же данные.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    video_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+    for file_name in ('sample-3.mp4', 'пример-1.mp4'):
+        get_video_digests().compute(file_name, os.path.join(video_dir_path, file_name))
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=90&count=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'seek'
+    file_paths = response.json()['file_paths']
+
+    response = client.get('/api/frames?file_name=пример-1.mp4&frame_number=90&count=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'dedup'
+    dedup_paths = response.json()['file_paths']
+    assert [os.path.basename(x) for x in dedup_paths] == ['90.png', '91.png', '92.png']
+    for (file_path, dedup_path) in zip(file_paths, dedup_paths):
+        assert os.path.dirname(dedup_path).endswith('пример-1.mp4')
+        assert os.stat(file_path).st_ino == os.stat(dedup_path).st_ino
+
+    response = client.get('/api/frames?file_name=пример-1.mp4&frame_number=90&count=3')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'cache'
+
+
+def test_route_frames_formats(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет сохранение кадров в форматах, указанных в параметре format.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+
+    for (frame_format, ext) in [('jpeg', 'jpg'), ('webp', 'webp'), ('png', 'png')]:
+        response = client.get(f'/api/frames?file_name=sample-3.mp4&time_in_video=1&format={frame_format}')
+        assert response.status_code == 200
+        assert response.json()['file_paths'] == [
+            f"{frames_dir_path}/sample-3.mp4/{i}.{ext}"
+            for i in range(30, 30 + save_frames_count)
+        ]
+    file_names = set( os.listdir(f"{frames_dir_path}/sample-3.mp4") )
+    assert len(file_names) == 3 * save_frames_count
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=1&format=bmp')
+    assert response.status_code == 422
+
+
+def test_route_frames_frame_number_and_time_ms(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет извлечение кадров по номеру первого кадра и по времени в миллисекундах
+       с указанным числом кадров.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=95&count=3')
+    assert response.status_code == 200
+    assert response.json() == {
+        "first_frame": 95,
+        "file_paths": [f"{frames_dir_path}/sample-3.mp4/{i}.png" for i in range(95, 98)]
+    }
+    assert set( os.listdir(f"{frames_dir_path}/sample-3.mp4") ) == {'95.png', '96.png', '97.png'}
+
+    # 30000/1001 кадров в секундах: кадр 30 показывается с 1001 мс
+    response = client.get('/api/frames?file_name=sample-2.mp4&time_ms=1000&count=1')
+    assert response.json()['first_frame'] == 29
+    response = client.get('/api/frames?file_name=sample-2.mp4&time_ms=1001&count=1')
+    assert response.json()['first_frame'] == 30
+    response = client.get('/api/frames?file_name=sample-2.mp4&time_in_video=10&count=1')
+    assert response.json()['first_frame'] == 299
+
+    response = client.get('/api/frames/stream?file_name=sample-3.mp4&frame_number=100&count=2')
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ['100.png', '101.png']
+
+
+def test_route_frames_window_params_errors(client: 'TestClient'):
+    """Функция проверяет ответ сервера по маршруту /api/frames при недопустимом задании диапазона кадров.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    message = {'message': 'Exactly one of time_in_video, time_ms and frame_number is required.'}
+    response = client.get('/api/frames?file_name=sample-3.mp4')
+    assert response.status_code == 400
+    assert response.json() == message
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=1&frame_number=30')
+    assert response.status_code == 400
+    assert response.json() == message
+
+    max_frames_count = get_settings().fastAPI.MAX_FRAMES_COUNT
+    response = client.get(f'/api/frames?file_name=sample-3.mp4&frame_number=0&count={max_frames_count + 1}')
+    assert response.status_code == 400
+    assert response.json() == {'count': 'Too many frames requested.'}
+
+    response = client.get('/api/frames/stream?file_name=sample-3.mp4&frame_number=0&count=0')
+    assert response.status_code == 422
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=895&count=10')
+    assert response.status_code == 500
+    assert response.json() == {"message": "Failed to extract frames."}
+
+
+def test_route_frames_resize(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет уменьшение кадров по параметрам width, height и max_side
+       и получение уменьшенных кадров из ранее сохранённых кадров большего размера.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=10&count=2&max_side=320')
+    assert response.status_code == 200
+    assert response.json() == {
+        "first_frame": 10,
+        "file_paths": [f"{frames_dir_path}/sample-3.mp4/{i}_320x180.png" for i in (10, 11)]
+    }
+    frame = cv2.imread(response.json()['file_paths'][0])
+    assert frame.shape == (180, 320, 3)
+
+    # уменьшенные кадры получаются из сохранённых кадров большего размера без декодирования
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=10&count=2&height=90')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'resize'
+    assert response.json()['file_paths'][0].endswith('/10_160x90.png')
+
+    # кадры не увеличиваются
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=10&count=2&width=1280')
+    assert response.headers['X-Extraction-Method'] == 'seek'
+    assert response.json()['file_paths'][0].endswith('/10.png')
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=10&count=2&max_side=0')
+    assert response.status_code == 422
+
+
+def test_route_frames_variants(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет сохранение копий кадров всех размеров за один проход.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
+    dir_path = f"{frames_dir_path}/sample-1.mp4"
+
+    response = client.get('/api/frames?file_name=sample-1.mp4&frame_number=0&count=2&variants=true')
+    assert response.status_code == 200
+    assert response.json() == {
+        "first_frame": 0,
+        "file_paths": [f"{dir_path}/0.png", f"{dir_path}/1.png"],
+        "variants": {
+            "thumb": {
+                "width": 320, "height": 180,
+                "file_paths": [f"{dir_path}/0_320x180.png", f"{dir_path}/1_320x180.png"]
+            },
+            "medium": {
+                "width": 960, "height": 540,
+                "file_paths": [f"{dir_path}/0_960x540.png", f"{dir_path}/1_960x540.png"]
+            },
+            "full": {
+                "width": 1920, "height": 1080,
+                "file_paths": [f"{dir_path}/0.png", f"{dir_path}/1.png"]
+            },
+        }
+    }
+    assert len(os.listdir(dir_path)) == 6
+
+    response = client.get('/api/frames?file_name=sample-1.mp4&frame_number=0&count=2&max_side=320')
+    assert response.headers['X-Extraction-Method'] == 'cache'
+    assert response.json()['file_paths'] == [f"{dir_path}/0_320x180.png", f"{dir_path}/1_320x180.png"]
+
+
+def test_route_frames_stream_zip(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет потоковую выдачу кадров в ZIP-архиве без сохранения на диск.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+
+    response = client.get('/api/frames/stream?file_name=sample-3.mp4&time_in_video=2&format=jpeg')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/zip'
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == [f'{i}.jpg' for i in range(60, 60 + save_frames_count)]
+        image = cv2.imdecode(np.frombuffer(archive.read('60.jpg'), np.uint8), cv2.IMREAD_COLOR)
+        assert image.shape == (360, 640, 3)
+    assert not os.path.exists(f"{frames_dir_path}/sample-3.mp4")
+
+
+def test_route_frames_stream_multipart_persist(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет потоковую выдачу кадров в теле multipart/mixed с сохранением кадров на диск.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+
+    response = client.get('/api/frames/stream?file_name=sample-3.mp4&time_in_video=0&archive=multipart&persist=true')
+    assert response.status_code == 200
+    media_type, boundary = response.headers['Content-Type'].split('; boundary=')
+    assert media_type == 'multipart/mixed'
+    assert response.content.count(f'--{boundary}\r\n'.encode()) == save_frames_count
+    assert response.content.endswith(f'--{boundary}--\r\n'.encode())
+
+    file_names = set( os.listdir(f"{frames_dir_path}/sample-3.mp4") )
+    assert file_names == set( f"{i}.png" for i in range(save_frames_count) )
+
+    # сохранённые кадры доступны через /api/frames без декодирования
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=0')
+    assert response.headers['X-Extraction-Method'] == 'cache'
+
+
+def test_route_frames_stream_errors(client: 'TestClient'):
+    """Функция проверяет ответ сервера по маршруту /api/frames/stream при невозможности извлечь кадры.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    response = client.get('/api/frames/stream?file_name=404&time_in_video=1')
+    assert response.status_code == 400
+
+    response = client.get('/api/frames/stream?file_name=sample-1.mp4&time_in_video=999999')
+    assert response.status_code == 500
+    assert response.json() == {
+        "message": "Failed to extract frames."
+    }
+
+
+def test_route_frames_batch(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет извлечение нескольких диапазонов кадров одним запросом.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    config = get_settings()
+    frames_dir_path = config.fastAPI.FRAMES_DIR_PATH
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+
+    # диапазон, извлечённый ранее, возвращается из кеша
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=20')
+    assert response.status_code == 200
+
+    response = client.post('/api/frames/batch', json={
+        'file_name': 'sample-3.mp4',
+        'times': [1, 20, 0],
+        'first_frames': [5, 895],
+    })
+    assert response.status_code == 200
+    expected_first_frames = [30, 600, 0, 5]
+    assert response.json() == [
+        {
+            "first_frame": first_frame,
+            "file_paths": [
+                f"{frames_dir_path}/sample-3.mp4/{i}.png"
+                for i in range(first_frame, first_frame + save_frames_count)
+            ]
+        }
+        for first_frame in expected_first_frames
+    ] + [
+        {"first_frame": 895, "file_paths": [], "message": "Failed to extract frames."}
+    ]
+    file_names = set( os.listdir(f"{frames_dir_path}/sample-3.mp4") )
+    assert file_names == set(
+        f"{i}.png"
+        for first_frame in expected_first_frames
+        for i in range(first_frame, first_frame + save_frames_count)
+    )
+
+
+def test_route_frames_batch_errors(client: 'TestClient'):
+    """Функция проверяет ответ сервера по маршруту /api/frames/batch при недопустимых параметрах.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    response = client.post('/api/frames/batch', json={'file_name': '404', 'times': [1]})
+    assert response.status_code == 400
+    assert response.json() == {"file_name": "File doesn't exist."}
+
+    response = client.post('/api/frames/batch', json={'file_name': 'sample-3.mp4', 'times': [-1]})
+    assert response.status_code == 422
+
+    max_windows = get_settings().fastAPI.BATCH_MAX_WINDOWS
+    response = client.post('/api/frames/batch', json={'file_name': 'sample-3.mp4', 'first_frames': list(range(max_windows + 1))})
+    assert response.status_code == 400
+
+
+def test_route_frames_scenes(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет выбор и сохранение кадров на границах сцен по маршруту /api/frames/scenes.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/api/frames/scenes?file_name=sample-2.mp4&count=4&min_distance=20&format=jpeg')
+    assert response.status_code == 200
+    frames = response.json()
+    assert len(frames) == 4
+    assert frames[0]['frame_number'] == 0
+    assert frames[0]['score'] == 1
+
+    frame_numbers = [x['frame_number'] for x in frames]
+    assert frame_numbers == sorted(frame_numbers)
+    assert all(b - a >= 20 for (a, b) in zip(frame_numbers, frame_numbers[1:]))
+    frame_dir = os.path.join(get_settings().fastAPI.FRAMES_DIR_PATH, 'sample-2.mp4')
+    for frame in frames:
+        assert 0 <= frame['score'] <= 1
+        assert frame['file_path'] == os.path.join(frame_dir, f"{frame['frame_number']}.jpg")
+        assert cv2.imread(frame['file_path']).shape == (540, 960, 3)
+
+    # сохранённые кадры возвращаются /api/frames без декодирования
+    response = client.get(f'/api/frames?file_name=sample-2.mp4&frame_number={frame_numbers[1]}&count=1&format=jpeg')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'cache'
+
+
+def test_route_frames_scenes_in_progress(client: 'TestClient', monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет ответ 202 по маршруту /api/frames/scenes, если оценка кадров не завершилась
+       за DECODE_TIMEOUT, и продолжение оценки после ответа.
+
+    Args:
+        client: Тестовый клиент.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    scan = Future()
+    monkeypatch.setattr(frames_route, 'get_scene_score_store', lambda: SimpleNamespace(scan=lambda *args: scan))
+    monkeypatch.setattr(get_settings().fastAPI, 'DECODE_TIMEOUT', 0.1)
+
+    response = client.get('/api/frames/scenes?file_name=sample-2.mp4&count=2')
+    assert response.status_code == 202
+    assert response.json() == {'message': 'Scene analysis in progress.'}
+    assert response.headers['Retry-After'] == str(get_settings().fastAPI.DECODE_RETRY_AFTER)
+    assert not scan.cancelled()
+
+
+def test_route_frames_scenes_errors(client: 'TestClient'):
+    """Функция проверяет ответ сервера по маршруту /api/frames/scenes при недопустимых параметрах.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    response = client.get('/api/frames/scenes?file_name=404')
+    assert response.status_code == 400
+    assert response.json() == {"file_name": "File doesn't exist."}
+
+    response = client.get('/api/frames/scenes?file_name=sample-3.mp4&metric=unknown')
+    assert response.status_code == 422
+
+    max_count = get_settings().fastAPI.MAX_FRAMES_COUNT
+    response = client.get(f'/api/frames/scenes?file_name=sample-3.mp4&count={max_count + 1}')
+    assert response.status_code == 400
+    assert response.json() == {'count': 'Too many frames requested.'}
+
+
+def test_route_frames_jobs(client: 'TestClient', engine: 'Engine', clean_frames_dir: None):
+    """Функция проверяет выполнение задания извлечения кадров в фоне и получение его результата.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    body = {'file_name': 'sample-2.mp4', 'time_in_video': 2, 'count': 200, 'max_side': 320, 'priority': 5}
+    response = client.post('/api/frames/jobs', json=body)
+    assert response.status_code == 202
+    job_id = response.json()['job_id']
+    assert response.json() == {'job_id': job_id, 'status': 'queued'}
+    assert response.headers['Location'] == f'/api/frames/jobs/{job_id}'
+
+    deadline = time.monotonic() + 60
+    while True:
+        response = client.get(f'/api/frames/jobs/{job_id}')
+        assert response.status_code == 200
+        job = response.json()
+        assert 0 <= job['frames_decoded'] <= job['frames_total'] == 200
+        if job['status'] not in ('queued', 'running') or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+
+    assert job['status'] == 'done'
+    assert job['file_name'] == 'sample-2.mp4'
+    assert job['priority'] == 5
+    assert job['frames_decoded'] == 200
+    assert job['first_frame'] == 59
+    assert len(job['file_paths']) == 200
+    assert os.path.basename(job['file_paths'][0]) == '59_320x180.png'
+
+    # кадры задания возвращаются /api/frames без декодирования
+    response = client.get('/api/frames?file_name=sample-2.mp4&time_in_video=2&count=200&max_side=320')
+    assert response.status_code == 200
+    assert response.headers['X-Extraction-Method'] == 'cache'
+    assert response.json() == {'first_frame': job['first_frame'], 'file_paths': job['file_paths']}
+
+
+def test_route_frames_jobs_errors(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет ответ сервера по маршрутам /api/frames/jobs при недопустимых параметрах.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    response = client.get('/api/frames/jobs/404')
+    assert response.status_code == 404
+    assert response.json() == {'message': "Job doesn't exist."}
+
+    response = client.post('/api/frames/jobs', json={'file_name': '404', 'frame_number': 0})
+    assert response.status_code == 400
+    assert response.json() == {'file_name': "File doesn't exist."}
+
+    response = client.post('/api/frames/jobs', json={'file_name': 'sample-3.mp4'})
+    assert response.status_code == 400
+
+    max_count = get_settings().fastAPI.JOB_MAX_FRAMES_COUNT
+    response = client.post('/api/frames/jobs', json={'file_name': 'sample-3.mp4', 'frame_number': 0, 'count': max_count + 1})
+    assert response.status_code == 400
+    assert response.json() == {'count': 'Too many frames requested.'}
+
+    response = client.post('/api/frames/jobs', json={'file_name': 'sample-3.mp4', 'frame_number': 0, 'priority': 101})
+    assert response.status_code == 422
+
+    response = client.post('/api/frames/jobs', json={'file_name': 'sample-3.mp4', 'frame_number': 900, 'count': 2})
+    assert response.status_code == 500
+
+
+def test_route_frames_concurrent_requests(
+        app: 'FastAPI',
+        clean_frames_dir: None,
+        monkeypatch: 'pytest.MonkeyPatch'
+):
+    """Функция проверяет, что одновременные одинаковые запросы извлекают кадры один раз.
+
+    Args:
+        app: FastAPI приложение.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    calls = []
+
+    def slow_extract_and_save_frames(*args):
+        calls.append(args)
+        time.sleep(0.2)
+        return extract_and_save_frames(*args)
+
+    monkeypatch.setattr(frames_route, 'extract_and_save_frames', slow_extract_and_save_frames)
+
+    async def main() -> list:
+        async with httpx.AsyncClient(app=app, base_url='http://testserver') as client:
+            return await asyncio.gather(*[
+                client.get('/api/frames?file_name=sample-3.mp4&time_in_video=4') for _ in range(8)
+            ])
+
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(x.status_code == 200 for x in responses)
+    assert all(x.json() == responses[0].json() for x in responses)
+    assert responses[0].json()['first_frame'] == 120
@@ -0,0 +1,89 @@
+import re
+from typing import TYPE_CHECKING
+
+from src.routes.metrics import collect_runtime_metrics
+from src.utils.workers import current_decode_pool, shutdown_decode_pool
+
+if TYPE_CHECKING:
+    from fastapi.testclient import TestClient
+
+
+def _sample(text: str, sample: str) -> float:
+    """Функция возвращает значение метрики из ответа в текстовом формате Prometheus.
+
+    Args:
+        text: Ответ маршрута /metrics.
+        sample: Имя метрики с метками.
+    """
+    match = re.search('^' + re.escape(sample) + r' (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match is not None else 0.0
+
+
+def test_route_metrics(client: 'TestClient', clean_frames_dir: None):
+    """Функция проверяет, что метрики этапов, счётчики кадров и состояние пулов обновляются при извлечении кадров.
+
+    Args:
+        client: Тестовый клиент.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    before = response.text
+
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=95&count=3')
+    assert response.status_code == 200
+    response = client.get('/api/frames?file_name=sample-3.mp4&frame_number=95&count=3')
+    assert response.headers['X-Extraction-Method'] == 'cache'
+    response = client.get('/api/videos')
+    assert response.status_code == 200
+
+    after = client.get('/metrics').text
+    def delta(sample: str) -> float:
+        return _sample(after, sample) - _sample(before, sample)
+
+    for stage in ('seek', 'decode', 'encode', 'write'):
+        assert delta(f'frame_service_stage_seconds_count{{stage="{stage}"}}') > 0
+    assert delta('frame_service_stage_seconds_count{stage="decode"}') == 3
+    assert delta('frame_service_frames_kept_total') == 3
+    # кадры от ключевого кадра 90 до кадра 95 декодируются без сохранения
+    assert delta('frame_service_frames_decoded_total') == 8
+    assert delta('frame_service_frame_bytes_written_total') > 0
+    assert delta('frame_service_function_seconds_count{function="get_frames"}') == 2
+    assert delta('frame_service_function_seconds_count{function="extract_frame"}') == 1
+    assert delta('frame_service_function_seconds_count{function="get_video_list"}') == 1
+    assert delta('frame_service_cache_requests_total{cache="frames",result="hit"}') == 1
+    assert 'frame_service_decode_pool_capacity ' in after
+    assert 'frame_service_db_pool_acquired_total ' in after
+    assert 'frame_service_single_flight_coalesced_total ' in after
+
+
+def test_route_metrics_db_execute(client: 'TestClient', engine):
+    """Функция проверяет учёт времени выполнения запросов к базе данных.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    before = _sample(client.get('/metrics').text, 'frame_service_stage_seconds_count{stage="db_execute"}')
+    response = client.get('/api/saved_frames')
+    assert response.status_code == 200
+    after = client.get('/metrics').text
+    assert _sample(after, 'frame_service_stage_seconds_count{stage="db_execute"}') > before
+    assert _sample(after, 'frame_service_function_seconds_count{function="get_saved_frames"}') >= 1
+
+
+def test_route_metrics_after_shutdown(client: 'TestClient'):
+    """Функция проверяет, что сбор метрик после остановки пула обработчиков не создаёт его заново.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    shutdown_decode_pool()
+    samples = [line for metric in collect_runtime_metrics() for line in metric.render()]
+    assert current_decode_pool() is None
+    assert not any(x.startswith('frame_service_decode_pool_pending ') for x in samples)
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert current_decode_pool() is None
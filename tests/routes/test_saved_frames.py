@@ -1,10 +1,14 @@
+import csv
+import io
+import json
 import os
 from typing import TYPE_CHECKING
 
 from sqlalchemy import select
 
 from tests.conftest import create_frame_service_information
-from src.utils.config import Config
+from src.utils.config import get_settings
+from src.utils.video_index import get_video_digests
 from src.models import frame_service_informations
 
 if TYPE_CHECKING:
@@ -42,23 +46,29 @@ def test_route_saved_frames_get(client: 'TestClient', app: 'FastAPI', engine: 'E
         "video_file_name": "file_name1",
         "frame_number": 1,
         "frame_file_path": "path1",
+        "frame_format": "png",
     }
     frame_service_information2 = {
         "video_file_name": "file_name2",
         "frame_number": 3,
-        "frame_file_path": "path2",
+        "frame_file_path": "path2.jpg",
+        "frame_format": "jpeg",
     }
     create_frame_service_information(engine, **frame_service_information1)
     create_frame_service_information(engine, **frame_service_information2)
+    expected = [
+        dict(frame_service_information1, variants=[]),
+        dict(frame_service_information2, variants=[]),
+    ]
 
     response = client.get('/api/saved_frames')
     assert response.status_code == 200
-    assert response.json() == [ frame_service_information1, frame_service_information2 ]
+    assert response.json() == expected
 
     # check idempotent
     response = client.get('/api/saved_frames')
     assert response.status_code == 200
-    assert response.json() == [ frame_service_information1, frame_service_information2 ]
+    assert response.json() == expected
 
 
 def test_route_saved_frames_new_file_without_body(client: 'TestClient'):
@@ -167,12 +177,14 @@ def test_route_saved_frames_create(
     }
     response = client.post('/api/saved_frames/new_frame', json=request_body)
 
-    frames_dir_path = Config().fastAPI['FRAMES_DIR_PATH']
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
     assert response.status_code == 201
     assert response.json() == {
         'file_path': 'sample-1.mp4',
         'frame_number': 1,
-        "frame_path": os.path.join(frames_dir_path, 'sample-1.mp4', '1.png')
+        "frame_path": os.path.join(frames_dir_path, 'sample-1.mp4', '1.png'),
+        "frame_format": "png",
+        "variants": []
     }
 
     # read record from database
@@ -194,3 +206,318 @@ def test_route_saved_frames_create(
     assert result[0].video_file_name == 'sample-1.mp4'
     assert result[0].frame_number == 1
     assert result[0].frame_file_path == os.path.join(frames_dir_path, 'sample-1.mp4', '1.png')
+
+
+def test_route_saved_frames_create_variants(
+        client: 'TestClient',
+        engine: 'Engine',
+        clean_frames_dir: None
+):
+    """Функция проверяет сохранение в БД путей к уменьшенным копиям сохранённого кадра.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/api/frames?file_name=sample-1.mp4&frame_number=0&count=2&variants=true')
+    assert response.status_code == 200
+
+    response = client.post('/api/saved_frames/new_frame', json={'file_path': 'sample-1.mp4', 'frame_number': 1})
+
+    dir_path = os.path.join(get_settings().fastAPI.FRAMES_DIR_PATH, 'sample-1.mp4')
+    variants = [
+        {'width': 320, 'height': 180, 'frame_path': os.path.join(dir_path, '1_320x180.png')},
+        {'width': 960, 'height': 540, 'frame_path': os.path.join(dir_path, '1_960x540.png')},
+    ]
+    assert response.status_code == 201
+    assert response.json()['variants'] == variants
+
+    with engine.connect() as conn:
+        result = conn.execute(select(frame_service_informations)).all()
+    assert result[0].variants == variants
+
+    response = client.get('/api/saved_frames')
+    assert response.json()[0]['variants'] == variants
+
+
+def test_route_saved_frames_create_dedup(
+        client: 'TestClient',
+        engine: 'Engine',
+        clean_frames_dir: None
+):
+    """Функция проверяет сохранение кадра, извлечённого из видеофайла с тем же содержимым и другим именем.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    video_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+    for file_name in ('sample-1.mp4', 'sample 0.mp4'):
+        get_video_digests().compute(file_name, os.path.join(video_dir_path, file_name))
+    response = client.get('/api/frames?file_name=sample-1.mp4&frame_number=0&count=2')
+    assert response.status_code == 200
+
+    # sample 0.mp4 совпадает по содержимому с sample-1.mp4
+    response = client.post('/api/saved_frames/new_frame', json={'file_path': 'sample 0.mp4', 'frame_number': 1})
+    frame_path = os.path.join(get_settings().fastAPI.FRAMES_DIR_PATH, 'sample 0.mp4', '1.png')
+    assert response.status_code == 201
+    assert response.json()['frame_path'] == frame_path
+    assert os.path.isfile(frame_path)
+
+    # кадр 5 не извлекался ни из одного из видеофайлов
+    response = client.post('/api/saved_frames/new_frame', json={'file_path': 'sample 0.mp4', 'frame_number': 5})
+    assert response.status_code == 400
+
+
+def test_route_saved_frames_create_jpeg(
+        client: 'TestClient',
+        engine: 'Engine',
+        clean_frames_dir: None
+):
+    """Функция проверяет сохранение в БД служебной информации о кадре в формате JPEG.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/api/frames?file_name=sample-3.mp4&time_in_video=0&format=jpeg')
+    assert response.status_code == 200
+
+    # кадр в формате PNG не извлекался
+    response = client.post('/api/saved_frames/new_frame', json={'file_path': 'sample-3.mp4', 'frame_number': 1})
+    assert response.status_code == 400
+
+    request_body = {
+        'file_path': 'sample-3.mp4',
+        'frame_number': 1,
+        'frame_format': 'jpeg'
+    }
+    response = client.post('/api/saved_frames/new_frame', json=request_body)
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
+    assert response.status_code == 201
+    assert response.json() == {
+        'file_path': 'sample-3.mp4',
+        'frame_number': 1,
+        'frame_path': os.path.join(frames_dir_path, 'sample-3.mp4', '1.jpg'),
+        'frame_format': 'jpeg',
+        'variants': []
+    }
+
+    with engine.connect() as conn:
+        result = conn.execute(select(frame_service_informations)).all()
+    assert len(result) == 1
+    assert result[0].frame_format == 'jpeg'
+
+
+def test_route_saved_frames_get_pages(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет постраничную выдачу списка сохранённых кадров по курсору.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    for (video_file_name, frame_number) in [('b.mp4', 2), ('a.mp4', 10), ('b.mp4', 1), ('a.mp4', 9), ('c.mp4', 1)]:
+        create_frame_service_information(engine, video_file_name, frame_number, f'{video_file_name}/{frame_number}.png')
+
+    keys = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {'limit': 2}
+        if cursor is not None:
+            params['cursor'] = cursor
+        response = client.get('/api/saved_frames', params=params)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        keys += [(x['video_file_name'], x['frame_number']) for x in response.json()]
+        pages += 1
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert keys == [('a.mp4', 9), ('a.mp4', 10), ('b.mp4', 1), ('b.mp4', 2), ('c.mp4', 1)]
+
+    # последняя полная страница не возвращает курсор
+    response = client.get('/api/saved_frames', params={'limit': 5})
+    assert len(response.json()) == 5
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_route_saved_frames_get_filters(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет фильтрацию списка сохранённых кадров по имени видеофайла и диапазону номеров кадров.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    for video_file_name in ['a.mp4', 'b.mp4']:
+        for frame_number in range(1, 6):
+            create_frame_service_information(engine, video_file_name, frame_number, f'{video_file_name}/{frame_number}.png')
+
+    response = client.get('/api/saved_frames', params={'video_file_name': 'b.mp4', 'frame_from': 2, 'frame_to': 4})
+    assert response.status_code == 200
+    assert [(x['video_file_name'], x['frame_number']) for x in response.json()] == [
+        ('b.mp4', 2), ('b.mp4', 3), ('b.mp4', 4)
+    ]
+
+    response = client.get('/api/saved_frames', params={'frame_from': 5})
+    assert [(x['video_file_name'], x['frame_number']) for x in response.json()] == [('a.mp4', 5), ('b.mp4', 5)]
+
+    # курсор и фильтры применяются совместно
+    response = client.get('/api/saved_frames', params={'video_file_name': 'a.mp4', 'limit': 3})
+    assert [x['frame_number'] for x in response.json()] == [1, 2, 3]
+    cursor = response.headers['X-Next-Cursor']
+    response = client.get('/api/saved_frames', params={'video_file_name': 'a.mp4', 'limit': 3, 'cursor': cursor})
+    assert [x['frame_number'] for x in response.json()] == [4, 5]
+    assert 'X-Next-Cursor' not in response.headers
+
+
+def test_route_saved_frames_get_invalid_params(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет ответ сервера на недопустимые параметры постраничной выдачи.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    response = client.get('/api/saved_frames', params={'cursor': 'not a cursor'})
+    assert response.status_code == 400
+    assert response.json() == {'cursor': 'Invalid cursor.'}
+
+    max_page_size = get_settings().fastAPI.SAVED_FRAMES_MAX_PAGE_SIZE
+    response = client.get('/api/saved_frames', params={'limit': max_page_size + 1})
+    assert response.status_code == 400
+    assert response.json() == {'message': 'Page size is too large.'}
+
+    response = client.get('/api/saved_frames', params={'limit': 0})
+    assert response.status_code == 422
+
+
+def test_route_saved_frames_export(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет потоковую выгрузку сохранённых кадров в форматах NDJSON и CSV.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    response = client.get('/api/saved_frames/export')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert response.content == b''
+
+    response = client.get('/api/saved_frames/export?format=csv')
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+    assert response.text == 'video_file_name,frame_number,frame_file_path,frame_format,variants\n'
+
+    for frame_number in range(1, 4):
+        create_frame_service_information(engine, 'пример-1.mp4', frame_number, f'/frames/{frame_number}.png')
+    create_frame_service_information(engine, 'a,b.mp4', 7, '/frames/7.jpg', 'jpeg')
+
+    response = client.get('/api/saved_frames/export')
+    assert response.status_code == 200
+    rows = [json.loads(x) for x in response.text.splitlines()]
+    assert rows == [
+        {
+            'video_file_name': 'a,b.mp4', 'frame_number': 7, 'frame_file_path': '/frames/7.jpg',
+            'frame_format': 'jpeg', 'variants': []
+        },
+    ] + [
+        {
+            'video_file_name': 'пример-1.mp4', 'frame_number': x, 'frame_file_path': f'/frames/{x}.png',
+            'frame_format': 'png', 'variants': []
+        }
+        for x in range(1, 4)
+    ]
+
+    response = client.get('/api/saved_frames/export', params={'format': 'csv', 'video_file_name': 'a,b.mp4'})
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [
+        ['video_file_name', 'frame_number', 'frame_file_path', 'frame_format', 'variants'],
+        ['a,b.mp4', '7', '/frames/7.jpg', 'jpeg', '[]'],
+    ]
+
+    response = client.get('/api/saved_frames/export', params={'frame_from': 2, 'frame_to': 3})
+    assert [json.loads(x)['frame_number'] for x in response.text.splitlines()] == [2, 3]
+
+    response = client.get('/api/saved_frames/export?format=xml')
+    assert response.status_code == 422
+
+
+def test_route_saved_frames_bulk(
+        client: 'TestClient',
+        engine: 'Engine',
+        clean_frames_dir: None
+):
+    """Функция проверяет сохранение в БД служебной информации о нескольких кадрах одним запросом.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    response = client.get('/api/frames?file_name=sample-1.mp4&time_in_video=0')
+    assert response.status_code == 200
+    create_frame_service_information(engine, 'sample-1.mp4', 3, 'path3')
+
+    request_body = [
+        {'file_path': 'sample-1.mp4', 'frame_number': 1},
+        {'file_path': 'sample-1.mp4', 'frame_number': 2, 'frame_format': 'png'},
+        {'file_path': 'sample-1.mp4', 'frame_number': 3},
+        {'file_path': 'sample-1.mp4', 'frame_number': 1},
+        {'file_path': 'sample-1.mp4', 'frame_number': 2, 'frame_format': 'jpeg'},
+        {'file_path': 'sample-1.mp4', 'frame_number': 500},
+        {'file_path': 'sample-2.mp4', 'frame_number': 1},
+        {'file_path': '../sample-1.mp4', 'frame_number': 1},
+    ]
+    response = client.post('/api/saved_frames/bulk', json=request_body)
+    assert response.status_code == 200
+    assert [x['status'] for x in response.json()] == [
+        'created', 'created', 'exists', 'duplicate', 'frame_not_found', 'frame_not_found', 'frame_not_found',
+        'forbidden_file_name'
+    ]
+    frames_dir_path = get_settings().fastAPI.FRAMES_DIR_PATH
+    assert response.json()[0] == {
+        'file_path': 'sample-1.mp4',
+        'frame_number': 1,
+        'frame_path': os.path.join(frames_dir_path, 'sample-1.mp4', '1.png'),
+        'frame_format': 'png',
+        'variants': [],
+        'status': 'created'
+    }
+
+    with engine.connect() as conn:
+        result = conn.execute(select(frame_service_informations)).all()
+    assert sorted((x.frame_number, x.frame_file_path) for x in result) == [
+        (1, os.path.join(frames_dir_path, 'sample-1.mp4', '1.png')),
+        (2, os.path.join(frames_dir_path, 'sample-1.mp4', '2.png')),
+        (3, 'path3'),
+    ]
+
+    # repeat request
+    response = client.post('/api/saved_frames/bulk', json=request_body[:2])
+    assert response.status_code == 200
+    assert [x['status'] for x in response.json()] == ['exists', 'exists']
+
+
+def test_route_saved_frames_bulk_errors(client: 'TestClient', engine: 'Engine'):
+    """Функция проверяет ответ сервера по маршруту /api/saved_frames/bulk с недопустимым телом запроса.
+
+    Args:
+        client: Тестовый клиент.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    response = client.post('/api/saved_frames/bulk', json=[])
+    assert response.status_code == 200
+    assert response.json() == []
+
+    response = client.post('/api/saved_frames/bulk', json=[{'file_path': 'sample-1.mp4', 'frame_number': 0}])
+    assert response.status_code == 422
+
+    max_frames = get_settings().fastAPI.BULK_MAX_FRAMES
+    response = client.post('/api/saved_frames/bulk', json=[{'file_path': 'a.mp4', 'frame_number': 1}] * (max_frames + 1))
+    assert response.status_code == 400
+    assert response.json() == {'message': 'Too many frames in one request.'}
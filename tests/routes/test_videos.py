@@ -1,6 +1,7 @@
+import os
 from typing import TYPE_CHECKING
 
-from src.utils.config import Config
+from src.utils.config import get_settings
 
 if TYPE_CHECKING:
     from fastapi.testclient import TestClient
@@ -12,8 +13,8 @@ def test_route_videos(client: 'TestClient'):
     Args:
         client: Тестовый клиент.
     """
-    config = Config()
-    video_dir_path = config.fastAPI['VIDEOS_DIR_PATH']
+    config = get_settings()
+    video_dir_path = config.fastAPI.VIDEOS_DIR_PATH
     expected = [
         {
             "file_name": "sample-1.mp4",
@@ -49,3 +50,51 @@ def test_route_videos(client: 'TestClient'):
     response = client.get('/api/videos')
     assert response.status_code == 200
     assert sorted(response.json(), key=lambda x: x['file_name']) == sorted(expected, key=lambda x: x['file_name'])
+
+
+def test_route_videos_with_metadata(client: 'TestClient'):
+    """Функция проверяет параметры видеофайлов в списке файлов при указании параметра with_metadata.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    response = client.get('/api/videos?with_metadata=true')
+    assert response.status_code == 200
+    videos = {x['file_name']: x for x in response.json()}
+    assert videos['sample-1.mp4']['metadata'] == {
+        'fps': 30.0,
+        'frame_count': 171,
+        'duration': 5.7,
+        'width': 1920,
+        'height': 1080,
+        'codec': 'h264',
+    }
+
+
+def test_route_videos_page(client: 'TestClient'):
+    """Функция проверяет фильтрацию по началу имени, сортировку и постраничную выдачу списка видеофайлов.
+
+    Args:
+        client: Тестовый клиент.
+    """
+    response = client.get('/api/videos', params={'prefix': 'sample-'})
+    assert response.status_code == 200
+    assert [x['file_name'] for x in response.json()] == ['sample-1.mp4', 'sample-2.mp4', 'sample-3.mp4']
+    assert response.headers['X-Total-Count'] == '3'
+
+    response = client.get('/api/videos', params={'prefix': 'sample-', 'order': 'desc', 'offset': 1, 'limit': 1})
+    assert [x['file_name'] for x in response.json()] == ['sample-2.mp4']
+    assert response.headers['X-Total-Count'] == '3'
+
+    response = client.get('/api/videos', params={'sort': 'size'})
+    video_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+    sizes = [os.path.getsize(os.path.join(video_dir_path, x['file_name'])) for x in response.json()]
+    assert sizes == sorted(sizes)
+    assert response.headers['X-Total-Count'] == '6'
+
+    response = client.get('/api/videos', params={'prefix': 'nothing'})
+    assert response.json() == []
+    assert response.headers['X-Total-Count'] == '0'
+
+    response = client.get('/api/videos', params={'sort': 'duration'})
+    assert response.status_code == 422
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+import pytest
+from pydantic import ValidationError
+
+from src.utils.config import get_settings, load_settings, use_settings
+
+
+def test_load_settings():
+    """Функция проверяет загрузку конфигурационного файла и значения по умолчанию.
+    """
+    settings = load_settings('config.yaml')
+    assert settings.fastAPI.SAVE_FRAMES_COUNT == 12
+    assert settings.fastAPI.FRAMES_CACHE_MAX_BYTES == 10737418240
+    assert settings.fastAPI.CONFIG_HOT_RELOAD is False
+    assert settings.database.POOL_PRE_PING is True
+
+
+def test_load_settings_env_override(monkeypatch: pytest.MonkeyPatch):
+    """Функция проверяет приоритет переменных окружения над конфигурационным файлом.
+    """
+    monkeypatch.setenv('FASTAPI_SAVE_FRAMES_COUNT', '24')
+    monkeypatch.setenv('DATABASE_POOL_SIZE', '7')
+    settings = load_settings('config.yaml')
+    assert settings.fastAPI.SAVE_FRAMES_COUNT == 24
+    assert settings.database.POOL_SIZE == 7
+
+
+@pytest.mark.parametrize('name, value', [
+    ('FASTAPI_SAVE_FRAMES_COUNT', '0'),
+    ('FASTAPI_FRAME_FORMAT', 'gif'),
+    ('FASTAPI_DECODE_WORKERS_MODE', 'fork'),
+    ('DATABASE_POOL_SIZE', 'many'),
+])
+def test_load_settings_invalid(monkeypatch: pytest.MonkeyPatch, name: str, value: str):
+    """Функция проверяет отклонение недопустимых значений при запуске.
+
+    Args:
+        name: Переменная окружения.
+        value: Недопустимое значение.
+    """
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValidationError):
+        load_settings('config.yaml')
+
+
+def test_get_settings_hot_reload(tmp_path):
+    """Функция проверяет перечитывание изменённого конфигурационного файла.
+    """
+    path_yaml = str(tmp_path / 'config.yaml')
+    shutil.copyfile('config.yaml', path_yaml)
+    original = get_settings()
+    settings = load_settings(path_yaml)
+    settings.fastAPI.CONFIG_HOT_RELOAD = True
+    settings.fastAPI.CONFIG_RELOAD_CHECK_INTERVAL = 0
+    assert settings.path_yaml == path_yaml
+    try:
+        # перечитывается файл, из которого загружены конфигурации
+        use_settings(settings)
+        assert get_settings() is settings
+
+        with open(path_yaml, 'r') as file:
+            text = file.read()
+        with open(path_yaml, 'w') as file:
+            file.write(text.replace('SAVE_FRAMES_COUNT: 12', 'SAVE_FRAMES_COUNT: 6')
+                           .replace('CONFIG_RELOAD_CHECK_INTERVAL: 1', 'CONFIG_RELOAD_CHECK_INTERVAL: 0')
+                           .replace('CONFIG_HOT_RELOAD: false', 'CONFIG_HOT_RELOAD: true'))
+        stat = os.stat(path_yaml)
+        os.utime(path_yaml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        reloaded = get_settings()
+        assert reloaded.fastAPI.SAVE_FRAMES_COUNT == 6
+
+        # файл с ошибкой не применяется
+        with open(path_yaml, 'w') as file:
+            file.write(text.replace('SAVE_FRAMES_COUNT: 12', 'SAVE_FRAMES_COUNT: -1'))
+        os.utime(path_yaml, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000_000))
+        assert get_settings() is reloaded
+    finally:
+        use_settings(original, 'config.yaml')
@@ -0,0 +1,136 @@
+import os
+import shutil
+from typing import Any, Dict, Set
+
+import pytest
+
+from src.utils.frame_storage import LocalFrameStorage, S3FrameStorage, remove_orphan_objects
+
+
+class LocalS3Client():
+    """Замена клиента S3, хранящая объекты в локальном каталоге.
+
+    Attributes:
+        root: Каталог с объектами: <root>/<bucket>/<key>.
+        uploaded: Ключи выгруженных объектов.
+        calls: Число обращений к S3.
+    """
+    root: str
+    uploaded: Set[str]
+    calls: int
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.uploaded = set()
+        self.calls = 0
+
+    def _path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, bucket, key)
+
+    def list_objects_v2(self, Bucket: str, Prefix: str) -> Dict[str, Any]:
+        self.calls += 1
+        bucket_dir = os.path.join(self.root, Bucket)
+        keys = []
+        for (dir_path, _, file_names) in os.walk(bucket_dir):
+            keys.extend(os.path.relpath(os.path.join(dir_path, x), bucket_dir) for x in file_names)
+        return {'Contents': [{'Key': x} for x in sorted(keys) if x.startswith(Prefix)], 'IsTruncated': False}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str) -> None:
+        self.calls += 1
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+        self.uploaded.add(Key)
+
+    def download_file(self, Bucket: str, Key: str, Filename: str) -> None:
+        self.calls += 1
+        shutil.copyfile(self._path(Bucket, Key), Filename)
+
+
+def test_local_frame_storage(tmp_path):
+    """Функция проверяет создание ссылок на кадры хранилища в каталоге другого видеофайла.
+    """
+    storage = LocalFrameStorage(str(tmp_path))
+    (tmp_path / 'a.mp4').mkdir()
+    for name in ['0.png', '1.png']:
+        (tmp_path / 'a.mp4' / name).write_bytes(name.encode())
+
+    assert not storage.link_frames('digest', str(tmp_path / 'b.mp4'), ['0.png', '1.png'])
+    storage.store_frames('digest', str(tmp_path / 'a.mp4'), ['0.png', '1.png'])
+    assert not storage.link_frames('digest', str(tmp_path / 'b.mp4'), ['0.png', '2.png'])
+    assert storage.link_frames('digest', str(tmp_path / 'b.mp4'), ['0.png', '1.png'])
+
+    for name in ['0.png', '1.png']:
+        assert (tmp_path / 'b.mp4' / name).read_bytes() == name.encode()
+        assert os.stat(tmp_path / 'a.mp4' / name).st_ino == os.stat(tmp_path / 'b.mp4' / name).st_ino
+    assert sorted(os.listdir(tmp_path / 'b.mp4')) == ['0.png', '1.png']
+
+    # кадры со ссылками не удаляются, кадры без ссылок удаляются вместе с каталогом хеша
+    assert remove_orphan_objects(str(tmp_path)) == 0
+    shutil.rmtree(tmp_path / 'a.mp4')
+    shutil.rmtree(tmp_path / 'b.mp4')
+    assert remove_orphan_objects(str(tmp_path), max_age=3600) == 0
+    assert remove_orphan_objects(str(tmp_path)) == 10
+    assert os.listdir(tmp_path / '.objects') == []
+
+
+@pytest.mark.parametrize('prefix', ['frames/', ''])
+def test_s3_frame_storage(tmp_path, prefix: str):
+    """Функция проверяет выгрузку кадров в S3 и их загрузку на другом сервере с пустым локальным хранилищем.
+
+    Args:
+        tmp_path: Временный каталог.
+        prefix: Префикс ключей объектов.
+    """
+    client = LocalS3Client(str(tmp_path / 's3'))
+    storage = S3FrameStorage(str(tmp_path / 'server-1'), client, 'bucket', prefix)
+    frame_dir = tmp_path / 'server-1' / 'a.mp4'
+    frame_dir.mkdir(parents=True)
+    (frame_dir / '0.png').write_bytes(b'frame')
+
+    storage.store_frames('digest', str(frame_dir), ['0.png'])
+    storage.flush()
+    assert client.uploaded == {f'{prefix}digest/0.png'}
+    # повторно кадр не выгружается
+    client.uploaded.clear()
+    storage.store_frames('digest', str(frame_dir), ['0.png'])
+    storage.flush()
+    assert client.uploaded == set()
+
+    other_storage = S3FrameStorage(str(tmp_path / 'server-2'), client, 'bucket', prefix)
+    other_dir = tmp_path / 'server-2' / 'b.mp4'
+    assert other_storage.link_frames('digest', str(other_dir), ['0.png'])
+    assert (other_dir / '0.png').read_bytes() == b'frame'
+    assert not other_storage.link_frames('digest', str(other_dir), ['1.png'])
+    assert not other_storage.link_frames('other', str(other_dir), ['0.png'])
+    # неудачная загрузка не оставляет временных файлов
+    assert os.listdir(tmp_path / 'server-2' / '.objects' / 'digest') == ['0.png']
+
+
+def test_s3_frame_storage_listing(tmp_path):
+    """Функция проверяет, что наличие кадров хеша в S3 проверяется одним обращением
+       и отсутствие кадров запоминается.
+    """
+    client = LocalS3Client(str(tmp_path / 's3'))
+    storage = S3FrameStorage(str(tmp_path / 'server-1'), client, 'bucket')
+    frame_dir = tmp_path / 'server-1' / 'a.mp4'
+    frame_dir.mkdir(parents=True)
+    names = [f'{i}.png' for i in range(25)]
+    for name in names:
+        (frame_dir / name).write_bytes(name.encode())
+
+    assert not storage.link_frames('digest', str(tmp_path / 'server-1' / 'b.mp4'), names)
+    assert not storage.link_frames('digest', str(tmp_path / 'server-1' / 'b.mp4'), names)
+    assert client.calls == 1
+
+    storage.store_frames('digest', str(frame_dir), names)
+    storage.flush()
+    assert client.calls == 1 + len(names)
+
+    other_storage = S3FrameStorage(str(tmp_path / 'server-2'), client, 'bucket', listing_ttl=0)
+    other_dir = tmp_path / 'server-2' / 'b.mp4'
+    client.calls = 0
+    assert not other_storage.link_frames('digest', str(other_dir), names + ['25.png'])
+    assert client.calls == 1
+    assert other_storage.link_frames('digest', str(other_dir), names)
+    assert client.calls == 2 + len(names)
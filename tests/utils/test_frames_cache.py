@@ -0,0 +1,90 @@
+import os
+import time
+from typing import TYPE_CHECKING
+
+from tests.conftest import create_frame_service_information
+from src.utils.frame_storage import LocalFrameStorage
+from src.utils.frames_cache import FramesCache
+
+if TYPE_CHECKING:
+    from sqlalchemy import Engine
+
+
+def test_frames_cache_sweep(tmp_path, engine: 'Engine'):
+    """Функция проверяет вытеснение каталогов с кадрами по суммарному размеру
+       с сохранением кадров, записанных в базу данных.
+
+    Args:
+        tmp_path: Временный каталог с кадрами.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    for (i, file_name) in enumerate(['old.mp4', 'saved.mp4', 'new.mp4']):
+        frame_dir = tmp_path / file_name
+        frame_dir.mkdir()
+        for frame_number in range(2):
+            frame_path = frame_dir / f'{frame_number}.png'
+            frame_path.write_bytes(b'x' * 100)
+            os.utime(frame_path, (1000 + i, 1000 + i))
+    create_frame_service_information(engine, 'saved.mp4', 1, str(tmp_path / 'saved.mp4' / '1.png'))
+
+    frames_cache = FramesCache(str(tmp_path), max_bytes=350)
+    frames_cache.sweep()
+
+    assert sorted(os.listdir(tmp_path)) == ['new.mp4', 'saved.mp4']
+    assert os.listdir(tmp_path / 'saved.mp4') == ['1.png']
+    assert sorted(os.listdir(tmp_path / 'new.mp4')) == ['0.png', '1.png']
+    assert frames_cache.stats.evictions == 2
+
+
+def test_frames_cache_sweep_objects(tmp_path, engine: 'Engine'):
+    """Функция проверяет, что каталог хранилища кадров не вытесняется как каталог видеофайла,
+       а кадры хранилища удаляются после удаления всех ссылок на них.
+
+    Args:
+        tmp_path: Временный каталог с кадрами.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    storage = LocalFrameStorage(str(tmp_path))
+    for (i, file_name) in enumerate(['old.mp4', 'new.mp4']):
+        frame_dir = tmp_path / file_name
+        frame_dir.mkdir()
+        frame_path = frame_dir / '0.png'
+        frame_path.write_bytes(b'x' * 100)
+        storage.store_frames(f'digest{i}', str(frame_dir), ['0.png'])
+        os.utime(frame_path, (1000 + i, 1000 + i))
+
+    frames_cache = FramesCache(str(tmp_path), max_bytes=150)
+    frames_cache.sweep()
+
+    assert sorted(os.listdir(tmp_path)) == ['.objects', 'new.mp4']
+    assert os.listdir(tmp_path / '.objects') == ['digest1']
+    assert frames_cache.stats.evictions == 1
+
+
+def test_frames_cache_sweep_in_use(tmp_path, engine: 'Engine'):
+    """Функция проверяет, что проверка ограничений не удаляет каталог, в который идёт запись,
+       и кадры, записанные после начала проверки.
+
+    Args:
+        tmp_path: Временный каталог с кадрами.
+        engine: Подключение к базе данных с таблицами и без данных.
+    """
+    for file_name in ['writing.mp4', 'fresh.mp4', 'old.mp4']:
+        frame_dir = tmp_path / file_name
+        frame_dir.mkdir()
+        frame_path = frame_dir / '0.png'
+        frame_path.write_bytes(b'x' * 100)
+        os.utime(frame_path, (1000, 1000))
+    fresh_path = tmp_path / 'fresh.mp4' / '1.png'
+    fresh_path.write_bytes(b'x' * 100)
+    os.utime(fresh_path, (time.time() + 60, time.time() + 60))
+
+    frames_cache = FramesCache(str(tmp_path), max_bytes=1)
+    with frames_cache.writing('writing.mp4'):
+        # каталог защищает сама запись, а не время последнего обращения
+        frames_cache._last_access['writing.mp4'] = 0.0
+        frames_cache.sweep()
+
+    assert sorted(os.listdir(tmp_path)) == ['fresh.mp4', 'writing.mp4']
+    assert os.listdir(tmp_path / 'writing.mp4') == ['0.png']
+    assert os.listdir(tmp_path / 'fresh.mp4') == ['1.png']
@@ -0,0 +1,132 @@
+import os
+import shutil
+import tempfile
+
+import cv2
+import numpy as np
+
+from src.utils.config import get_settings
+from src.utils.get_frames import (
+    LINEAR_METHOD, _seek_frames, _scan_frames, extract_and_save_frame_windows, extract_frame, frame_at_time,
+    iter_frame_ranges, iter_frames, merge_frame_ranges,
+)
+from src.utils.video_capture import get_video_metadata
+
+
+def test_seek_frames_equal_scan_frames():
+    """Функция проверяет, что кадры, извлечённые после позиционирования, совпадают с кадрами,
+       извлечёнными последовательным чтением (в том числе при дробном fps).
+    """
+    config = get_settings()
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+    video_path = os.path.join(config.fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    first_frame = int(7 * fps)
+    seek_images = _seek_frames(cap, first_frame, save_frames_count)
+
+    cap.open(video_path)
+    scan_images = _scan_frames(cap, 7 * fps, total_frames, save_frames_count)
+    cap.release()
+
+    assert seek_images is not None
+    assert len(seek_images) == len(scan_images) == save_frames_count
+    assert all(np.array_equal(x, y) for x, y in zip(seek_images, scan_images))
+
+
+def test_merge_frame_ranges():
+    """Функция проверяет сортировку и объединение пересекающихся и смежных диапазонов кадров.
+    """
+    assert merge_frame_ranges([30, 0, 5, 42, 100, 30], 12) == [(0, 17), (30, 54), (100, 112)]
+
+
+def test_iter_frame_ranges_equal_seek_frames():
+    """Функция проверяет, что кадры нескольких диапазонов, извлечённые за один проход,
+       совпадают с кадрами, извлечёнными позиционированием на каждый диапазон.
+    """
+    config = get_settings()
+    video_path = os.path.join(config.fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+    ranges = [(3, 6), (20, 23), (300, 303)]
+
+    frames = dict(iter_frame_ranges(video_path, ranges))
+    assert sorted(frames) == [n for (start, stop) in ranges for n in range(start, stop)]
+
+    cap = cv2.VideoCapture(video_path)
+    for (start, stop) in ranges:
+        expected = _seek_frames(cap, start, stop - start)
+        assert all(np.array_equal(frames[start + i], x) for (i, x) in enumerate(expected))
+    cap.release()
+
+
+def test_extract_frame_windows_near_end():
+    """Функция проверяет, что диапазон у конца видеофайла извлекается, даже если он объединён
+       с диапазоном, выходящим за последний кадр.
+    """
+    config = get_settings()
+    video_path = os.path.join(config.fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+    count = config.fastAPI.SAVE_FRAMES_COUNT
+    frame_dir = tempfile.mkdtemp()
+    try:
+        frame_paths = extract_and_save_frame_windows(video_path, frame_dir, [380, 390])
+        assert list(frame_paths) == [380]
+        assert frame_paths[380] == [os.path.join(frame_dir, f'{380 + i}.png') for i in range(count)]
+        assert all(os.path.isfile(x) for x in frame_paths[380])
+    finally:
+        shutil.rmtree(frame_dir)
+
+
+def test_seek_frames_from_keyframe():
+    """Функция проверяет, что кадры, извлечённые от предшествующего ключевого кадра,
+       совпадают с кадрами, извлечёнными позиционированием на первый кадр.
+    """
+    config = get_settings()
+    save_frames_count = config.fastAPI.SAVE_FRAMES_COUNT
+    video_path = os.path.join(config.fastAPI.VIDEOS_DIR_PATH, 'sample-3.mp4')
+
+    cap = cv2.VideoCapture(video_path)
+    keyframe_images = _seek_frames(cap, 130, save_frames_count, keyframe=90)
+    seek_images = _seek_frames(cap, 130, save_frames_count)
+    cap.release()
+
+    assert keyframe_images is not None and seek_images is not None
+    assert all(np.array_equal(x, y) for x, y in zip(keyframe_images, seek_images))
+
+
+def test_frame_at_time_equals_decoder_pts():
+    """Функция проверяет, что номер кадра, вычисленный по времени, совпадает с кадром,
+       время показа которого сообщает декодер (при дробном fps).
+    """
+    config = get_settings()
+    video_path = os.path.join(config.fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+    metadata = get_video_metadata(video_path)
+
+    cap = cv2.VideoCapture(video_path)
+    frame_times = []
+    while cap.grab():
+        frame_times.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+    cap.release()
+
+    for time_ms in [0, 33, 34, 1000, 1001, 7000, 8341, 8342, 13000]:
+        expected = max(i for (i, x) in enumerate(frame_times) if x <= time_ms + 1e-6)
+        assert frame_at_time(video_path, metadata, time_ms) == expected
+
+
+def test_extract_frame_unknown_frame_count(tmp_path):
+    """Функция проверяет извлечение кадров последовательным чтением из видеофайла,
+       контейнер которого не сообщает число кадров (поток MJPEG без контейнера).
+    """
+    video_path = str(tmp_path / 'unknown.mjpeg')
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 48))
+    for frame_number in range(30):
+        writer.write(np.full((48, 64, 3), frame_number * 8, dtype=np.uint8))
+    writer.release()
+    assert get_video_metadata(video_path).frame_count <= 0
+
+    first_frame, frames, method = extract_frame(video_path, 10, 3)
+    assert (first_frame, len(frames), method) == (10, 3, LINEAR_METHOD)
+    assert [round(x.mean() / 8) for x in frames] == [10, 11, 12]
+    assert [x for (x, _) in iter_frames(video_path, 27, 3)] == [27, 28, 29]
+    # диапазон за концом видеофайла не извлекается
+    assert extract_frame(video_path, 28, 3) == (None, [], LINEAR_METHOD)
@@ -0,0 +1,115 @@
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import insert, select
+
+from src.models import extraction_jobs
+from src.routes.metrics import collect_runtime_metrics
+from src.utils import jobs
+from src.utils.jobs import (
+    DONE_STATUS, FAILED_STATUS, RUNNING_STATUS, ExtractionJob, JobRunner, JobScheduler, current_job_runner,
+    execute_extraction_job, job_values, stop_job_runner
+)
+from src.utils.video_capture import get_capture_pool
+
+if TYPE_CHECKING:
+    import pytest
+    from sqlalchemy import Engine
+
+
+def test_job_scheduler_order():
+    """Функция проверяет выдачу заданий по приоритету с чередованием видеофайлов при равном приоритете.
+    """
+    scheduler = JobScheduler()
+    for i in range(3):
+        scheduler.push(ExtractionJob(f'a{i}', 'a.mp4', i, 1, 'png'))
+    scheduler.push(ExtractionJob('b0', 'b.mp4', 0, 1, 'png'))
+    scheduler.push(ExtractionJob('c0', 'c.mp4', 0, 1, 'png', priority=1))
+
+    assert scheduler.pop().job_id == 'c0'
+    assert scheduler.pop().job_id == 'a0'
+    # задание, поставленное после выдачи первых заданий, не ждёт все задания a.mp4
+    scheduler.push(ExtractionJob('d0', 'd.mp4', 0, 1, 'png'))
+    assert [scheduler.pop().job_id for _ in range(4)] == ['b0', 'd0', 'a1', 'a2']
+    assert scheduler.pop(timeout=0) is None
+
+    scheduler.close()
+    assert scheduler.pop() is None
+
+
+def _wait_for_status(engine: 'Engine', job_id: str, statuses: set, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while True:
+        with engine.connect() as conn:
+            row = conn.execute(select(extraction_jobs).where(extraction_jobs.c.job_id == job_id)).first()
+        if row.status in statuses or time.monotonic() > deadline:
+            return row
+        time.sleep(0.05)
+
+
+def test_job_runner_recover(engine: 'Engine', clean_frames_dir: None):
+    """Функция проверяет выполнение заданий, оставшихся в БД после остановки приложения.
+
+    Args:
+        engine: Подключение к базе данных с таблицами и без данных.
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    queued = ExtractionJob('queued', 'sample-3.mp4', 90, 3, 'jpeg', (320, 180))
+    stale = ExtractionJob('stale', 'sample-3.mp4', 0, 2, 'png')
+    active = ExtractionJob('active', 'sample-3.mp4', 0, 2, 'png')
+    missing = ExtractionJob('missing', 'sample-3.mp4', 10 ** 6, 2, 'png')
+    with engine.begin() as conn:
+        conn.execute(insert(extraction_jobs), [job_values(x) for x in (queued, stale, active, missing)])
+        conn.execute(
+            extraction_jobs.update().where(extraction_jobs.c.job_id.in_(['stale', 'active'])).values(
+                status=RUNNING_STATUS
+            )
+        )
+        conn.execute(
+            extraction_jobs.update().where(extraction_jobs.c.job_id == 'stale').values(updated_at=0)
+        )
+
+    runner = JobRunner(1, 10, stale_timeout=60)
+    try:
+        assert runner.recover() == 3
+        row = _wait_for_status(engine, 'queued', {DONE_STATUS, FAILED_STATUS})
+        assert row.status == DONE_STATUS
+        assert row.frames_decoded == 3
+        assert [x.rsplit('/', 1)[1] for x in row.frame_paths] == ['90_320x180.jpg', '91_320x180.jpg', '92_320x180.jpg']
+        assert _wait_for_status(engine, 'stale', {DONE_STATUS, FAILED_STATUS}).status == DONE_STATUS
+        row = _wait_for_status(engine, 'missing', {DONE_STATUS, FAILED_STATUS})
+        assert row.status == FAILED_STATUS
+        assert row.error == 'Failed to extract frames.'
+    finally:
+        runner.stop()
+
+    # задание, выполняемое другим процессом, не выполняется повторно
+    with engine.connect() as conn:
+        row = conn.execute(select(extraction_jobs).where(extraction_jobs.c.job_id == 'active')).first()
+    assert row.status == RUNNING_STATUS
+
+
+def test_execute_extraction_job_dedicated_capture(clean_frames_dir: None):
+    """Функция проверяет, что задание открывает видеофайл вне пула, общего с запросами.
+
+    Args:
+        clean_frames_dir: Вызов фикстуры для удаления всех файлов в каталоге с фреймами перед выполнением теста.
+    """
+    stats = get_capture_pool().stats
+    before = (stats.hits, stats.misses)
+    frame_paths = execute_extraction_job(ExtractionJob('dedicated', 'sample-3.mp4', 10, 3, 'jpeg'), lambda _: None)
+    assert [x.rsplit('/', 1)[1] for x in frame_paths] == ['10.jpg', '11.jpg', '12.jpg']
+    assert (stats.hits, stats.misses) == before
+
+
+def test_job_metrics_without_runner(monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет, что метрики заданий после остановки пула равны нулю и не создают пул заново.
+
+    Args:
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    stop_job_runner()
+    monkeypatch.setattr(jobs, 'JobRunner', None)
+    job_metrics = [x for x in collect_runtime_metrics() if x.name == 'frame_service_extraction_jobs']
+    assert current_job_runner() is None
+    assert 'frame_service_extraction_jobs{state="queued"} 0' in job_metrics[0].render()
@@ -0,0 +1,115 @@
+import os
+import shutil
+import struct
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from src.utils.config import get_settings
+from src.utils.keyframes import KeyframeIndex, KeyframeIndexStore, build_keyframe_entries
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_build_keyframe_entries():
+    """Функция проверяет построение индекса ключевых кадров по таблицам сэмплов MP4.
+    """
+    videos_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+
+    # ключевой кадр каждые 90 кадров
+    entries = build_keyframe_entries(os.path.join(videos_dir_path, 'sample-3.mp4'))
+    assert entries[:, KeyframeIndex.FRAME_NUMBER].tolist() == list(range(0, 901, 90))
+    assert np.all(np.diff(entries[:, KeyframeIndex.BYTE_OFFSET]) > 0)
+
+    entries = build_keyframe_entries(os.path.join(videos_dir_path, 'sample-2.mp4'))
+    assert entries[:, KeyframeIndex.FRAME_NUMBER].tolist() == [0, 250]
+
+    assert build_keyframe_entries(os.path.join(videos_dir_path, 'corrupted_file.mp4')) is None
+
+
+def test_build_keyframe_entries_malformed(tmp_path: 'Path'):
+    """Функция проверяет, что повреждённые таблицы MP4 не приводят к ошибке построения индекса.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    def box(box_type: bytes, payload: bytes = b'') -> bytes:
+        return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+    table = struct.pack('>II', 0, 0)
+    hdlr = box(b'hdlr', b'\0' * 8 + b'vide')
+    # пустой mdhd и пустые таблицы сэмплов
+    stbl = box(b'stbl', box(b'stts', table) + box(b'stsz', table + b'\0' * 4) + box(b'stsc', table))
+    trak = box(b'trak', box(b'mdia', box(b'mdhd') + hdlr + box(b'minf', stbl)))
+    video_path = tmp_path / 'broken.mp4'
+    video_path.write_bytes(box(b'ftyp', b'isom') + box(b'moov', trak))
+
+    assert build_keyframe_entries(str(video_path)) is None
+
+
+def test_keyframe_index_preceding_keyframe():
+    """Функция проверяет поиск ближайшего предшествующего ключевого кадра.
+    """
+    index = KeyframeIndex(np.array([[0, 48, 0], [90, 1000, 90], [180, 2000, 180]], dtype=np.int64))
+    assert index.preceding_keyframe(0) == 0
+    assert index.preceding_keyframe(89) == 0
+    assert index.preceding_keyframe(90) == 90
+    assert index.preceding_keyframe(1000) == 180
+
+    index = KeyframeIndex(np.array([[5, 48, 5]], dtype=np.int64))
+    assert index.preceding_keyframe(4) is None
+
+
+def test_keyframe_index_store(tmp_path: 'Path'):
+    """Функция проверяет сохранение индекса на диск, загрузку с отображением в память
+       и построение нового индекса после изменения видеофайла.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    video_path = str(tmp_path / 'video.mp4')
+    shutil.copyfile(os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-3.mp4'), video_path)
+    index_dir_path = str(tmp_path / 'index')
+
+    index = KeyframeIndexStore(index_dir_path, max_size=4).get(video_path)
+    assert len(index) == 11
+    assert len(os.listdir(index_dir_path)) == 1
+
+    # новый экземпляр загружает индекс с диска
+    loaded = KeyframeIndexStore(index_dir_path, max_size=4).get(video_path)
+    assert isinstance(loaded.entries, np.memmap)
+    assert np.array_equal(loaded.entries, index.entries)
+
+    shutil.copyfile(os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4'), video_path)
+    index = KeyframeIndexStore(index_dir_path, max_size=4).get(video_path)
+    assert len(index) == 2
+    assert len(os.listdir(index_dir_path)) == 1
+
+    corrupted_path = str(tmp_path / 'corrupted.mp4')
+    shutil.copyfile(os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'corrupted_file.mp4'), corrupted_path)
+    assert KeyframeIndexStore(index_dir_path, max_size=4).get(corrupted_path) is None
+
+
+def test_keyframe_index_frame_at_time():
+    """Функция проверяет определение кадра, показываемого в указанное время, по времени
+       показа ключевых кадров (в том числе при дробном fps).
+    """
+    videos_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+
+    # время показа ключевых кадров в микросекундах от первого кадра
+    entries = build_keyframe_entries(os.path.join(videos_dir_path, 'sample-3.mp4'))
+    assert entries[:, KeyframeIndex.PTS].tolist() == list(range(0, 30_000_001, 3_000_000))
+    index = KeyframeIndex(entries)
+    assert index.frame_at_time(0, 30) == 0
+    assert index.frame_at_time(2_000_000, 30) == 60
+    assert index.frame_at_time(3_033_333, 30) == 90
+    assert index.frame_at_time(3_033_334, 30) == 91
+
+    # 30000/1001 кадров в секунду
+    fps = 30000 / 1001
+    index = KeyframeIndex(build_keyframe_entries(os.path.join(videos_dir_path, 'sample-2.mp4')))
+    assert index.frame_at_time(1_000_000, fps) == 29
+    assert index.frame_at_time(1_001_000, fps) == 30
+    assert index.frame_at_time(8_341_667, fps) == 250
+    assert index.frame_at_time(10_000_000, fps) == 299
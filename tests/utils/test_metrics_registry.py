@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+
+def test_metrics_render():
+    """Функция проверяет текстовый формат Prometheus для счётчиков, значений и гистограмм.
+    """
+    registry = MetricsRegistry()
+    counter = registry.register(Counter('test_requests_total', 'Requests.', ['path']))
+    gauge = registry.register(Gauge('test_pending', 'Pending "tasks".'))
+    histogram = registry.register(Histogram('test_seconds', 'Latency.', buckets=[0.1, 1]))
+
+    counter.inc(path='/a"b')
+    counter.inc(2, path='/a"b')
+    gauge.set(1.5)
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(3)
+
+    assert registry.render() == '\n'.join([
+        '# HELP test_requests_total Requests.',
+        '# TYPE test_requests_total counter',
+        'test_requests_total{path="/a\\"b"} 3',
+        '# HELP test_pending Pending "tasks".',
+        '# TYPE test_pending gauge',
+        'test_pending 1.5',
+        '# HELP test_seconds Latency.',
+        '# TYPE test_seconds histogram',
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        'test_seconds_sum 3.15',
+        'test_seconds_count 3',
+    ]) + '\n'
+
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        registry.register(Counter('test_pending', 'Duplicate.'))
+
+
+def test_metrics_collector():
+    """Функция проверяет, что сборщики вызываются при каждом считывании метрик.
+    """
+    registry = MetricsRegistry()
+    values = [1, 2]
+
+    def collect():
+        gauge = Gauge('test_size', 'Size.')
+        gauge.set(values.pop(0))
+        return [gauge]
+
+    registry.register_collector(collect)
+    assert 'test_size 1\n' in registry.render()
+    assert 'test_size 2\n' in registry.render()
+
+
+def test_timer():
+    """Функция проверяет измерение времени блока with, синхронной и асинхронной функций.
+    """
+    histogram = Histogram('test_function_seconds', 'Latency.', ['function'])
+
+    with histogram.time(function='block'):
+        pass
+
+    @histogram.time(function='sync')
+    def sync_fn(x: int) -> int:
+        return x + 1
+
+    @histogram.time(function='async')
+    async def async_fn(x: int) -> int:
+        await asyncio.sleep(0.01)
+        return x + 1
+
+    assert sync_fn(1) == 2
+    assert asyncio.run(async_fn(1)) == 2
+    with pytest.raises(ZeroDivisionError):
+        with histogram.time(function='error'):
+            1 / 0
+
+    assert sync_fn.__name__ == 'sync_fn'
+    assert [histogram.count(function=x) for x in ('block', 'sync', 'async', 'error')] == [1, 1, 1, 1]
+    assert 'test_function_seconds_bucket{function="async",le="0.005"} 0' in histogram.render()
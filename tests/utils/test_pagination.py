@@ -0,0 +1,29 @@
+import pytest
+
+from src.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    """Функция проверяет кодирование и декодирование курсора постраничной выборки.
+    """
+    cursor = encode_cursor(['пример-1.mp4', 12])
+    assert '=' not in cursor
+    assert decode_cursor(cursor, [str, int]) == ['пример-1.mp4', 12]
+
+
+@pytest.mark.parametrize('cursor', [
+    '',
+    '!!!',
+    encode_cursor(['a.mp4']),
+    encode_cursor(['a.mp4', '12']),
+    encode_cursor(['a.mp4', True]),
+    encode_cursor({'video_file_name': 'a.mp4'}),
+])
+def test_cursor_invalid(cursor: str):
+    """Функция проверяет отклонение повреждённых курсоров.
+
+    Args:
+        cursor: Курсор.
+    """
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, [str, int])
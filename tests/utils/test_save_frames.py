@@ -0,0 +1,66 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from src.utils.save_frames import (
+    encode_params, fit_frame_size, frame_file_name, parse_frame_file_name, write_frame, write_frames,
+)
+
+
+def test_write_frames(tmp_path):
+    """Функция проверяет параллельную запись кадров: файлы без потерь декодируются в исходные кадры,
+       временные файлы не остаются в каталоге.
+
+    Args:
+        tmp_path: Временный каталог для кадров.
+    """
+    frames = [np.full((36, 64, 3), i, dtype=np.uint8) for i in range(5)]
+    frame_paths = [os.path.join(tmp_path, f'{i}.png') for i in range(5)]
+
+    write_frames(frames, frame_paths, encode_params())
+
+    assert sorted(os.listdir(tmp_path)) == sorted(f'{i}.png' for i in range(5))
+    for (frame, frame_path) in zip(frames, frame_paths):
+        assert np.array_equal(cv2.imread(frame_path), frame)
+
+
+@pytest.mark.parametrize('limits, size', [
+    ({}, None),
+    ({'max_side': 320}, (320, 180)),
+    ({'max_width': 1000}, (1000, 562)),
+    ({'max_height': 90}, (160, 90)),
+    ({'max_width': 320, 'max_height': 90}, (160, 90)),
+    ({'max_side': 1920}, None),
+    ({'max_width': 4000}, None),
+])
+def test_fit_frame_size(limits: dict, size):
+    """Функция проверяет вычисление размера уменьшенного кадра с сохранением пропорций.
+
+    Args:
+        limits: Ограничения размера кадра.
+        size: Ожидаемый размер кадра или None, если уменьшение не требуется.
+    """
+    assert fit_frame_size(1920, 1080, **limits) == size
+
+
+def test_frame_file_name():
+    """Функция проверяет имена файлов с кадрами исходного и уменьшенного размера.
+    """
+    assert frame_file_name(7, 'png') == '7.png'
+    assert frame_file_name(7, 'jpg', (320, 180)) == '7_320x180.jpg'
+    assert parse_frame_file_name('7.png') == (7, None, 'png')
+    assert parse_frame_file_name('7_320x180.jpg') == (7, (320, 180), 'jpg')
+    assert parse_frame_file_name('.7.png.tmp') is None
+
+
+def test_write_frame_resize(tmp_path):
+    """Функция проверяет уменьшение кадра перед записью.
+
+    Args:
+        tmp_path: Временный каталог для кадров.
+    """
+    frame_path = os.path.join(tmp_path, frame_file_name(0, 'png', (32, 18)))
+    write_frame(np.zeros((36, 64, 3), dtype=np.uint8), frame_path, size=(32, 18))
+    assert cv2.imread(frame_path).shape == (18, 32, 3)
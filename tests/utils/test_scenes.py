@@ -0,0 +1,82 @@
+import os
+from typing import TYPE_CHECKING
+
+import cv2
+import numpy as np
+
+from src.utils import scenes
+from src.utils.scenes import (
+    DIFFERENCE_METRIC, HISTOGRAM_METRIC, SceneScoreStore, difference_scores, histogram_scores, scan_scene_scores,
+    select_scene_frames
+)
+
+if TYPE_CHECKING:
+    import pytest
+
+
+def test_scene_scores():
+    """Функция проверяет векторные оценки отличия соседних кадров.
+    """
+    frames = np.zeros((4, 8, 8), dtype=np.uint8)
+    frames[2:] = 255
+    frames[3, :4] = 0
+
+    assert np.allclose(histogram_scores(frames), [0, 1, 0.5])
+    assert np.allclose(difference_scores(frames), [0, 1, 0.5])
+
+
+def test_select_scene_frames():
+    """Функция проверяет выбор кадров с наибольшими оценками не ближе минимального расстояния друг к другу.
+    """
+    frame_numbers = np.arange(0, 20, 2)
+    scores = np.array([1, 0, 0.9, 0.8, 0, 0, 0.5, 0, 0.7, 0])
+
+    assert select_scene_frames(frame_numbers, scores, 3) == [0, 4, 6]
+    assert select_scene_frames(frame_numbers, scores, 3, min_distance=3) == [0, 4, 16]
+    assert select_scene_frames(frame_numbers, scores, 20, min_distance=10) == [0, 16]
+
+
+def _write_scenes_video(video_path: str) -> None:
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (64, 48))
+    for frame_number in range(30):
+        brightness = 40 if frame_number < 12 else 200 if frame_number < 21 else 120
+        writer.write(np.full((48, 64, 3), brightness, dtype=np.uint8))
+    writer.release()
+
+
+def test_scan_scene_scores(tmp_path):
+    """Функция проверяет обнаружение смены сцен в видеофайле с однотонными кадрами.
+    """
+    video_path = str(tmp_path / 'scenes.avi')
+    _write_scenes_video(video_path)
+
+    for metric in (HISTOGRAM_METRIC, DIFFERENCE_METRIC):
+        frame_numbers, scores = scan_scene_scores(video_path, metric)
+        assert frame_numbers.tolist() == list(range(30))
+        assert select_scene_frames(frame_numbers, scores, 3) == [0, 12, 21]
+
+    frame_numbers, scores = scan_scene_scores(video_path, HISTOGRAM_METRIC, step=4)
+    assert frame_numbers.tolist() == list(range(0, 30, 4))
+    assert select_scene_frames(frame_numbers, scores, 3) == [0, 12, 24]
+
+
+def test_scene_score_store(tmp_path, monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет сохранение оценок кадров в файл и их повторное использование без декодирования.
+
+    Args:
+        tmp_path: Временный каталог.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    video_path = str(tmp_path / 'scenes.avi')
+    _write_scenes_video(video_path)
+    store = SceneScoreStore(str(tmp_path / 'index'))
+    frame_numbers, scores = store.scan(video_path, HISTOGRAM_METRIC, 2).result(timeout=30)
+    assert select_scene_frames(frame_numbers, scores, 3) == [0, 12, 22]
+    assert os.path.isfile(store.scores_path(video_path, HISTOGRAM_METRIC, 2, 64))
+
+    monkeypatch.setattr(scenes, 'scan_scene_scores', None)
+    other_store = SceneScoreStore(str(tmp_path / 'index'))
+    cached_numbers, cached_scores = other_store.scan(video_path, HISTOGRAM_METRIC, 2).result()
+    assert cached_numbers.tolist() == frame_numbers.tolist()
+    assert np.array_equal(cached_scores, scores)
+    store.shutdown()
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+def test_single_flight_coalesces_calls():
+    """Функция проверяет, что одновременные вызовы с одинаковым ключом выполняются один раз.
+    """
+    single_flight = SingleFlight()
+    calls = []
+
+    async def work(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.05)
+        return key.upper()
+
+    async def main() -> list:
+        results = await asyncio.gather(*[
+            single_flight.run(key, lambda key=key: work(key)) for key in ['a', 'a', 'b', 'a']
+        ])
+        assert single_flight.pending() == 0
+        # после завершения вызов выполняется заново
+        results.append(await single_flight.run('a', lambda: work('a')))
+        return results
+
+    assert asyncio.run(main()) == ['A', 'A', 'B', 'A', 'A']
+    assert calls == ['a', 'b', 'a']
+    assert single_flight.coalesced == 2
+
+
+def test_single_flight_errors_and_cancellation():
+    """Функция проверяет передачу исключения всем ожидающим вызовам и продолжение вызова
+       после отмены первого ожидающего запроса.
+    """
+    single_flight = SingleFlight()
+
+    async def fail() -> None:
+        await asyncio.sleep(0.01)
+        raise ValueError('failed')
+
+    async def slow() -> str:
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    async def main() -> None:
+        results = await asyncio.gather(
+            single_flight.run('fail', fail), single_flight.run('fail', fail), return_exceptions=True
+        )
+        assert all(isinstance(x, ValueError) for x in results)
+
+        first = asyncio.ensure_future(single_flight.run('slow', slow))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(single_flight.run('slow', slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 'done'
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+import os
+
+from src.utils.config import get_settings
+from src.utils.video_capture import CapturePool
+
+
+def test_capture_pool_lru_eviction():
+    """Функция проверяет вытеснение давно не использовавшихся видеофайлов и счётчики пула.
+    """
+    video_dir_path = get_settings().fastAPI.VIDEOS_DIR_PATH
+    pool = CapturePool(max_size=2)
+    paths = [os.path.join(video_dir_path, x) for x in ('sample-1.mp4', 'sample-2.mp4', 'sample-3.mp4')]
+
+    with pool.acquire(paths[0]) as cap:
+        assert cap.isOpened()
+    with pool.acquire(paths[1]):
+        pass
+    with pool.acquire(paths[0]):
+        pass
+    # вытесняется sample-2.mp4, к которому дольше всего не обращались
+    with pool.acquire(paths[2]):
+        pass
+    with pool.acquire(paths[0]):
+        pass
+
+    assert pool.size() == 2
+    assert pool.stats.as_dict() == {'hits': 2, 'misses': 3, 'evictions': 1}
+    pool.clear()
+    assert pool.size() == 0
+
+
+def test_capture_pool_concurrent_handles():
+    """Функция проверяет, что одновременные запросы к одному видеофайлу получают разные копии,
+    а в пуле остаётся не больше max_handles свободных копий.
+    """
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-1.mp4')
+    pool = CapturePool(max_size=2, max_handles=1)
+
+    with pool.acquire(video_path) as first_cap, pool.acquire(video_path) as second_cap:
+        assert first_cap is not second_cap
+        assert first_cap.isOpened() and second_cap.isOpened()
+    # вторая копия возвращена первой и осталась в пуле, первая закрыта при возврате
+    assert not first_cap.isOpened()
+    with pool.acquire(video_path) as cap:
+        assert cap is second_cap
+        assert cap.isOpened()
+
+    assert pool.stats.as_dict() == {'hits': 1, 'misses': 2, 'evictions': 0}
+    pool.clear()
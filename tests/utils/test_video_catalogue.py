@@ -0,0 +1,89 @@
+import os
+import time
+from typing import TYPE_CHECKING
+
+from src.utils.video_catalogue import MTIME_SORT, VideoCatalogue
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _write(path: 'Path', size: int, mtime: int) -> None:
+    path.write_bytes(b'0' * size)
+    os.utime(path, (mtime, mtime))
+
+
+def test_video_catalogue_updates(tmp_path: 'Path'):
+    """Функция проверяет обновление каталога видеофайлов при изменении каталога на диске.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    _write(tmp_path / 'b.mp4', 10, 1000)
+    _write(tmp_path / 'a.mp4', 20, 2000)
+    (tmp_path / 'subdir').mkdir()
+    catalogue = VideoCatalogue(str(tmp_path))
+
+    entries, total = catalogue.page()
+    assert [x.file_name for x in entries] == ['a.mp4', 'b.mp4']
+    assert total == 2
+    assert entries[0].file_path == str(tmp_path / 'a.mp4')
+    assert entries[0].size == 20
+
+    entries, _ = catalogue.page(sort=MTIME_SORT, descending=True)
+    assert [x.file_name for x in entries] == ['a.mp4', 'b.mp4']
+
+    _write(tmp_path / 'c.mp4', 5, 3000)
+    os.remove(tmp_path / 'b.mp4')
+    # время изменения каталога может совпасть с предыдущим при грубом разрешении таймера ФС
+    os.utime(tmp_path, ns=(os.stat(tmp_path).st_atime_ns, os.stat(tmp_path).st_mtime_ns + 1))
+    entries, total = catalogue.page(sort='size')
+    assert [x.file_name for x in entries] == ['c.mp4', 'a.mp4']
+    assert total == 2
+
+    entries, total = catalogue.page(prefix='c', offset=0, limit=10)
+    assert [x.file_name for x in entries] == ['c.mp4']
+    assert total == 1
+
+
+def test_video_catalogue_rescan(tmp_path: 'Path'):
+    """Функция проверяет полное обновление параметров перезаписанных видеофайлов.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    _write(tmp_path / 'a.mp4', 10, 1000)
+    catalogue = VideoCatalogue(str(tmp_path), rescan_interval=None)
+    assert catalogue.page()[0][0].size == 10
+
+    # перезапись файла не меняет время изменения каталога
+    dir_stat = os.stat(tmp_path)
+    _write(tmp_path / 'a.mp4', 30, 2000)
+    os.utime(tmp_path, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    assert catalogue.page()[0][0].size == 10
+
+    # полное обновление выполняется в фоне, запрос получает предыдущий список
+    catalogue.rescan_interval = 0
+    catalogue.page()
+    deadline = time.monotonic() + 5
+    while catalogue.page()[0][0].size != 30 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert catalogue.page()[0][0].size == 30
+
+
+def test_video_catalogue_rescan_sync(tmp_path: 'Path'):
+    """Функция проверяет полное обновление параметров видеофайлов вызовом rescan.
+
+    Args:
+        tmp_path: Временный каталог.
+    """
+    _write(tmp_path / 'a.mp4', 10, 1000)
+    catalogue = VideoCatalogue(str(tmp_path), rescan_interval=3600)
+    assert catalogue.page()[0][0].size == 10
+
+    dir_stat = os.stat(tmp_path)
+    _write(tmp_path / 'a.mp4', 30, 2000)
+    os.utime(tmp_path, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    assert catalogue.page()[0][0].size == 10
+    catalogue.rescan()
+    assert catalogue.page()[0][0].size == 30
@@ -0,0 +1,115 @@
+import os
+import time
+from typing import TYPE_CHECKING
+
+from sqlalchemy import delete, insert, select
+
+from src.models import video_metadatas
+from src.utils import video_index
+from src.utils.config import get_settings
+from src.utils.video_capture import MetadataCache, VideoMetadata, video_file_key
+from src.utils.video_catalogue import VideoCatalogue
+from src.utils.video_index import VideoDigests, VideoProber, file_digest, get_indexed_video_metadata
+
+if TYPE_CHECKING:
+    import pytest
+    from sqlalchemy import Engine
+
+
+def test_video_prober(engine: 'Engine', monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет заполнение таблицы video_metadata параметрами видеофайлов каталога.
+
+    Args:
+        engine: Подключение к базе данных с таблицами и без данных.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    cache = MetadataCache(16)
+    monkeypatch.setattr(video_index, 'get_metadata_cache', lambda: cache)
+    with engine.begin() as conn:
+        conn.execute(insert(video_metadatas).values(file_name='removed.mp4', file_size=1, mtime_ns=1))
+
+    entries, _ = VideoCatalogue(get_settings().fastAPI.VIDEOS_DIR_PATH).page()
+    prober = VideoProber(workers=2, chunk_size=4)
+    assert prober.probe_all(entries) == len(entries)
+    # параметры уже сохранены
+    assert prober.probe_all(entries) == 0
+
+    with engine.connect() as conn:
+        rows = {x.file_name: x for x in conn.execute(select(video_metadatas))}
+    assert set(rows) == {x.file_name for x in entries}
+    row = rows['sample-1.mp4']
+    assert (row.fps, row.frame_count, row.width, row.height, row.codec) == (30.0, 171, 1920, 1080, 'h264')
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-1.mp4')
+    _, mtime_ns, size = video_file_key(video_path)
+    assert (row.file_size, row.mtime_ns) == (size, mtime_ns)
+    assert row.content_digest == file_digest(video_path)
+
+
+def test_get_indexed_video_metadata(engine: 'Engine', monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет получение параметров видеофайла из таблицы video_metadata без открытия видеофайла.
+
+    Args:
+        engine: Подключение к базе данных с таблицами и без данных.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    cache = MetadataCache(16)
+    monkeypatch.setattr(video_index, 'get_metadata_cache', lambda: cache)
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+    _, mtime_ns, size = video_file_key(video_path)
+    indexed = VideoMetadata(10.0, 20, 2.0, 320, 240, 'test')
+    with engine.begin() as conn:
+        conn.execute(insert(video_metadatas).values(
+            file_name='sample-2.mp4', file_size=size, mtime_ns=mtime_ns, **indexed._asdict()
+        ))
+
+    try:
+        assert get_indexed_video_metadata('sample-2.mp4', video_path) == indexed
+    finally:
+        # подставленные параметры не должны попасть в другие тесты
+        with engine.begin() as conn:
+            conn.execute(delete(video_metadatas).where(video_metadatas.c.file_name == 'sample-2.mp4'))
+
+    # при промахе параметры считываются из видеофайла и сохраняются
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-3.mp4')
+    metadata = get_indexed_video_metadata('sample-3.mp4', video_path)
+    assert (metadata.frame_count, metadata.width, metadata.height) == (901, 640, 360)
+    with engine.connect() as conn:
+        row = conn.execute(select(video_metadatas).where(video_metadatas.c.file_name == 'sample-3.mp4')).one()
+    assert row.frame_count == 901
+
+
+def test_file_digest(tmp_path):
+    """Функция проверяет, что хеш зависит только от содержимого файла.
+    """
+    (tmp_path / 'a.mp4').write_bytes(b'video')
+    (tmp_path / 'b.mp4').write_bytes(b'video')
+    (tmp_path / 'c.mp4').write_bytes(b'other')
+
+    assert file_digest(str(tmp_path / 'a.mp4')) == file_digest(str(tmp_path / 'b.mp4'))
+    assert file_digest(str(tmp_path / 'a.mp4')) != file_digest(str(tmp_path / 'c.mp4'))
+
+
+def test_video_digests_background(engine: 'Engine', monkeypatch: 'pytest.MonkeyPatch'):
+    """Функция проверяет, что неизвестный хеш не вычисляется при обращении, а вычисляется в фоне
+       и сохраняется в таблицу video_metadata, откуда берётся после перезапуска.
+
+    Args:
+        engine: Подключение к базе данных с таблицами и без данных.
+        monkeypatch: Фикстура для подмены атрибутов.
+    """
+    monkeypatch.setattr(video_index, 'get_metadata_cache', lambda: MetadataCache(16))
+    video_path = os.path.join(get_settings().fastAPI.VIDEOS_DIR_PATH, 'sample-2.mp4')
+    assert get_indexed_video_metadata('sample-2.mp4', video_path) is not None
+
+    digests = VideoDigests(16)
+    assert digests.get('sample-2.mp4', video_path) is None
+    deadline = time.monotonic() + 10
+    while digests.get('sample-2.mp4', video_path) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert digests.get('sample-2.mp4', video_path) == file_digest(video_path)
+
+    with engine.connect() as conn:
+        assert conn.execute(select(video_metadatas.c.content_digest)).scalar() == file_digest(video_path)
+    # новый кеш берёт хеш из таблицы без вычисления
+    monkeypatch.setattr(video_index, 'file_digest', None)
+    assert VideoDigests(16).get('sample-2.mp4', video_path) is not None
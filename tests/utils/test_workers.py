@@ -0,0 +1,98 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.workers import DecodeWorkerPool, WorkerPoolBusy
+
+
+def test_decode_pool_queue_limit():
+    """Функция проверяет отказ в выполнении задачи при заполненной очереди пула обработчиков.
+    """
+    pool = DecodeWorkerPool(max_workers=1, queue_limit=1)
+    release = threading.Event()
+
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(WorkerPoolBusy):
+            await pool.run(time.sleep, 0)
+        release.set()
+        assert await asyncio.gather(*running) == [True, True]
+        assert await pool.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+    assert pool.pending == 0
+    pool.shutdown()
+
+
+def test_decode_pool_timeout():
+    """Функция проверяет ограничение времени ожидания результата задачи.
+    """
+    pool = DecodeWorkerPool(max_workers=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(time.sleep, 0.5)
+
+    asyncio.run(scenario())
+    pool.shutdown()
+
+
+def test_decode_pool_iterate_timeout_closes_iterator():
+    """Функция проверяет, что после истечения времени ожидания элемента итератор закрывается
+    в потоке пула только после завершения выполняемого шага, а место в очереди освобождается после закрытия.
+    """
+    pool = DecodeWorkerPool(max_workers=1, timeout=0.05)
+    closed = threading.Event()
+
+    def slow_items():
+        try:
+            yield 1
+            time.sleep(0.3)
+            yield 2
+        finally:
+            closed.set()
+
+    async def scenario():
+        items = pool.iterate(slow_items())
+        assert await items.__anext__() == 1
+        with pytest.raises(asyncio.TimeoutError):
+            await items.__anext__()
+        # второй шаг генератора ещё выполняется
+        assert pool.pending == 1
+
+    asyncio.run(scenario())
+    assert closed.wait(2)
+    time.sleep(0.05)
+    assert pool.pending == 0
+    pool.shutdown()
+
+
+def test_decode_pool_iterate_errors_and_prefetch():
+    """Функция проверяет передачу исключения итератора и вычисление элементов без ожидания клиента.
+    """
+    pool = DecodeWorkerPool(max_workers=1, timeout=1)
+    produced = []
+
+    def items():
+        for i in range(3):
+            produced.append(i)
+            yield i
+        raise ValueError('broken')
+
+    async def scenario():
+        iterator = pool.iterate(items(), buffer_size=4)
+        assert await iterator.__anext__() == 0
+        await asyncio.sleep(0.1)
+        # остальные элементы вычислены, пока клиент не запрашивал их
+        assert produced == [0, 1, 2]
+        assert [await iterator.__anext__(), await iterator.__anext__()] == [1, 2]
+        with pytest.raises(ValueError):
+            await iterator.__anext__()
+
+    asyncio.run(scenario())
+    time.sleep(0.05)
+    assert pool.pending == 0
+    pool.shutdown()